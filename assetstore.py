@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Optional
+
+import tabformat
+from cellgrid import Grid
+
+#  Content addressed asset store.
+
+#  Token and decorator images are copied into the store under the hash of their
+#  content and boards record the path of the stored copy, .\assets\<hash>.png.
+#  It is still a path, so the gameboard runtime loads it as before, but the same
+#  image picked from two places is stored, decoded and cached once, and a board
+#  no longer depends on where its images were picked from.
+
+#  Stored files never change, so the hash in the name is all that is needed to
+#  tell whether a cached image is current. The name an image was first stored
+#  under is kept in the store's index and shown in place of the hash.
+
+#  "assetstore.py migrate FILE..." copies the images of existing boards into the
+#  store and points the boards at the stored copies.
+
+ASSETS = "assets"
+
+INDEX = "index.json"
+
+#  Hex digits of the SHA-256 kept in the name, 128 bits.
+
+HASH_LENGTH = 32
+
+#  Paths are recorded relative to the designer's directory with Windows
+#  separators, as relative_path does.
+
+PREFIX = ".\\" + ASSETS + "\\"
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ASSETS)
+
+
+def local_path(filename: str) -> str:
+    return filename.replace("\\", os.sep)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def is_stored(filename: str) -> bool:
+    return filename.startswith(PREFIX)
+
+
+def stored_hash(filename: str) -> str:
+    return os.path.splitext(filename[len(PREFIX) :])[0]
+
+
+def write_file(filename: str, data: bytes) -> None:
+    _temporary: str = filename + ".tmp"
+    with open(_temporary, "wb") as _file:
+        _file.write(data)
+    os.replace(_temporary, filename)
+
+
+class AssetStore:
+    def __init__(self, root: str = ROOT) -> None:
+        self.root: str = root
+
+        #  Hash to display name, read when first needed.
+
+        self.names: Optional[dict[str, str]] = None
+
+    def index(self) -> dict[str, str]:
+        if self.names is None:
+            try:
+                with open(os.path.join(self.root, INDEX), "r") as _file:
+                    self.names = json.load(_file)
+            except (OSError, ValueError):
+                self.names = {}
+        return self.names
+
+    def save_index(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        write_file(
+            os.path.join(self.root, INDEX),
+            json.dumps(self.index(), indent=1, sort_keys=True).encode("utf-8"),
+        )
+
+    #  Store an image and return the path boards should record for it. name is
+    #  shown for it, by default the name of the file it came from.
+
+    def add(self, filename: str, name: Optional[str] = None) -> str:
+        if is_stored(filename):
+            return filename
+
+        with open(local_path(filename), "rb") as _file:
+            _data: bytes = _file.read()
+        _hash: str = content_hash(_data)
+        _stored: str = _hash + (os.path.splitext(filename)[1].lower() or ".png")
+
+        _target: str = os.path.join(self.root, _stored)
+        if not os.path.exists(_target):
+            os.makedirs(self.root, exist_ok=True)
+            write_file(_target, _data)
+
+        _names: dict[str, str] = self.index()
+        if _hash not in _names:
+            _names[_hash] = name or os.path.basename(local_path(filename))
+            self.save_index()
+
+        return PREFIX + _stored
+
+    def name_of(self, filename: str) -> str:
+        if not is_stored(filename):
+            return filename
+        return self.index().get(stored_hash(filename), filename)
+
+
+#  Migration of existing boards.
+
+
+class Migration:
+    def __init__(self, store: AssetStore) -> None:
+        self.store: AssetStore = store
+        self.stored: dict[str, str] = {}
+        self.missing: set[str] = set()
+
+    def path(self, filename: str, name: Optional[str] = None) -> str:
+        if filename == "" or is_stored(filename):
+            return filename
+        if filename not in self.stored:
+            try:
+                self.stored[filename] = self.store.add(filename, name)
+            except OSError:
+                self.missing.add(filename)
+                self.stored[filename] = filename
+        return self.stored[filename]
+
+    def board(self, gameboard: Any) -> None:
+        _decorators = gameboard.cell_decorator
+        if isinstance(_decorators, Grid):
+            _decorators = _decorators.to_lists()
+        gameboard.cell_decorator = [
+            [self.path(_filename) for _filename in _row] for _row in _decorators
+        ]
+        gameboard.tokens = [
+            (_name, self.path(_filename, _name))
+            for _name, _filename in gameboard.tokens
+        ]
+        gameboard.board_decorator = [
+            (self.path(_filename), _x, _y)
+            for _filename, _x, _y in gameboard.board_decorator
+        ]
+
+    def file(self, filename: str) -> None:
+        _gameboard = tabformat.load_any(filename)
+        self.board(_gameboard)
+        if tabformat.is_tab2(filename):
+            _data: bytes = tabformat.encode(_gameboard)
+        else:
+            _data = tabformat.dumps_legacy(_gameboard)
+        write_file(filename, _data)
+
+    #  Sizes in bytes of the distinct files the boards referred to, and of the
+    #  distinct contents they now share.
+
+    def report(self) -> tuple[int, int, int, int]:
+        _sources: list[str] = [
+            _source for _source in self.stored if _source not in self.missing
+        ]
+        _stored: set[str] = {self.stored[_source] for _source in _sources}
+        return (
+            len(_sources),
+            sum(os.path.getsize(local_path(_source)) for _source in _sources),
+            len(_stored),
+            sum(
+                os.path.getsize(os.path.join(self.store.root, _path[len(PREFIX) :]))
+                for _path in _stored
+            ),
+        )
+
+
+def main() -> None:
+    _usage: str = "usage: assetstore.py migrate FILE..."
+    _args: list[str] = sys.argv[1:]
+
+    if len(_args) >= 2 and _args[0] == "migrate":
+        _migration = Migration(AssetStore())
+        for _filename in _args[1:]:
+            _migration.file(_filename)
+            print(f"migrated {_filename}")
+        for _filename in sorted(_migration.missing):
+            print(f"  missing {_filename}", file=sys.stderr)
+        _files, _size, _assets, _stored = _migration.report()
+        print(
+            f"{_files} files of {_size} bytes stored as "
+            f"{_assets} assets of {_stored} bytes"
+        )
+    else:
+        print(_usage)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import io
+import json
+import os
+import sys
+from typing import Any, Callable, NamedTuple, Optional
+
+import tabformat
+from assetstore import write_file
+from bundle import Bundle, drawn_image, is_bundle
+from imageloader import drawn_sizes
+
+#  Sprite atlas export.
+
+#  Every token, cell decorator and board decorator on a board is drawn at its
+#  final size into a single atlas PNG, so a game can load a board's images with
+#  one decode. Tokens are packed at the size of every cell they can be placed on,
+#  cell decorators at the size of their cells and board decorators at their own
+#  size.
+
+#  The sprites are packed with the MaxRects algorithm, which keeps the list of
+#  maximal free rectangles left in the atlas and places each sprite in the free
+#  rectangle chosen by a heuristic, splitting the free rectangles it overlaps.
+#  Sprites are packed largest first, with both the bottom-left and the best
+#  short side fit heuristics and a range of atlas widths, and the smallest atlas
+#  is kept.
+
+#  The coordinate table is written beside the atlas as JSON:
+#
+#    {"image": "board.png", "width": W, "height": H, "paths": [path, ...],
+#     "sprites": [[path index, drawn width, drawn height, x, y, width, height]]}
+#
+#  The drawn width and height are 0 for board decorators, which are drawn at the
+#  size of their image.
+
+#  "atlas.py export BOARD ATLAS" exports the atlas of a board from the command
+#  line and reports how well it packed.
+
+#  Pixels left between sprites, so that a sprite drawn scaled does not pick up
+#  the edge of its neighbour.
+
+PADDING = 1
+
+#  Atlas widths tried, as multiples of the narrowest possible width.
+
+WIDTH_STEPS = 16
+
+
+class Rectangle(NamedTuple):
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def right(self) -> int:
+        return self.x + self.width
+
+    @property
+    def bottom(self) -> int:
+        return self.y + self.height
+
+    def overlaps(self, other: "Rectangle") -> bool:
+        return (
+            self.x < other.right
+            and other.x < self.right
+            and self.y < other.bottom
+            and other.y < self.bottom
+        )
+
+    def contains(self, other: "Rectangle") -> bool:
+        return (
+            self.x <= other.x
+            and self.y <= other.y
+            and other.right <= self.right
+            and other.bottom <= self.bottom
+        )
+
+
+#  Heuristics score a free rectangle for a sprite, lowest first.
+
+
+def bottom_left(free: Rectangle, width: int, height: int) -> tuple[int, int]:
+    return free.y + height, free.x
+
+
+def best_short_side_fit(free: Rectangle, width: int, height: int) -> tuple[int, int]:
+    _horizontal: int = free.width - width
+    _vertical: int = free.height - height
+    return min(_horizontal, _vertical), max(_horizontal, _vertical)
+
+
+HEURISTICS: dict[str, Callable[[Rectangle, int, int], tuple[int, int]]] = {
+    "bottom-left": bottom_left,
+    "best-short-side": best_short_side_fit,
+}
+
+
+class MaxRects:
+    def __init__(self, width: int, height: int, heuristic: Callable) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.heuristic: Callable = heuristic
+        self.free: list[Rectangle] = [Rectangle(0, 0, width, height)]
+
+    def insert(self, width: int, height: int) -> Optional[Rectangle]:
+        _best: Optional[Rectangle] = None
+        _best_score: tuple = ()
+        for _free in self.free:
+            if _free.width < width or _free.height < height:
+                continue
+            _score: tuple = self.heuristic(_free, width, height)
+            if _best is None or _score < _best_score:
+                _best = Rectangle(_free.x, _free.y, width, height)
+                _best_score = _score
+        if _best is not None:
+            self.place(_best)
+        return _best
+
+    #  Split every free rectangle the placed one overlaps into the up to four
+    #  maximal rectangles around it. Only the new rectangles can lie inside
+    #  another, the ones left alone were already maximal.
+
+    def place(self, used: Rectangle) -> None:
+        _kept: list[Rectangle] = []
+        _split: list[Rectangle] = []
+        for _rectangle in self.free:
+            if not _rectangle.overlaps(used):
+                _kept.append(_rectangle)
+                continue
+            if used.x > _rectangle.x:
+                _split.append(
+                    Rectangle(
+                        _rectangle.x,
+                        _rectangle.y,
+                        used.x - _rectangle.x,
+                        _rectangle.height,
+                    )
+                )
+            if used.right < _rectangle.right:
+                _split.append(
+                    Rectangle(
+                        used.right,
+                        _rectangle.y,
+                        _rectangle.right - used.right,
+                        _rectangle.height,
+                    )
+                )
+            if used.y > _rectangle.y:
+                _split.append(
+                    Rectangle(
+                        _rectangle.x,
+                        _rectangle.y,
+                        _rectangle.width,
+                        used.y - _rectangle.y,
+                    )
+                )
+            if used.bottom < _rectangle.bottom:
+                _split.append(
+                    Rectangle(
+                        _rectangle.x,
+                        used.bottom,
+                        _rectangle.width,
+                        _rectangle.bottom - used.bottom,
+                    )
+                )
+
+        _split = list(dict.fromkeys(_split))
+        self.free = _kept + [
+            _rectangle
+            for _index, _rectangle in enumerate(_split)
+            if not any(_other.contains(_rectangle) for _other in _kept)
+            and not any(
+                _other.contains(_rectangle)
+                for _other in _split[:_index] + _split[_index + 1 :]
+            )
+        ]
+
+
+class Packing(NamedTuple):
+    width: int
+    height: int
+    placed: list[Rectangle]
+    heuristic: str
+
+    @property
+    def area(self) -> int:
+        return self.width * self.height
+
+
+#  Pack rectangles of the given sizes, returning where each was placed in the
+#  same order. padding is added to the right and bottom of every rectangle.
+
+
+def pack(sizes: list[tuple[int, int]], padding: int = PADDING) -> Packing:
+    if not sizes:
+        return Packing(0, 0, [], "")
+
+    _padded: list[tuple[int, int]] = [
+        (_width + padding, _height + padding) for _width, _height in sizes
+    ]
+    _order: list[int] = sorted(
+        range(len(_padded)),
+        key=lambda _index: (max(_padded[_index]), min(_padded[_index])),
+        reverse=True,
+    )
+    _area: int = sum(_width * _height for _width, _height in _padded)
+    _narrowest: int = max(max(_width for _width, _ in _padded), int(_area**0.5))
+    _tallest: int = sum(_height for _, _height in _padded)
+
+    _best: Optional[Packing] = None
+    for _step in range(WIDTH_STEPS):
+        _width: int = _narrowest + _step * _narrowest // WIDTH_STEPS
+        for _name, _heuristic in HEURISTICS.items():
+            _bin = MaxRects(_width, _tallest, _heuristic)
+            _placed: list[Optional[Rectangle]] = [None] * len(_padded)
+            for _index in _order:
+                _placed[_index] = _bin.insert(*_padded[_index])
+            _used_width: int = max(_rectangle.right for _rectangle in _placed)
+            _used_height: int = max(_rectangle.bottom for _rectangle in _placed)
+            _packing = Packing(_used_width, _used_height, _placed, _name)
+            if _best is None or _packing.area < _best.area:
+                _best = _packing
+
+    return Packing(
+        _best.width - padding,
+        _best.height - padding,
+        [
+            Rectangle(_rectangle.x, _rectangle.y, _width, _height)
+            for _rectangle, (_width, _height) in zip(_best.placed, sizes)
+        ],
+        _best.heuristic,
+    )
+
+
+class AtlasReport(NamedTuple):
+    sprites: int
+    width: int
+    height: int
+    used: int
+    heuristic: str
+    missing: list[str]
+
+    #  Fraction of the atlas covered by sprites.
+
+    @property
+    def efficiency(self) -> float:
+        return self.used / max(self.width * self.height, 1)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.sprites} sprites in {self.width}x{self.height}, "
+            f"{self.efficiency:.1%} used ({self.heuristic})"
+        )
+
+
+def table_filename(filename: str) -> str:
+    return os.path.splitext(filename)[0] + ".json"
+
+
+#  Export the atlas of a board as filename, with its coordinate table beside it.
+#  Images missing from disk are taken from source, the bundle the board was
+#  opened from. job is a FileJob when run on the file worker.
+
+
+def export(
+    gameboard: Any, filename: str, source: Optional[Bundle] = None, job=None
+) -> AtlasReport:
+    from PIL import Image
+
+    _drawn = sorted(drawn_sizes(gameboard), key=lambda _drawn: repr(_drawn))
+    _sprites: list[tuple[tuple, Image.Image]] = []
+    _missing: list[str] = []
+    for _count, _entry in enumerate(_drawn):
+        if job is not None:
+            job.report(0.8 * _count / max(len(_drawn), 1), "Drawing sprites")
+        _image = drawn_image(*_entry, source)
+        if _image is None:
+            if _entry[0] not in _missing:
+                _missing.append(_entry[0])
+            continue
+        _sprites.append((_entry, _image))
+
+    if job is not None:
+        job.report(0.8, "Packing")
+    _packing: Packing = pack([_image.size for _, _image in _sprites])
+
+    _atlas = Image.new("RGBA", (max(_packing.width, 1), max(_packing.height, 1)))
+    _paths: list[str] = list(dict.fromkeys(_entry[0] for _entry, _ in _sprites))
+    _table: list[list[int]] = []
+    for ((_path, _width, _height), _image), _rectangle in zip(
+        _sprites, _packing.placed
+    ):
+        _atlas.paste(_image, (_rectangle.x, _rectangle.y))
+        _table.append(
+            [
+                _paths.index(_path),
+                _width or 0,
+                _height or 0,
+                *_rectangle,
+            ]
+        )
+
+    if job is not None:
+        job.report(0.9, "Writing")
+    _buffer = io.BytesIO()
+    _atlas.save(_buffer, "PNG", optimize=True)
+    write_file(filename, _buffer.getvalue())
+    write_file(
+        table_filename(filename),
+        json.dumps(
+            {
+                "image": os.path.basename(filename),
+                "width": _atlas.width,
+                "height": _atlas.height,
+                "paths": _paths,
+                "sprites": _table,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8"),
+    )
+
+    return AtlasReport(
+        len(_sprites),
+        _packing.width,
+        _packing.height,
+        sum(_image.width * _image.height for _, _image in _sprites),
+        _packing.heuristic,
+        _missing,
+    )
+
+
+def main() -> None:
+    _usage: str = "usage: atlas.py export BOARD ATLAS"
+    _args: list[str] = sys.argv[1:]
+
+    if len(_args) == 3 and _args[0] == "export":
+        if is_bundle(_args[1]):
+            _source: Optional[Bundle] = Bundle(_args[1])
+            _gameboard = _source.board()
+        else:
+            _source = None
+            _gameboard = tabformat.load_any(_args[1])
+        _report: AtlasReport = export(_gameboard, _args[2], _source)
+        print(f"{_args[2]}: {_report}")
+        for _filename in _report.missing:
+            print(f"  missing {_filename}", file=sys.stderr)
+    else:
+        print(_usage)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+import tabformat
+from boardmodel import BoardModel
+from bulkfill import board_mask, checkerboard, diagonal
+
+#  Benchmarks for the designer's hot paths.
+
+#  The GUI benchmarks drive a real GameboarddesignerApp, without entering the
+#  main loop, and include the redraw each handler causes. They need a display,
+#  so when there is none a virtual X server is started with Xvfb if it is
+#  installed. Without either only the headless benchmarks are run, which time the
+#  same operations on the model, the file formats and the PNG renderer.
+
+#  Results are written as JSON and can be compared against a stored baseline, a
+#  benchmark regresses when its fastest run is more than the threshold slower.
+
+PROJECT_PATH = os.path.dirname(os.path.abspath(__file__))
+SAVED_BOARDS = sorted(glob.glob(os.path.join(PROJECT_PATH, "saved", "*.tab")))
+
+SYNTHETIC_SIZES = (8, 16, 32, 50)
+
+#  Each benchmark runs at least REPEAT times and for at least MIN_TIME seconds.
+#  As with timeit the garbage collector is off while timing and the fastest run
+#  is compared against the baseline, as it is the least affected by other work
+#  on the machine.
+
+REPEAT = 5
+MIN_TIME = 0.2
+MAX_RUNS = 1000
+THRESHOLD = 0.25
+
+#  Differences smaller than this are treated as noise, in ms.
+
+NOISE = 0.1
+
+BASELINE = "benchmark_baseline.json"
+
+XVFB_DISPLAYS = range(99, 110)
+XVFB_TIMEOUT = 5.0
+
+
+#  Boards.
+
+
+#  A square board of the given size grown from the first saved board, with a
+#  decorator on each diagonal and a token on every cell of the first and last two
+#  rows, so the number of assets drawn grows with the size.
+
+
+def synthetic_board(size: int) -> Any:
+    _gameboard = tabformat.load_legacy(SAVED_BOARDS[0])
+    _model = BoardModel(_gameboard)
+    _model.resize_columns(size)
+    _model.resize_rows(size)
+
+    _decorators: list[str] = [
+        ".\\saved\\decorators\\" + os.path.basename(_filename)
+        for _filename in sorted(
+            glob.glob(os.path.join(PROJECT_PATH, "saved", "decorators", "*.png"))
+        )
+    ]
+    if _decorators:
+        _model.fill_mask(
+            "cell_decorator", board_mask(_gameboard, diagonal), _decorators[0]
+        )
+        _model.fill_mask(
+            "cell_decorator",
+            board_mask(_gameboard, diagonal, anti=True),
+            _decorators[-1],
+        )
+
+    if _gameboard.tokens:
+        for _row in (0, 1, size - 2, size - 1):
+            for _column in range(size):
+                _name: str = _gameboard.tokens[_row % len(_gameboard.tokens)][0]
+                _model.set_cell("placed_tokens", _row, _column, _name)
+    return _gameboard
+
+
+#  Write the saved and synthetic boards to directory as pickled .tab files,
+#  returning (label, filename) pairs.
+
+
+def prepare_boards(directory: str) -> list[tuple[str, str]]:
+    _boards: list[tuple[str, str]] = [
+        (os.path.splitext(os.path.basename(_filename))[0], _filename)
+        for _filename in SAVED_BOARDS
+    ]
+    if SAVED_BOARDS:
+        for _size in SYNTHETIC_SIZES:
+            _filename: str = os.path.join(directory, f"synthetic_{_size}.tab")
+            tabformat.save_legacy(synthetic_board(_size), _filename)
+            _boards.append((f"synthetic_{_size}", _filename))
+    return _boards
+
+
+#  Timing.
+
+
+def measure(
+    function: Callable[[], Any],
+    repeat: int,
+    setup: Optional[Callable[[], Any]] = None,
+) -> dict[str, Any]:
+    _runs: list[float] = []
+    _total: float = 0.0
+    while len(_runs) < repeat or (_total < MIN_TIME and len(_runs) < MAX_RUNS):
+        if setup is not None:
+            setup()
+        gc.disable()
+        try:
+            _start: float = time.perf_counter()
+            function()
+            _elapsed: float = time.perf_counter() - _start
+        finally:
+            gc.enable()
+        _total += _elapsed
+        _runs.append(_elapsed * 1000)
+    return {
+        "median_ms": statistics.median(_runs),
+        "min_ms": min(_runs),
+        "runs": len(_runs),
+    }
+
+
+def headless_benchmarks(
+    boards: list[tuple[str, str]], directory: str, repeat: int
+) -> dict[str, dict]:
+    import rasterize
+
+    _results: dict[str, dict] = {}
+    for _label, _filename in boards:
+        _gameboard = tabformat.load_legacy(_filename)
+        _tab2: str = os.path.join(directory, _label + tabformat.EXTENSION)
+        tabformat.save(_gameboard, _tab2)
+
+        _results[f"headless/load_pickle/{_label}"] = measure(
+            lambda: tabformat.load_legacy(_filename), repeat
+        )
+        _results[f"headless/load_tab2/{_label}"] = measure(
+            lambda: tabformat.load_any(_tab2), repeat
+        )
+        _results[f"headless/save_pickle/{_label}"] = measure(
+            lambda: tabformat.save_legacy(
+                _gameboard, os.path.join(directory, "save.tab")
+            ),
+            repeat,
+        )
+
+        _state = SimpleNamespace()
+
+        def _fresh() -> None:
+            _state.gameboard = tabformat.load_legacy(_filename)
+
+        _results[f"headless/attach/{_label}"] = measure(
+            lambda: BoardModel(_state.gameboard), repeat, _fresh
+        )
+
+        def _single_column() -> None:
+            _fresh()
+            _state.model = BoardModel(_state.gameboard)
+            _state.model.resize_columns(1)
+
+        def _fifty_columns() -> None:
+            _fresh()
+            _state.model = BoardModel(_state.gameboard)
+            _state.model.resize_columns(50)
+
+        _results[f"headless/grow_columns_1_50/{_label}"] = measure(
+            lambda: _state.model.resize_columns(50), repeat, _single_column
+        )
+        _results[f"headless/shrink_columns_50_1/{_label}"] = measure(
+            lambda: _state.model.resize_columns(1), repeat, _fifty_columns
+        )
+
+        _model = BoardModel(tabformat.load_legacy(_filename))
+
+        def _checkerboard() -> None:
+            _model.fill_mask(
+                "colour_of_cell",
+                board_mask(_model.gameboard, checkerboard, 0),
+                "#ffffff",
+            )
+            _model.fill_mask(
+                "colour_of_cell",
+                board_mask(_model.gameboard, checkerboard, 1),
+                "#000000",
+            )
+
+        _results[f"headless/checkerboard/{_label}"] = measure(_checkerboard, repeat)
+
+        _results[f"headless/rasterize/{_label}"] = measure(
+            lambda: rasterize.render(_gameboard), repeat
+        )
+    return _results
+
+
+#  GUI benchmarks. Every handler is followed by flushing the redraw scheduler
+#  and letting Tk process idle tasks, so the time includes the canvas update.
+
+
+def gui_benchmarks(boards: list[tuple[str, str]], directory: str, repeat: int):
+    from gameboard.gameboard import Gameboard
+
+    from gameboarddesigner import GameboarddesignerApp
+
+    _results: dict[str, dict] = {}
+
+    #  Time to the first interactive frame, with every palette tab built up
+    #  front as before and with only the Details tab built.
+
+    _state = SimpleNamespace(app=None)
+
+    def _destroy() -> None:
+        if _state.app is not None:
+            _state.app.image_loader.shutdown()
+            _state.app.file_worker.shutdown()
+            _state.app.mainwindow.destroy()
+            _state.app = None
+
+    def _first_frame(lazy_tabs: bool) -> Callable[[], None]:
+        def _start() -> None:
+            _state.app = GameboarddesignerApp(lazy_tabs=lazy_tabs)
+            _state.app.load_gameboard()
+            _state.app.show_gameboard()
+            _state.app.mainwindow.update()
+
+        return _start
+
+    _results["gui/first_frame_eager"] = measure(_first_frame(False), repeat, _destroy)
+    _results["gui/first_frame_lazy"] = measure(_first_frame(True), repeat, _destroy)
+    _destroy()
+
+    #  The handlers below belong to every tab, so build them all.
+
+    _app = GameboarddesignerApp(lazy_tabs=False)
+    _app.mainwindow.update()
+
+    def _settle() -> None:
+        _app.redraw.flush()
+        _app.mainwindow.update_idletasks()
+
+    def _open(filename: str) -> None:
+        _app.gameboard, _ = Gameboard.load(filename)
+        _app.filename = filename
+        _app.load_gameboard()
+        _app.show_gameboard()
+        _settle()
+
+    for _label, _filename in boards:
+        _open(_filename)
+
+        def _force_rebuild() -> None:
+            _app.renderer.dimensions = None
+
+        _results[f"gui/show_gameboard/{_label}"] = measure(
+            lambda: (_app.show_gameboard(), _settle()), repeat, _force_rebuild
+        )
+
+        _row: int = _app.gameboard.number_of_cells_vertically - 1
+        _column: int = _app.gameboard.number_of_cells_horizontally - 1
+        _x0, _y0, _x1, _y1 = _app.renderer.layout.cell_bounds(_row, _column)
+        _x, _y = _app.renderer.window_point((_x0 + _x1) / 2, (_y0 + _y1) / 2)
+        _event = SimpleNamespace(x=_x, y=_y)
+        _results[f"gui/cell_selected/{_label}"] = measure(
+            lambda: (_app.renderer.on_click(_event), _settle()), repeat
+        )
+
+        def _columns(count: int) -> Callable[[], None]:
+            def _set() -> None:
+                _app.var_number_of_cells_horizontally.set(count)
+                _app.on_number_of_cells_horizontally_changed()
+                _settle()
+
+            return _set
+
+        _results[f"gui/grow_columns_1_50/{_label}"] = measure(
+            _columns(50), repeat, _columns(1)
+        )
+        _results[f"gui/shrink_columns_50_1/{_label}"] = measure(
+            _columns(1), repeat, _columns(50)
+        )
+
+        _open(_filename)
+        _app.var_cell_light_colour.set("#ffffff")
+        _app.var_cell_dark_colour.set("#000000")
+
+        def _reset_colours() -> None:
+            _app.model.fill_cells("colour_of_cell", "#808080")
+            _settle()
+
+        _results[f"gui/checkerboard/{_label}"] = measure(
+            lambda: (_app.on_apply_checkerboard_colours(), _settle()),
+            repeat,
+            _reset_colours,
+        )
+
+        _results[f"gui/load_gameboard/{_label}"] = measure(
+            lambda: (_app.load_gameboard(), _settle()), repeat
+        )
+
+        _results[f"gui/gameboard_load/{_label}"] = measure(
+            lambda: Gameboard.load(_filename), repeat
+        )
+
+        def _save() -> None:
+            with _app.model.as_lists():
+                _app.gameboard.save(os.path.join(directory, "save.tab"))
+
+        _results[f"gui/gameboard_save/{_label}"] = measure(_save, repeat)
+
+    _app.image_loader.shutdown()
+    _app.file_worker.shutdown()
+    _app.mainwindow.destroy()
+    return _results
+
+
+#  Display.
+
+
+#  Use the current display, or start Xvfb on the first free display number.
+#  Returns the Xvfb process to stop afterwards, if one was started.
+
+
+def start_display() -> tuple[bool, Optional[subprocess.Popen]]:
+    if os.environ.get("DISPLAY"):
+        return True, None
+
+    _xvfb: Optional[str] = shutil.which("Xvfb")
+    if _xvfb is None:
+        return False, None
+
+    for _display in XVFB_DISPLAYS:
+        if os.path.exists(f"/tmp/.X11-unix/X{_display}"):
+            continue
+        _process = subprocess.Popen(
+            [_xvfb, f":{_display}", "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        _deadline: float = time.monotonic() + XVFB_TIMEOUT
+        while time.monotonic() < _deadline and _process.poll() is None:
+            if os.path.exists(f"/tmp/.X11-unix/X{_display}"):
+                os.environ["DISPLAY"] = f":{_display}"
+                return True, _process
+            time.sleep(0.05)
+        _process.terminate()
+        _process.wait()
+    return False, None
+
+
+#  Baseline comparison.
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    _regressions: list[str] = []
+    print(
+        f"{'benchmark':<52} {'baseline':>10} {'current':>10} {'change':>8}",
+        file=sys.stderr,
+    )
+    for _name, _result in sorted(results.items()):
+        _base: Optional[dict] = baseline.get(_name)
+        if _base is None:
+            continue
+        _before: float = _base["min_ms"]
+        _after: float = _result["min_ms"]
+        _change: float = (_after - _before) / _before if _before > 0 else 0.0
+        _regressed: bool = _change > threshold and _after - _before > NOISE
+        if _regressed:
+            _regressions.append(_name)
+        print(
+            f"{_name:<52} {_before:>10.3f} {_after:>10.3f} {_change:>+8.0%}"
+            f"{'  REGRESSION' if _regressed else ''}",
+            file=sys.stderr,
+        )
+    return _regressions
+
+
+def main(args: Optional[list[str]] = None) -> int:
+    _parser = argparse.ArgumentParser(description="Benchmark the gameboard designer.")
+    _parser.add_argument("-o", "--output", help="write the results to this file")
+    _parser.add_argument(
+        "-b", "--baseline", default=BASELINE, help="baseline to compare against"
+    )
+    _parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store these results as the baseline",
+    )
+    _parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="allowed slowdown before a benchmark counts as a regression",
+    )
+    _parser.add_argument("-r", "--repeat", type=int, default=REPEAT)
+    _parser.add_argument(
+        "--headless", action="store_true", help="skip the GUI benchmarks"
+    )
+    _options = _parser.parse_args(args)
+
+    _display, _xvfb = (False, None) if _options.headless else start_display()
+    _results: dict[str, dict] = {}
+    try:
+        with tempfile.TemporaryDirectory() as _directory:
+            _boards = prepare_boards(_directory)
+            _results.update(headless_benchmarks(_boards, _directory, _options.repeat))
+            if _display:
+                _results.update(gui_benchmarks(_boards, _directory, _options.repeat))
+    finally:
+        if _xvfb is not None:
+            _xvfb.terminate()
+            _xvfb.wait()
+
+    _report: dict[str, Any] = {
+        "mode": "gui" if _display else "headless",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": _options.repeat,
+        "results": _results,
+    }
+
+    if _options.output:
+        with open(_options.output, "w") as _file:
+            json.dump(_report, _file, indent=2)
+    else:
+        json.dump(_report, sys.stdout, indent=2)
+        print()
+
+    if _options.update_baseline:
+        with open(_options.baseline, "w") as _file:
+            json.dump(_report, _file, indent=2)
+        return 0
+
+    if os.path.exists(_options.baseline):
+        with open(_options.baseline) as _file:
+            _baseline: dict = json.load(_file)
+        _regressions = compare(_results, _baseline["results"], _options.threshold)
+        if _regressions:
+            print(f"{len(_regressions)} regressions", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
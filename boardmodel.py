@@ -0,0 +1,377 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+from array import array
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from bulkfill import Mask, solid
+from cellgrid import ColourGrid, Grid, GridPatch, IndexGrid
+
+#  Observable board model.
+
+#  Wraps the fields of a Gameboard that the designer edits. Every setter compares
+#  the new value against the current one and only mutates the gameboard, and
+#  notifies the listeners, when the value actually differs.
+
+#  The key of a change is None for a whole field, an index for the per-row and
+#  per-column lists, the tokens and the board decorators, and a (row, column)
+#  tuple for the per-cell grids. Bulk fills report the cells they overwrote and
+#  resizes what they trimmed, so that every change can be undone.
+
+#  Edits made inside a transaction are applied to the board straight away but
+#  reported together when the outermost transaction ends. Listeners that handle
+#  transactions get the changes as one list, to render them in one pass and keep
+#  them as one undo step and one journal record, the others get them one by one.
+#  A transaction that raises still reports the changes made before the error, so
+#  the listeners stay in step with the board.
+
+ROW_FIELDS = (
+    "height_of_cell",
+    "top_padding_of_cell",
+    "bottom_padding_of_cell",
+    "size_of_horizontal_gutter_after_cell",
+)
+
+COLUMN_FIELDS = (
+    "width_of_cell",
+    "left_padding_of_cell",
+    "right_padding_of_cell",
+    "size_of_vertical_gutter_after_cell",
+)
+
+CELL_FIELDS = (
+    "colour_of_cell",
+    "colour_of_cell_padding",
+    "cell_decorator",
+    "placed_tokens",
+)
+
+COLOUR_FIELDS = ("colour_of_cell", "colour_of_cell_padding")
+
+#  While attached to the model the per-cell grids of the gameboard are held in
+#  compact array-backed grids rather than lists of lists.
+
+GRID_TYPES = {
+    "colour_of_cell": ColourGrid,
+    "colour_of_cell_padding": ColourGrid,
+    "cell_decorator": IndexGrid,
+    "placed_tokens": IndexGrid,
+}
+
+
+class Change(NamedTuple):
+    field: str
+    key: Any
+    old: Any
+    new: Any
+
+
+#  The old value of a change to the board dimensions. When the board shrinks the
+#  lists and grid buffers from before are kept, growing loses nothing. restored
+#  is set when the board grew by putting back what a shrink trimmed, rather than
+#  by copying the last row or column.
+
+
+class Resize(NamedTuple):
+    size: int
+    lists: dict[str, list]
+    grids: dict[str, array]
+    restored: bool = False
+
+    @property
+    def nbytes(self) -> int:
+        return sum(8 * len(_list) for _list in self.lists.values()) + sum(
+            len(_data) * _data.itemsize for _data in self.grids.values()
+        )
+
+
+class BoardModel:
+    def __init__(self, gameboard) -> None:
+        self.listeners: list[Callable[[Change], None]] = []
+        self.transaction_listeners: list[
+            Optional[Callable[[list[Change]], None]]
+        ] = []
+
+        self.depth: int = 0
+        self.batch: list[Change] = []
+
+        self.attach(gameboard)
+
+    def attach(self, gameboard) -> None:
+        self.gameboard = gameboard
+        for _field, _type in GRID_TYPES.items():
+            _grid = getattr(gameboard, _field)
+            if not isinstance(_grid, Grid):
+                setattr(gameboard, _field, _type.from_lists(_grid))
+
+    def grid(self, field: str) -> Grid:
+        return getattr(self.gameboard, field)
+
+    #  Temporarily restore the list of lists grids, for code such as
+    #  Gameboard.save that needs the original shape.
+
+    @contextmanager
+    def as_lists(self) -> Iterator:
+        _grids: dict[str, Grid] = {
+            _field: getattr(self.gameboard, _field) for _field in GRID_TYPES
+        }
+        for _field, _grid in _grids.items():
+            setattr(self.gameboard, _field, _grid.to_lists())
+        try:
+            yield self.gameboard
+        finally:
+            for _field, _grid in _grids.items():
+                setattr(self.gameboard, _field, _grid)
+
+    def subscribe(
+        self,
+        listener: Callable[[Change], None],
+        on_transaction: Optional[Callable[[list[Change]], None]] = None,
+    ) -> None:
+        self.listeners.append(listener)
+        self.transaction_listeners.append(on_transaction)
+
+    def notify(self, change: Change) -> None:
+        if self.depth > 0:
+            self.batch.append(change)
+            return
+        for _listener in self.listeners:
+            _listener(change)
+
+    #  Group the edits made in the block. Transactions can be nested, only the
+    #  outermost one reports the changes.
+
+    @contextmanager
+    def transaction(self) -> Iterator["BoardModel"]:
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                self.commit()
+
+    def commit(self) -> None:
+        _changes, self.batch = self.batch, []
+        if not _changes:
+            return
+        for _listener, _on_transaction in zip(
+            self.listeners, self.transaction_listeners
+        ):
+            if _on_transaction is not None:
+                _on_transaction(_changes)
+            else:
+                for _change in _changes:
+                    _listener(_change)
+
+    #  Whole fields.
+
+    def set(self, field: str, value: Any) -> bool:
+        _old = getattr(self.gameboard, field)
+        if _old == value:
+            return False
+        setattr(self.gameboard, field, value)
+        self.notify(Change(field, None, _old, value))
+        return True
+
+    #  Per-row and per-column lists, tokens and board decorators.
+
+    def set_item(self, field: str, index: int, value: Any) -> bool:
+        _list: list = getattr(self.gameboard, field)
+        _old = _list[index]
+        if _old == value:
+            return False
+        _list[index] = value
+        self.notify(Change(field, index, _old, value))
+        return True
+
+    def append_item(self, field: str, value: Any) -> None:
+        _list: list = getattr(self.gameboard, field)
+        _list.append(value)
+        self.notify(Change(field, len(_list) - 1, None, value))
+
+    def insert_item(self, field: str, index: int, value: Any) -> None:
+        _list: list = getattr(self.gameboard, field)
+        _list.insert(index, value)
+        self.notify(Change(field, index, None, value))
+
+    def delete_item(self, field: str, index: int) -> None:
+        _list: list = getattr(self.gameboard, field)
+        _old = _list.pop(index)
+        self.notify(Change(field, index, _old, None))
+
+    #  Per-cell grids.
+
+    def set_cell(self, field: str, row: int, column: int, value: Any) -> bool:
+        _grid: Grid = self.grid(field)
+        _old = _grid.get(row, column)
+        if _old == value:
+            return False
+        _grid.set(row, column, value)
+        self.notify(Change(field, (row, column), _old, value))
+        return True
+
+    #  Fill the cells selected by a mask. The fill is a single pass over the
+    #  grid buffer reported as one change to the whole grid, with patches of the
+    #  selected cells before and after as its old and new values.
+
+    def fill_mask(self, field: str, mask: Mask, value: Any) -> bool:
+        _grid: Grid = self.grid(field)
+        _old: GridPatch = GridPatch.capture(_grid, mask.slices)
+        _grid.fill_mask(mask, value)
+        _new: GridPatch = GridPatch.capture(_grid, mask.slices)
+        if _new == _old:
+            return False
+        self.notify(Change(field, None, _old, _new))
+        return True
+
+    def apply_patch(self, field: str, patch: GridPatch) -> bool:
+        _grid: Grid = self.grid(field)
+        _old: GridPatch = GridPatch.capture(_grid, patch.slices)
+        if _old == patch:
+            return False
+        patch.apply(_grid)
+        self.notify(Change(field, None, _old, patch))
+        return True
+
+    #  Fill every cell.
+
+    def fill_cells(self, field: str, value: Any) -> None:
+        self.fill_mask(
+            field,
+            solid(
+                self.gameboard.number_of_cells_vertically,
+                self.gameboard.number_of_cells_horizontally,
+            ),
+            value,
+        )
+
+    #  Board dimensions.
+
+    #  When the board grows the new rows and columns copy the geometry and
+    #  colours of the last existing row or column and have no decorators or
+    #  tokens. When it shrinks the lists are trimmed.
+
+    def resize_columns(self, columns: int) -> bool:
+        _gameboard = self.gameboard
+        _original: int = _gameboard.number_of_cells_horizontally
+        if columns == _original:
+            return False
+
+        _resize: Resize = self.trimmed(_original, columns, COLUMN_FIELDS)
+
+        for _field in COLUMN_FIELDS:
+            _list: list = getattr(_gameboard, _field)
+            setattr(
+                _gameboard,
+                _field,
+                _list[:columns] + [_list[_original - 1]] * (columns - _original),
+            )
+
+        for _field in CELL_FIELDS:
+            self.grid(_field).resize(
+                _gameboard.number_of_cells_vertically,
+                columns,
+                extend=_field in COLOUR_FIELDS,
+            )
+
+        _gameboard.number_of_cells_horizontally = columns
+        self.notify(Change("number_of_cells_horizontally", None, _resize, columns))
+        return True
+
+    def resize_rows(self, rows: int) -> bool:
+        _gameboard = self.gameboard
+        _original: int = _gameboard.number_of_cells_vertically
+        if rows == _original:
+            return False
+
+        _resize: Resize = self.trimmed(_original, rows, ROW_FIELDS)
+
+        for _field in ROW_FIELDS:
+            _list: list = getattr(_gameboard, _field)
+            setattr(
+                _gameboard,
+                _field,
+                _list[:rows] + [_list[_original - 1]] * (rows - _original),
+            )
+
+        for _field in CELL_FIELDS:
+            self.grid(_field).resize(
+                rows,
+                _gameboard.number_of_cells_horizontally,
+                extend=_field in COLOUR_FIELDS,
+            )
+
+        _gameboard.number_of_cells_vertically = rows
+        self.notify(Change("number_of_cells_vertically", None, _resize, rows))
+        return True
+
+    def trimmed(self, original: int, size: int, fields: tuple[str, ...]) -> Resize:
+        if size > original:
+            return Resize(original, {}, {})
+        return Resize(
+            original,
+            {_field: getattr(self.gameboard, _field) for _field in fields},
+            {
+                _field: array(_grid.typecode, _grid.data)
+                for _field, _grid in self.grids()
+            },
+        )
+
+    def grids(self) -> Iterator[tuple[str, Grid]]:
+        for _field in CELL_FIELDS:
+            yield _field, self.grid(_field)
+
+    #  Put back what a board resize trimmed. The grids keep their tables, which
+    #  have only grown since.
+
+    def restore(self, field: str, resize: Resize) -> None:
+        _gameboard = self.gameboard
+        _size: int = getattr(_gameboard, field)
+        for _field, _list in resize.lists.items():
+            setattr(_gameboard, _field, list(_list))
+        setattr(_gameboard, field, resize.size)
+        for _field, _grid in self.grids():
+            _grid.data = array(_grid.typecode, resize.grids[_field])
+            _grid.rows = _gameboard.number_of_cells_vertically
+            _grid.columns = _gameboard.number_of_cells_horizontally
+        self.notify(Change(field, None, Resize(_size, {}, {}, True), resize.size))
+
+
+#  Coalesces bursts of changes into a single render pass run when Tk is idle.
+
+
+class RedrawScheduler:
+    def __init__(self, widget, render: Callable[[list[Change]], None]) -> None:
+        self.widget = widget
+        self.render: Callable[[list[Change]], None] = render
+        self.pending: list[Change] = []
+        self.scheduled: Optional[str] = None
+
+    def on_change(self, change: Change) -> None:
+        self.pending.append(change)
+        if self.scheduled is None:
+            self.scheduled = self.widget.after_idle(self.flush)
+
+    #  A transaction is rendered as soon as it ends, along with anything still
+    #  pending.
+
+    def on_transaction(self, changes: list[Change]) -> None:
+        self.pending.extend(changes)
+        self.flush()
+
+    def flush(self) -> None:
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        _changes, self.pending = self.pending, []
+        if _changes:
+            self.render(_changes)
+
+    def cancel(self) -> None:
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        self.pending = []
@@ -0,0 +1,392 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+from typing import Iterator, Optional
+
+#  Bulk fills over whole cell grids.
+
+#  A mask selects a set of cells as a list of slices over the flat row by row
+#  buffer of a grid. Checkerboards, stripes, rings and diagonals all reduce to a
+#  handful of strided slices, so filling one is a few slice assignments on the
+#  buffer rather than a Python loop over every cell.
+
+#  Masks do not need Tk and can be used headless to generate boards from a
+#  script, together with a BoardModel or directly on a Grid.
+
+#  Patterns that are not regular, special squares, tracks and starting
+#  positions, are built from lists of cells, merging neighbouring cells of a
+#  row into one slice.
+
+#  The symmetries a list of cells can be repeated under. Rotating by a quarter
+#  turn or reflecting in the diagonals needs a square board.
+
+SYMMETRIES = ("none", "mirror", "flip", "quad", "rotate", "dihedral")
+
+
+class Mask:
+    def __init__(self, rows: int, columns: int, slices: list[slice]) -> None:
+        self.rows: int = rows
+        self.columns: int = columns
+        self.slices: list[slice] = slices
+
+    def __or__(self, other: "Mask") -> "Mask":
+        if (self.rows, self.columns) != (other.rows, other.columns):
+            raise ValueError("masks have different dimensions")
+        return Mask(self.rows, self.columns, self.slices + other.slices)
+
+    def indices(self) -> Iterator[int]:
+        _length: int = self.rows * self.columns
+        _seen: set[int] = set()
+        for _slice in self.slices:
+            for _index in range(*_slice.indices(_length)):
+                if _index not in _seen:
+                    _seen.add(_index)
+                    yield _index
+
+    def cells(self) -> Iterator[tuple[int, int]]:
+        for _index in self.indices():
+            yield divmod(_index, self.columns)
+
+    def __contains__(self, cell: tuple[int, int]) -> bool:
+        _index: int = cell[0] * self.columns + cell[1]
+        _length: int = self.rows * self.columns
+        return any(
+            _index in range(*_slice.indices(_length)) for _slice in self.slices
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.indices())
+
+    #  The number of cells, counting cells selected by two slices twice.
+
+    def count(self) -> int:
+        _length: int = self.rows * self.columns
+        return sum(len(range(*_slice.indices(_length))) for _slice in self.slices)
+
+    #  The rows and columns, end exclusive, of the smallest rectangle that holds
+    #  every selected cell, None if none are.
+
+    def bounds(self) -> Optional[tuple[int, int, int, int]]:
+        _length: int = self.rows * self.columns
+        _ranges: list[range] = [
+            _range
+            for _range in (range(*_slice.indices(_length)) for _slice in self.slices)
+            if len(_range) > 0
+        ]
+        if not _ranges:
+            return None
+
+        _top: int = min(min(_range) for _range in _ranges) // self.columns
+        _bottom: int = max(max(_range) for _range in _ranges) // self.columns + 1
+        if all(
+            _range.step == 1
+            and _range[0] // self.columns == _range[-1] // self.columns
+            for _range in _ranges
+        ):
+            _left: int = min(_range[0] % self.columns for _range in _ranges)
+            _right: int = max(_range[-1] % self.columns for _range in _ranges) + 1
+        else:
+            _left, _right = 0, self.columns
+        return _top, _left, _bottom, _right
+
+
+#  Mask builders.
+
+
+def solid(rows: int, columns: int) -> Mask:
+    return Mask(rows, columns, [slice(0, rows * columns)])
+
+
+def cell(rows: int, columns: int, row: int, column: int) -> Mask:
+    _index: int = row * columns + column
+    return Mask(rows, columns, [slice(_index, _index + 1)])
+
+
+#  The cells from top to bottom and left to right, end exclusive, one slice per
+#  row.
+
+
+def rectangle(
+    rows: int, columns: int, top: int, left: int, bottom: int, right: int
+) -> Mask:
+    if left >= right:
+        return Mask(rows, columns, [])
+    return Mask(
+        rows,
+        columns,
+        [
+            slice(_row * columns + left, _row * columns + right)
+            for _row in range(max(top, 0), min(bottom, rows))
+        ],
+    )
+
+
+#  Cells where row + column has the given parity, on the rows from top to
+#  bottom, end exclusive, or on every row. With an odd number of columns that is
+#  every other cell of the flat buffer, otherwise one slice per row.
+
+
+def checkerboard(
+    rows: int,
+    columns: int,
+    parity: int = 0,
+    top: int = 0,
+    bottom: Optional[int] = None,
+) -> Mask:
+    _top: int = max(top, 0)
+    _bottom: int = rows if bottom is None else min(bottom, rows)
+    if columns % 2 == 1:
+        _start: int = _top * columns
+        _start += (_start + parity) % 2
+        return Mask(rows, columns, [slice(_start, _bottom * columns, 2)])
+    return Mask(
+        rows,
+        columns,
+        [
+            slice(_row * columns + (_row + parity) % 2, (_row + 1) * columns, 2)
+            for _row in range(_top, _bottom)
+        ],
+    )
+
+
+def row_stripes(
+    rows: int, columns: int, period: int = 2, offset: int = 0, width: int = 1
+) -> Mask:
+    return Mask(
+        rows,
+        columns,
+        [
+            slice(_row * columns, (_row + 1) * columns)
+            for _row in range(rows)
+            if (_row - offset) % period < width
+        ],
+    )
+
+
+def column_stripes(
+    rows: int, columns: int, period: int = 2, offset: int = 0, width: int = 1
+) -> Mask:
+    return Mask(
+        rows,
+        columns,
+        [
+            slice(_column, rows * columns, columns)
+            for _column in range(columns)
+            if (_column - offset) % period < width
+        ],
+    )
+
+
+def border_ring(rows: int, columns: int, width: int = 1, inset: int = 0) -> Mask:
+    _slices: list[slice] = []
+    _top: int = inset
+    _bottom: int = rows - inset
+    _left: int = inset
+    _right: int = columns - inset
+    if _top >= _bottom or _left >= _right:
+        return Mask(rows, columns, [])
+
+    for _row in range(_top, _bottom):
+        _start: int = _row * columns
+        if _row < _top + width or _row >= _bottom - width:
+            _slices.append(slice(_start + _left, _start + _right))
+        else:
+            _slices.append(slice(_start + _left, _start + min(_left + width, _right)))
+            _slices.append(slice(_start + max(_right - width, _left), _start + _right))
+    return Mask(rows, columns, _slices)
+
+
+#  The leading diagonal from the top left, or the anti-diagonal from the top
+#  right, each as a single strided slice.
+
+
+def diagonal(rows: int, columns: int, anti: bool = False) -> Mask:
+    _length: int = min(rows, columns)
+    if anti:
+        _step: int = columns - 1
+        if _step == 0:
+            return Mask(rows, columns, [slice(0, _length)])
+        return Mask(
+            rows, columns, [slice(columns - 1, (_length - 1) * _step + columns, _step)]
+        )
+    _step = columns + 1
+    return Mask(rows, columns, [slice(0, (_length - 1) * _step + 1, _step)])
+
+
+#  Concentric rings width cells wide, spacing cells apart, from the edge in.
+#  count limits the number of rings.
+
+
+def rings(
+    rows: int,
+    columns: int,
+    width: int = 1,
+    spacing: int = 1,
+    count: Optional[int] = None,
+    inset: int = 0,
+) -> Mask:
+    _mask: Mask = Mask(rows, columns, [])
+    _ring: int = 0
+    while inset < (min(rows, columns) + 1) // 2 and (count is None or _ring < count):
+        _mask = _mask | border_ring(rows, columns, width, inset)
+        inset += width + spacing
+        _ring += 1
+    return _mask
+
+
+#  Any cells, given as (row, column). Cells off the board are left out.
+
+
+def cells(rows: int, columns: int, positions) -> Mask:
+    _indices: list[int] = sorted(
+        {
+            _row * columns + _column
+            for _row, _column in positions
+            if 0 <= _row < rows and 0 <= _column < columns
+        }
+    )
+    _slices: list[slice] = []
+    _start: int = 0
+    for _position, _index in enumerate(_indices):
+        if (
+            _position + 1 == len(_indices)
+            or _indices[_position + 1] != _index + 1
+            or (_index + 1) % columns == 0
+        ):
+            _slices.append(slice(_indices[_start], _index + 1))
+            _start = _position + 1
+    return Mask(rows, columns, _slices)
+
+
+#  The cells of a grid that hold value, found by searching its buffer for the
+#  encoded value rather than testing each cell in Python.
+
+
+def matching(grid, value) -> Mask:
+    _data = grid.data
+    _code: int = grid.encode(value)
+    _slices: list[slice] = []
+    _index: int = 0
+    while True:
+        try:
+            _start: int = _data.index(_code, _index)
+        except ValueError:
+            break
+        _end: int = (_start // grid.columns + 1) * grid.columns
+        _index = _start + 1
+        while _index < _end and _data[_index] == _code:
+            _index += 1
+        _slices.append(slice(_start, _index))
+    return Mask(grid.rows, grid.columns, _slices)
+
+
+#  The cells together with their images under one of SYMMETRIES: mirrored left
+#  to right, flipped top to bottom, both, turned through a half turn, or every
+#  rotation and reflection of the square.
+
+
+def symmetric(rows: int, columns: int, positions, symmetry: str = "quad") -> Mask:
+    if symmetry not in SYMMETRIES:
+        raise ValueError(f"unknown symmetry {symmetry}")
+    if symmetry == "dihedral" and rows != columns:
+        raise ValueError("dihedral symmetry needs a square board")
+
+    _last_row: int = rows - 1
+    _last_column: int = columns - 1
+    _cells: set[tuple[int, int]] = set()
+    for _row, _column in positions:
+        _images: list[tuple[int, int]] = [(_row, _column)]
+        if symmetry in ("mirror", "quad", "dihedral"):
+            _images.append((_row, _last_column - _column))
+        if symmetry in ("flip", "quad", "dihedral"):
+            _images.append((_last_row - _row, _column))
+        if symmetry in ("rotate", "quad", "dihedral"):
+            _images.append((_last_row - _row, _last_column - _column))
+        if symmetry == "dihedral":
+            _images.extend([(_column, _row) for _row, _column in _images])
+        _cells.update(_images)
+    return cells(rows, columns, _cells)
+
+
+#  A block of cells in the middle of the board. A block of even size on a board
+#  of odd size, or the other way round, sits just above and to the left.
+
+
+def centre(
+    rows: int, columns: int, height: int = 1, width: Optional[int] = None
+) -> Mask:
+    if width is None:
+        width = height
+    _top: int = (rows - height) // 2
+    _left: int = (columns - width) // 2
+    return rectangle(rows, columns, _top, _left, _top + height, _left + width)
+
+
+def corners(rows: int, columns: int, size: int = 1) -> Mask:
+    return symmetric(
+        rows,
+        columns,
+        [(_row, _column) for _row in range(size) for _column in range(size)],
+        "quad",
+    )
+
+
+#  The cells within a distance of the centre counting rows and columns, a
+#  diamond, or with hollow set only those at that distance.
+
+
+def diamond(rows: int, columns: int, radius: int, hollow: bool = False) -> Mask:
+    _centre_row: int = (rows - 1) // 2
+    _centre_column: int = (columns - 1) // 2
+    _positions: list[tuple[int, int]] = []
+    for _offset in range(-radius, radius + 1):
+        _reach: int = radius - abs(_offset)
+        if hollow:
+            _positions.append((_centre_row + _offset, _centre_column - _reach))
+            _positions.append((_centre_row + _offset, _centre_column + _reach))
+        else:
+            _positions.extend(
+                (_centre_row + _offset, _column)
+                for _column in range(
+                    _centre_column - _reach, _centre_column + _reach + 1
+                )
+            )
+    return cells(rows, columns, _positions)
+
+
+#  A path through waypoints given as (row, column), moving along a row, a column
+#  or a diagonal between each pair.
+
+
+def track(rows: int, columns: int, waypoints) -> Mask:
+    _waypoints: list[tuple[int, int]] = list(waypoints)
+    _positions: list[tuple[int, int]] = _waypoints[:1]
+    for (_row, _column), (_next_row, _next_column) in zip(
+        _waypoints, _waypoints[1:]
+    ):
+        _rows: int = _next_row - _row
+        _columns: int = _next_column - _column
+        if _rows != 0 and _columns != 0 and abs(_rows) != abs(_columns):
+            raise ValueError(
+                f"({_row}, {_column}) to ({_next_row}, {_next_column}) is not "
+                "along a row, column or diagonal"
+            )
+        _steps: int = max(abs(_rows), abs(_columns))
+        _positions.extend(
+            (
+                _row + _step * (_rows > 0) - _step * (_rows < 0),
+                _column + _step * (_columns > 0) - _step * (_columns < 0),
+            )
+            for _step in range(1, _steps + 1)
+        )
+    return cells(rows, columns, _positions)
+
+
+def board_mask(gameboard, builder, *args, **kwargs) -> Mask:
+    return builder(
+        gameboard.number_of_cells_vertically,
+        gameboard.number_of_cells_horizontally,
+        *args,
+        **kwargs,
+    )
@@ -0,0 +1,357 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import json
+import lzma
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+import tabformat
+from assetstore import local_path
+from imageloader import drawn_sizes
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+#  Gameboard bundles (.tabz).
+
+#  A bundle is a single file holding a board and every image it uses, so a board
+#  can be shipped as one file and opened with one file. The board is stored in
+#  the .tab2 format. Images are stored as raw RGBA pixels already resized to the
+#  sizes they are drawn at, so opening a bundle skips PNG decoding and resizing
+#  as well as the scattered reads of the loose files.
+
+#  Layout:
+#
+#    header    magic, version, and the offset and length of the index
+#    entries   the board, then one entry per image at each size it is drawn at,
+#              each compressed on its own with the bundle's codec
+#    index     JSON: the codec, the board entry, and for every image its path,
+#              the size it is drawn at, its size as stored and its entry
+#
+#  Entries are compressed separately and located through the index, so a single
+#  image is read and decompressed without touching the others.
+
+#  The codec is zlib or lzma, or zstd when the zstandard module is installed.
+
+#  "bundle.py pack BOARD BUNDLE [CODEC]" packs a board and its images, and
+#  "bundle.py compare DIRECTORY FILE..." compares the time taken to open boards
+#  and their images from bundles and from loose files.
+
+MAGIC = b"GBBUNDLE"
+VERSION = 1
+EXTENSION = ".tabz"
+
+HEADER = struct.Struct("<8sH6xQQ")
+
+CODECS: dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (lambda _data: zlib.compress(_data, 9), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+if zstandard is not None:
+    CODECS["zstd"] = (
+        lambda _data: zstandard.ZstdCompressor(level=19).compress(_data),
+        lambda _data: zstandard.ZstdDecompressor().decompress(_data),
+    )
+
+DEFAULT_CODEC = "zstd" if "zstd" in CODECS else "zlib"
+
+#  Images stored for a path, keyed by the size they are drawn at: the size they
+#  are stored at and their entry, (width, height, offset, length, raw length).
+
+ImageEntry = tuple[int, int, int, int, int]
+
+
+class BundleError(Exception):
+    pass
+
+
+def is_bundle(filename: str) -> bool:
+    try:
+        with open(filename, "rb") as _file:
+            return _file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+#  An image as drawn, from its file or, failing that, from the bundle the board
+#  was opened from.
+
+
+def drawn_image(
+    filename: str,
+    width: Optional[int],
+    height: Optional[int],
+    source: Optional["Bundle"] = None,
+) -> Optional["Image.Image"]:
+    from PIL import Image
+
+    try:
+        _image = Image.open(local_path(filename))
+        _image.load()
+    except OSError:
+        if source is not None and source.has(filename):
+            return source.image(filename, width, height)
+        return None
+    _image = _image.convert("RGBA")
+    if width is not None and height is not None:
+        _image = _image.resize((width, height))
+    return _image
+
+
+#  Pack a board and its images. report is given the fraction done and a status
+#  between images, as FileJob.report is.
+
+
+def encode(
+    gameboard: Any,
+    codec: str = DEFAULT_CODEC,
+    source: Optional["Bundle"] = None,
+    report: Optional[Callable[[float, str], None]] = None,
+) -> bytes:
+    if codec not in CODECS:
+        raise BundleError(f"unknown codec {codec}")
+    _compress: Callable[[bytes], bytes] = CODECS[codec][0]
+    _body: bytearray = bytearray(HEADER.size)
+
+    def _entry(data: bytes) -> list[int]:
+        _compressed: bytes = _compress(data)
+        _offset: int = len(_body)
+        _body.extend(_compressed)
+        return [_offset, len(_compressed), len(data)]
+
+    _index: dict[str, Any] = {
+        "codec": codec,
+        "board": _entry(tabformat.encode(gameboard)),
+        "images": [],
+        "missing": [],
+    }
+
+    _drawn = sorted(drawn_sizes(gameboard), key=lambda _drawn: repr(_drawn))
+    for _count, (_filename, _width, _height) in enumerate(_drawn):
+        if report is not None:
+            report(_count / max(len(_drawn), 1), "Packing images")
+        _image = drawn_image(_filename, _width, _height, source)
+        if _image is None:
+            if _filename not in _index["missing"]:
+                _index["missing"].append(_filename)
+            continue
+        _index["images"].append(
+            [
+                _filename,
+                _width,
+                _height,
+                _image.width,
+                _image.height,
+                *_entry(_image.tobytes()),
+            ]
+        )
+
+    _data: bytes = json.dumps(_index).encode("utf-8")
+    HEADER.pack_into(_body, 0, MAGIC, VERSION, len(_body), len(_data))
+    _body.extend(_data)
+    return bytes(_body)
+
+
+def pack(source: str, destination: str, codec: str = DEFAULT_CODEC) -> list[str]:
+    if is_bundle(source):
+        _bundle: Bundle = Bundle(source)
+        _data: bytes = encode(_bundle.board(), codec, _bundle)
+    else:
+        _data = encode(tabformat.load_any(source), codec)
+    with open(destination, "wb") as _file:
+        _file.write(_data)
+    return Bundle(destination).missing
+
+
+#  Reader. Only the header and index are read when a bundle is opened, entries
+#  are read as they are asked for, each with its own file handle so images can
+#  be read on several threads at once.
+
+
+class Bundle:
+    def __init__(self, filename: str) -> None:
+        self.filename: str = filename
+        self.mtime: float = os.path.getmtime(filename)
+
+        with open(filename, "rb") as _file:
+            _header: bytes = _file.read(HEADER.size)
+            if len(_header) < HEADER.size:
+                raise BundleError(f"{filename} is truncated")
+            _magic, _version, _offset, _length = HEADER.unpack(_header)
+            if _magic != MAGIC:
+                raise BundleError(f"{filename} is not a bundle")
+            if _version > VERSION:
+                raise BundleError(f"{filename} has unsupported version {_version}")
+            _file.seek(_offset)
+            _data: bytes = _file.read(_length)
+        if len(_data) != _length:
+            raise BundleError(f"{filename} is truncated")
+        _index: dict[str, Any] = json.loads(_data.decode("utf-8"))
+
+        self.codec: str = _index["codec"]
+        if self.codec not in CODECS:
+            raise BundleError(f"{filename} needs the {self.codec} codec")
+        self.decompress: Callable[[bytes], bytes] = CODECS[self.codec][1]
+
+        self.board_entry: tuple[int, int, int] = tuple(_index["board"])
+        self.missing: list[str] = _index["missing"]
+        self.images: dict[str, dict[tuple, ImageEntry]] = {}
+        for _filename, _width, _height, *_entry in _index["images"]:
+            self.images.setdefault(_filename, {})[(_width, _height)] = tuple(_entry)
+
+        self.load_image = lru_cache(maxsize=256)(self.load_image)
+
+    def read(self, offset: int, length: int, raw_length: int) -> bytes:
+        with open(self.filename, "rb") as _file:
+            _file.seek(offset)
+            _data: bytes = _file.read(length)
+        if len(_data) != length:
+            raise BundleError(f"{self.filename} is truncated")
+        _data = self.decompress(_data)
+        if len(_data) != raw_length:
+            raise BundleError(f"{self.filename} is corrupt")
+        return _data
+
+    #  Read the board into gameboard, by default a LegacyGameboard, the same way
+    #  as TabFile.read.
+
+    def board(self, gameboard: Any = None) -> Any:
+        with tabformat.TabFile(self.filename, self.read(*self.board_entry)) as _tab:
+            return _tab.read(gameboard)
+
+    def has(self, filename: str) -> bool:
+        return filename in self.images
+
+    #  An image at the size it is drawn at. A size that was not packed, as when a
+    #  cell has been resized or the board is zoomed, is resized from the largest
+    #  size that was.
+
+    def image(
+        self, filename: str, width: Optional[int], height: Optional[int]
+    ) -> "Image.Image":
+        from PIL import Image
+
+        _sizes: dict[tuple, ImageEntry] = self.images[filename]
+        _entry: Optional[ImageEntry] = _sizes.get((width, height))
+        if _entry is None:
+            _entry = max(_sizes.values(), key=lambda _entry: _entry[0] * _entry[1])
+        _stored_width, _stored_height, *_location = _entry
+        _image = Image.frombytes(
+            "RGBA", (_stored_width, _stored_height), self.read(*_location)
+        )
+        if width is not None and height is not None:
+            if (width, height) != _image.size:
+                _image = _image.resize((width, height))
+        return _image
+
+    #  An image source for rasterize, falling back to the files for images that
+    #  are not in the bundle.
+
+    def load_image(
+        self, filename: str, width: Optional[int], height: Optional[int]
+    ) -> Optional["Image.Image"]:
+        if not self.has(filename):
+            import rasterize
+
+            return rasterize.load_image(filename, width, height)
+        try:
+            return self.image(filename, width, height)
+        except (OSError, BundleError, ValueError, lzma.LZMAError, zlib.error):
+            return None
+
+
+#  Compare opening boards from bundles against opening them from loose files,
+#  reading the board and every image at the size it is drawn at.
+
+
+def open_loose(filename: str) -> None:
+    _gameboard = tabformat.load_any(filename)
+    for _drawn in drawn_sizes(_gameboard):
+        drawn_image(*_drawn)
+
+
+def open_bundle(filename: str) -> None:
+    _bundle: Bundle = Bundle(filename)
+    _gameboard = _bundle.board()
+    for _drawn in drawn_sizes(_gameboard):
+        if _bundle.has(_drawn[0]):
+            _bundle.image(*_drawn)
+
+
+def loose_size(filename: str) -> int:
+    _gameboard = tabformat.load_any(filename)
+    _size: int = os.path.getsize(filename)
+    for _asset in {_drawn[0] for _drawn in drawn_sizes(_gameboard)}:
+        try:
+            _size += os.path.getsize(local_path(_asset))
+        except OSError:
+            pass
+    return _size
+
+
+def compare(filenames: list[str], directory: str, repeat: int = 20) -> None:
+    print(f"{'board':<20} {'format':<7} {'bytes':>9} {'open ms':>9} {'peak KB':>9}")
+    for _filename in filenames:
+        _label: str = os.path.basename(_filename)
+        _time, _peak = tabformat.measure(lambda: open_loose(_filename), repeat)
+        print(
+            f"{_label:<20} {'loose':<7} {loose_size(_filename):>9} "
+            f"{_time * 1000:>9.3f} {_peak / 1024:>9.1f}"
+        )
+        for _codec in CODECS:
+            _descriptor, _bundle = tempfile.mkstemp(suffix=EXTENSION, dir=directory)
+            os.close(_descriptor)
+            try:
+                pack(_filename, _bundle, _codec)
+                _time, _peak = tabformat.measure(lambda: open_bundle(_bundle), repeat)
+                print(
+                    f"{_label:<20} {_codec:<7} {os.path.getsize(_bundle):>9} "
+                    f"{_time * 1000:>9.3f} {_peak / 1024:>9.1f}"
+                )
+            finally:
+                os.remove(_bundle)
+
+
+def main() -> None:
+    _usage: str = (
+        "usage: bundle.py pack BOARD BUNDLE [" + "|".join(CODECS) + "]\n"
+        "       bundle.py info BUNDLE\n"
+        "       bundle.py compare DIRECTORY FILE..."
+    )
+    _args: list[str] = sys.argv[1:]
+
+    if len(_args) in (3, 4) and _args[0] == "pack":
+        for _filename in pack(*_args[1:]):
+            print(f"  missing {_filename}", file=sys.stderr)
+    elif len(_args) == 2 and _args[0] == "info":
+        _bundle: Bundle = Bundle(_args[1])
+        print(f"{_args[1]}: {_bundle.codec}, board {_bundle.board_entry[1]} bytes")
+        for _filename, _sizes in sorted(_bundle.images.items()):
+            for (_width, _height), _entry in _sizes.items():
+                print(
+                    f"  {_filename} {_width}x{_height} "
+                    f"{_entry[3]:>8} {_entry[4]:>8}"
+                )
+        for _filename in _bundle.missing:
+            print(f"  missing {_filename}")
+    elif len(_args) >= 2 and _args[0] == "compare":
+        compare(_args[2:], _args[1])
+    else:
+        print(_usage)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
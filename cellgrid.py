@@ -0,0 +1,279 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import re
+from array import array
+from typing import Iterator, Optional
+
+#  Compact array-backed storage for the per-cell grids.
+
+#  A grid stores one value per cell in a single flat array, row by row. Colours
+#  are packed into 32-bit integers and asset and token references are stored as
+#  small indices into an interned table of strings, so a 50x50 grid is one 10 KB
+#  buffer instead of 2,500 string references spread over 50 lists.
+
+#  Indexing a grid by row returns a GridRow view, so existing code that reads or
+#  writes grid[row][column] works unchanged. to_lists and from_lists convert
+#  losslessly to and from the list of lists that Gameboard expects.
+
+#  A packed colour holds the RGB value in its low 24 bits and the way the colour
+#  was written in its high byte: lower or upper case, six or three digits. Any
+#  other string is kept in the grid's table and the low bits hold its index.
+
+LOWER = 0
+UPPER = 1
+SHORT_LOWER = 2
+SHORT_UPPER = 3
+IRREGULAR = 255
+
+COLOUR_REGEX = re.compile(r"^#([0-9a-f]{6}|[0-9A-F]{6}|[0-9a-f]{3}|[0-9A-F]{3})$")
+
+
+class Grid:
+    typecode: str = "I"
+
+    def __init__(self, rows: int, columns: int, data: Optional[array] = None) -> None:
+        self.rows: int = rows
+        self.columns: int = columns
+        self.data: array = (
+            data if data is not None else array(self.typecode, [0]) * (rows * columns)
+        )
+        self.table: list[str] = []
+        self.interned: dict[str, int] = {}
+
+    #  Value encoding, overridden by the colour and index grids.
+
+    def encode(self, value: str) -> int:
+        raise NotImplementedError
+
+    def decode(self, value: int) -> str:
+        raise NotImplementedError
+
+    def intern(self, value: str) -> int:
+        _index: Optional[int] = self.interned.get(value)
+        if _index is None:
+            _index = len(self.table)
+            self.table.append(value)
+            self.interned[value] = _index
+        return _index
+
+    #  Cell access.
+
+    def get(self, row: int, column: int) -> str:
+        return self.decode(self.data[row * self.columns + column])
+
+    def set(self, row: int, column: int, value: str) -> None:
+        self.data[row * self.columns + column] = self.encode(value)
+
+    def __getitem__(self, row: int) -> "GridRow":
+        if not -self.rows <= row < self.rows:
+            raise IndexError("grid row out of range")
+        return GridRow(self, row % self.rows)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __iter__(self) -> Iterator["GridRow"]:
+        for _row in range(self.rows):
+            yield GridRow(self, _row)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Grid):
+            return self.to_lists() == other.to_lists()
+        if isinstance(other, list):
+            return self.to_lists() == other
+        return NotImplemented
+
+    #  Conversion to and from lists of lists.
+
+    @classmethod
+    def from_lists(cls, lists: list[list[str]]) -> "Grid":
+        _grid = cls(len(lists), len(lists[0]) if lists else 0, array(cls.typecode))
+        _encode = _grid.encode
+        for _row in lists:
+            _grid.data.extend(map(_encode, _row))
+        return _grid
+
+    def to_lists(self) -> list[list[str]]:
+        _decode = self.decode
+        _values: list[str] = list(map(_decode, self.data))
+        return [
+            _values[_row * self.columns : (_row + 1) * self.columns]
+            for _row in range(self.rows)
+        ]
+
+    #  Whole-buffer operations.
+
+    def copy(self) -> "Grid":
+        _grid = self.__class__(self.rows, self.columns, array(self.typecode, self.data))
+        _grid.table = self.table.copy()
+        _grid.interned = self.interned.copy()
+        return _grid
+
+    def fill(self, value: str) -> None:
+        self.data = array(self.typecode, [self.encode(value)]) * (
+            self.rows * self.columns
+        )
+
+    #  Set every cell selected by a bulkfill mask, one slice assignment per slice.
+
+    def fill_mask(self, mask, value: str) -> None:
+        _value: array = array(self.typecode, [self.encode(value)])
+        _length: int = len(self.data)
+        for _slice in mask.slices:
+            self.data[_slice] = _value * len(range(*_slice.indices(_length)))
+
+    #  Resize the grid. New cells copy the last existing row or column when
+    #  extend is set, otherwise they are given the blank value.
+
+    def resize(self, rows: int, columns: int, extend: bool, blank: str = "") -> None:
+        _blank: array = array(self.typecode, [self.encode(blank)])
+
+        if columns != self.columns:
+            _data: array = array(self.typecode)
+            for _row in range(self.rows):
+                _start: int = _row * self.columns
+                _data.extend(self.data[_start : _start + min(columns, self.columns)])
+                if columns > self.columns:
+                    _fill = (
+                        self.data[_start + self.columns - 1 : _start + self.columns]
+                        if extend
+                        else _blank
+                    )
+                    _data.extend(_fill * (columns - self.columns))
+            self.data = _data
+            self.columns = columns
+
+        if rows != self.rows:
+            if rows < self.rows:
+                self.data = self.data[: rows * self.columns]
+            else:
+                _fill = (
+                    self.data[(self.rows - 1) * self.columns :]
+                    if extend
+                    else _blank * self.columns
+                )
+                self.data.extend(_fill * (rows - self.rows))
+            self.rows = rows
+
+
+class GridRow:
+    __slots__ = ("grid", "row")
+
+    def __init__(self, grid: Grid, row: int) -> None:
+        self.grid: Grid = grid
+        self.row: int = row
+
+    def __getitem__(self, column):
+        _grid = self.grid
+        _start: int = self.row * _grid.columns
+        if isinstance(column, slice):
+            return list(
+                map(_grid.decode, _grid.data[_start : _start + _grid.columns][column])
+            )
+        if not -_grid.columns <= column < _grid.columns:
+            raise IndexError("grid column out of range")
+        return _grid.decode(_grid.data[_start + column % _grid.columns])
+
+    def __setitem__(self, column: int, value: str) -> None:
+        _grid = self.grid
+        if not -_grid.columns <= column < _grid.columns:
+            raise IndexError("grid column out of range")
+        _grid.data[self.row * _grid.columns + column % _grid.columns] = _grid.encode(
+            value
+        )
+
+    def __len__(self) -> int:
+        return self.grid.columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self[:])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (GridRow, list)):
+            return self[:] == list(other)
+        return NotImplemented
+
+    def copy(self) -> list[str]:
+        return self[:]
+
+
+class ColourGrid(Grid):
+    typecode = "I"
+
+    def encode(self, value: str) -> int:
+        if COLOUR_REGEX.match(value) is None:
+            return IRREGULAR << 24 | self.intern(value)
+
+        _digits: str = value[1:]
+        _upper: bool = _digits != _digits.lower()
+        if len(_digits) == 3:
+            _format: int = SHORT_UPPER if _upper else SHORT_LOWER
+            _digits = "".join(_digit * 2 for _digit in _digits)
+        else:
+            _format = UPPER if _upper else LOWER
+        return _format << 24 | int(_digits, 16)
+
+    def decode(self, value: int) -> str:
+        _format: int = value >> 24
+        _rgb: int = value & 0xFFFFFF
+        if _format == IRREGULAR:
+            return self.table[_rgb]
+        if _format in (SHORT_LOWER, SHORT_UPPER):
+            _digits: str = f"{_rgb >> 20:x}{_rgb >> 12 & 0xF:x}{_rgb >> 4 & 0xF:x}"
+        else:
+            _digits = f"{_rgb:06x}"
+        if _format in (UPPER, SHORT_UPPER):
+            _digits = _digits.upper()
+        return "#" + _digits
+
+    #  Packed 0xRRGGBB value of a cell, for renderers that want raw colours.
+
+    def rgb(self, row: int, column: int) -> int:
+        return self.data[row * self.columns + column] & 0xFFFFFF
+
+
+class IndexGrid(Grid):
+    typecode = "H"
+
+    def __init__(self, rows: int, columns: int, data: Optional[array] = None) -> None:
+        super().__init__(rows, columns, data)
+        self.intern("")
+
+    def encode(self, value: str) -> int:
+        return self.intern(value)
+
+    def decode(self, value: int) -> str:
+        return self.table[value]
+
+
+#  The values of a grid over a list of slices of its buffer, as encoded values.
+#  A patch taken before a bulk fill and one taken after hold exactly the cells the
+#  fill touched, which is all that undoing or redoing it needs. Encoded values
+#  stay valid because grid tables only ever grow while a board is being edited.
+
+
+class GridPatch:
+    __slots__ = ("slices", "values")
+
+    def __init__(self, slices: list[slice], values: list[array]) -> None:
+        self.slices: list[slice] = slices
+        self.values: list[array] = values
+
+    @classmethod
+    def capture(cls, grid: Grid, slices: list[slice]) -> "GridPatch":
+        return cls(slices, [grid.data[_slice] for _slice in slices])
+
+    def apply(self, grid: Grid) -> None:
+        for _slice, _values in zip(self.slices, self.values):
+            grid.data[_slice] = _values
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(_values) * _values.itemsize for _values in self.values)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, GridPatch):
+            return self.slices == other.slices and self.values == other.values
+        return NotImplemented
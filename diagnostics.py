@@ -0,0 +1,229 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import json
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional
+
+from customtkinter import (
+    CTkButton,
+    CTkFrame,
+    CTkSwitch,
+    CTkTextbox,
+    CTkToplevel,
+    filedialog,
+)
+
+#  Handler latency instrumentation.
+
+#  Handlers are wrapped once, when the designer starts, and the wrappers check
+#  whether recording is on before timing anything, so instrumentation can be
+#  switched on and off from the Diagnostics window. With recording off the cost
+#  is one attribute lookup per call.
+
+#  Only the most recent SAMPLES latencies of each handler are kept for the
+#  percentiles. The count and maximum cover every call.
+
+SAMPLES = 1000
+
+REFRESH_INTERVAL = 1000
+
+
+class HandlerStats:
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.maximum: float = 0.0
+        self.samples: deque[float] = deque(maxlen=SAMPLES)
+        self.widgets: Counter[str] = Counter()
+
+    def add(self, seconds: float, widget: str) -> None:
+        self.count += 1
+        self.maximum = max(self.maximum, seconds)
+        self.samples.append(seconds)
+        if widget != "":
+            self.widgets[widget] += 1
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        _sorted: list[float] = sorted(self.samples)
+        _rank: int = max(0, min(len(_sorted) - 1, round(fraction * len(_sorted)) - 1))
+        return _sorted[_rank]
+
+    def summary(self, name: str) -> dict[str, Any]:
+        return {
+            "name": name,
+            "count": self.count,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "max_ms": self.maximum * 1000,
+            "widgets": dict(self.widgets.most_common()),
+        }
+
+
+class Instrumentation:
+    def __init__(self, recording: bool = False) -> None:
+        self.recording: bool = recording
+        self.handlers: dict[str, HandlerStats] = {}
+
+    def record(self, name: str, seconds: float, widget: str = "") -> None:
+        _stats: Optional[HandlerStats] = self.handlers.get(name)
+        if _stats is None:
+            _stats = self.handlers[name] = HandlerStats()
+        _stats.add(seconds, widget)
+
+    #  Wrap a callable so that each call is timed. trigger is given the call's
+    #  arguments and names the widget that caused it, it is called outside the
+    #  timed region.
+
+    def wrap(
+        self,
+        name: str,
+        function: Callable,
+        trigger: Optional[Callable[[tuple], str]] = None,
+    ) -> Callable:
+        @wraps(function)
+        def _wrapper(*args, **kwargs):
+            if not self.recording:
+                return function(*args, **kwargs)
+            _widget: str = trigger(args) if trigger is not None else ""
+            _start: float = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - _start, _widget)
+
+        return _wrapper
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.recording:
+            yield
+            return
+        _start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - _start)
+
+    def clear(self) -> None:
+        self.handlers.clear()
+
+    #  Slowest first by p95.
+
+    def summary(self) -> list[dict[str, Any]]:
+        _summary = [
+            _stats.summary(_name) for _name, _stats in self.handlers.items()
+        ]
+        _summary.sort(key=lambda _entry: _entry["p95_ms"], reverse=True)
+        return _summary
+
+    def report(self) -> str:
+        _lines: list[str] = [
+            f"{'handler':<40} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'max ms':>8}  widget"
+        ]
+        for _entry in self.summary():
+            _widget: str = next(iter(_entry["widgets"]), "")
+            _lines.append(
+                f"{_entry['name']:<40} {_entry['count']:>7} "
+                f"{_entry['p50_ms']:8.2f} {_entry['p95_ms']:8.2f} "
+                f"{_entry['max_ms']:8.2f}  {_widget}"
+            )
+        return "\n".join(_lines)
+
+    def dump(self, filename: str, **extra: Any) -> None:
+        _data: dict[str, Any] = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "samples": SAMPLES,
+            "handlers": self.summary(),
+        }
+        _data.update(extra)
+        with open(filename, "w") as _file:
+            json.dump(_data, _file, indent=2)
+
+
+#  The trigger of a bound handler is the widget of its event. Commands have no
+#  event, they are put down to the widget under the pointer, which is the button
+#  or menu that was clicked.
+
+
+def event_trigger(widget) -> Callable[[tuple], str]:
+    def _trigger(args: tuple) -> str:
+        if args and hasattr(args[0], "widget"):
+            return str(args[0].widget)
+        try:
+            _under = widget.winfo_containing(*widget.winfo_pointerxy())
+        except (KeyError, ValueError):
+            return ""
+        return "" if _under is None else str(_under)
+
+    return _trigger
+
+
+class DiagnosticsWindow(CTkToplevel):
+    def __init__(self, master, instrumentation: Instrumentation, extra=None) -> None:
+        super().__init__(master)
+        self.title("Gameboard Designer - Diagnostics")
+        self.geometry("760x420")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.instrumentation: Instrumentation = instrumentation
+        self.extra: Callable[[], dict[str, Any]] = extra or dict
+        self.refreshing: Optional[str] = None
+
+        self.table: CTkTextbox = CTkTextbox(
+            self, font=("Courier", 12), wrap="none", state="disabled"
+        )
+        self.table.pack(padx=10, pady=(10, 5), fill="both", expand=True)
+
+        _buttons: CTkFrame = CTkFrame(self, fg_color="transparent")
+        _buttons.pack(padx=10, pady=(5, 10), fill="x")
+        self.recording: CTkSwitch = CTkSwitch(
+            _buttons, text="Record", command=self.on_recording
+        )
+        self.recording.pack(side="left")
+        if instrumentation.recording:
+            self.recording.select()
+        CTkButton(_buttons, text="Clear", width=80, command=self.on_clear).pack(
+            side="left", padx=(10, 0)
+        )
+        CTkButton(_buttons, text="Save JSON...", width=100, command=self.on_save).pack(
+            side="right"
+        )
+
+        self.refresh()
+
+    def refresh(self) -> None:
+        self.table.configure(state="normal")
+        self.table.delete("1.0", "end")
+        self.table.insert("1.0", self.instrumentation.report())
+        self.table.configure(state="disabled")
+        self.refreshing = self.after(REFRESH_INTERVAL, self.refresh)
+
+    def on_recording(self) -> None:
+        self.instrumentation.recording = bool(self.recording.get())
+
+    def on_clear(self) -> None:
+        self.instrumentation.clear()
+
+    def on_save(self) -> None:
+        _filename: str = filedialog.asksaveasfilename(
+            parent=self,
+            title="Save diagnostics",
+            initialdir=".",
+            defaultextension=".json",
+            filetypes=(("JSON", "*.json"), ("All files", "*.*")),
+        )
+        if _filename != "":
+            self.instrumentation.dump(_filename, **self.extra())
+
+    def on_close(self) -> None:
+        if self.refreshing is not None:
+            self.after_cancel(self.refreshing)
+            self.refreshing = None
+        self.destroy()
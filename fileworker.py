@@ -0,0 +1,448 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, NamedTuple, Optional
+
+from customtkinter import CTkButton, CTkLabel, CTkProgressBar, CTkToplevel
+
+import atlas
+import bundle
+import tabformat
+from boardmodel import GRID_TYPES
+from cellgrid import Grid
+
+#  Background loading and saving of gameboards.
+
+#  Files are read and written on a single worker thread so jobs run in the order
+#  they were started, a save requested before an open always finishes first. A
+#  save works from a snapshot of the board taken on the Tk thread, so editing can
+#  carry on while it is written. The worker never touches Tk, the main loop polls
+#  the running job with after() and calls its callback when it is done.
+
+#  The most recent board can be preloaded in the background before it is asked
+#  for. Opening it then takes the preloaded board, unless the file has changed
+#  since it was read.
+
+#  Bundles are recognised by their content when opened and written for files
+#  ending in .tabz, with images missing from disk taken from the bundle the board
+#  was opened from.
+
+#  Saves are atomic. The data is written to a temporary file in the same
+#  directory, flushed to disk and renamed over the target, so a crash or a
+#  cancel part way through leaves the previous file intact.
+
+POLL_INTERVAL = 50
+
+#  The progress dialog only appears for jobs that take longer than this, in ms.
+
+DIALOG_DELAY = 250
+
+CHUNK_SIZE = 64 * 1024
+
+#  Gameboard attributes that belong to the running designer. They are saved with
+#  the value a board that is not shown has, as Gameboard pickles them too.
+
+TRANSIENT_FIELDS = ("cell_selected_callback", "images")
+
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class Cancelled(Exception):
+    pass
+
+
+class FileResult(NamedTuple):
+    value: Any
+    error: str
+    cancelled: bool
+
+
+class FileJob:
+    def __init__(self, title: str, callback: Callable[[FileResult], None]) -> None:
+        self.title: str = title
+        self.callback: Callable[[FileResult], None] = callback
+        self.cancelled: threading.Event = threading.Event()
+        self.future: Optional[Future] = None
+        self.elapsed: int = 0
+
+        #  Written by the worker and read by the main loop.
+
+        self.fraction: float = 0.0
+        self.status: str = ""
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    #  Called on the worker between steps.
+
+    def report(self, fraction: float, status: str) -> None:
+        if self.cancelled.is_set():
+            raise Cancelled
+        self.fraction = fraction
+        self.status = status
+
+
+#  Copy everything a save needs while on the Tk thread. Grids are copied, the
+#  other lists are shallow copied as their items are never mutated in place.
+
+
+def snapshot(gameboard) -> tabformat.LegacyGameboard:
+    _snapshot = tabformat.LegacyGameboard()
+    for _field, _value in gameboard.__dict__.items():
+        if _field in TRANSIENT_FIELDS:
+            _value = tabformat.LEGACY_STATE[_field]
+        elif isinstance(_value, Grid):
+            _value = _value.copy()
+        elif isinstance(_value, list):
+            _value = list(_value)
+        setattr(_snapshot, _field, _value)
+    _snapshot.saved = False
+    return _snapshot
+
+
+def encode(
+    gameboard, filename: str, source: Optional[bundle.Bundle], job: FileJob
+) -> bytes:
+    if filename.lower().endswith(bundle.EXTENSION):
+        return bundle.encode(
+            gameboard,
+            source=source,
+            report=lambda _fraction, _status: job.report(0.1 * _fraction, _status),
+        )
+    if filename.lower().endswith(tabformat.EXTENSION):
+        return tabformat.encode(gameboard)
+    return tabformat.dumps_legacy(gameboard)
+
+
+def write_atomic(filename: str, data: bytes, job: FileJob) -> None:
+    _directory: str = os.path.dirname(os.path.abspath(filename))
+    _descriptor, _temporary = tempfile.mkstemp(
+        prefix="." + os.path.basename(filename) + ".", suffix=".tmp", dir=_directory
+    )
+    try:
+        with os.fdopen(_descriptor, "wb") as _file:
+            for _start in range(0, len(data), CHUNK_SIZE):
+                job.report(0.1 + 0.8 * _start / len(data), "Writing")
+                _file.write(data[_start : _start + CHUNK_SIZE])
+            job.report(0.9, "Syncing")
+            _file.flush()
+            os.fsync(_file.fileno())
+
+        if os.path.exists(filename):
+            os.chmod(_temporary, os.stat(filename).st_mode & 0o7777)
+        else:
+            os.chmod(_temporary, 0o666 & ~UMASK)
+
+        job.report(0.95, "Renaming")
+        os.replace(_temporary, filename)
+    except BaseException:
+        try:
+            os.remove(_temporary)
+        except OSError:
+            pass
+        raise
+
+    #  Make the rename itself durable where the platform allows it.
+
+    try:
+        _handle: int = os.open(_directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(_handle)
+    except OSError:
+        pass
+    finally:
+        os.close(_handle)
+
+
+def save(
+    gameboard, filename: str, source: Optional[bundle.Bundle], job: FileJob
+) -> str:
+    job.report(0.0, "Encoding")
+    write_atomic(filename, encode(gameboard, filename, source, job), job)
+    return filename
+
+
+#  Load into a new object made by factory, normally Gameboard. The grids are
+#  built here so that attaching the board to the model is cheap.
+
+
+def load(filename: str, factory: Callable[[], Any], job: FileJob) -> Any:
+    job.report(0.0, "Reading")
+    if bundle.is_bundle(filename):
+        _bundle = bundle.Bundle(filename)
+        job.report(0.5, "Decoding")
+        return _bundle.board(factory())
+    if tabformat.is_tab2(filename):
+        with tabformat.TabFile(filename) as _tabfile:
+            job.report(0.5, "Decoding")
+            return _tabfile.read(factory())
+
+    _size: int = max(os.path.getsize(filename), 1)
+    _chunks: list[bytes] = []
+    with open(filename, "rb") as _file:
+        while _chunk := _file.read(CHUNK_SIZE):
+            _chunks.append(_chunk)
+            job.report(0.8 * min(sum(map(len, _chunks)) / _size, 1.0), "Reading")
+
+    job.report(0.8, "Decoding")
+    _gameboard = factory()
+    _gameboard.__dict__.update(tabformat.loads_legacy(b"".join(_chunks)).__dict__)
+    for _field, _type in GRID_TYPES.items():
+        job.report(0.9, "Decoding")
+        setattr(_gameboard, _field, _type.from_lists(getattr(_gameboard, _field)))
+    return _gameboard
+
+
+def file_stat(filename: str) -> tuple[int, int]:
+    _stat = os.stat(filename)
+    return _stat.st_size, _stat.st_mtime_ns
+
+
+def preload(filename: str, factory: Callable[[], Any]) -> tuple[tuple[int, int], Any]:
+    _stat: tuple[int, int] = file_stat(filename)
+    return _stat, load(filename, factory, FileJob("", lambda _result: None))
+
+
+def reuse(
+    preloaded: Future, filename: str, factory: Callable[[], Any], job: FileJob
+) -> Any:
+    job.report(0.0, "Reading")
+    try:
+        _stat, _gameboard = preloaded.result()
+        if _stat == file_stat(filename):
+            return _gameboard
+    except Exception:
+        pass
+    return load(filename, factory, job)
+
+
+class FileWorker:
+    def __init__(self, widget) -> None:
+        self.widget = widget
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="fileworker"
+        )
+        self.jobs: list[FileJob] = []
+        self.dialog: Optional[ProgressDialog] = None
+        self.polling: Optional[str] = None
+
+        self.preloader: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="preload"
+        )
+        self.preloaded: Optional[tuple[str, Future]] = None
+        self.preload_polling: Optional[str] = None
+
+    def save(
+        self,
+        gameboard,
+        filename: str,
+        callback: Callable[[FileResult], None],
+        source: Optional[bundle.Bundle] = None,
+    ) -> FileJob:
+        return self.submit(
+            f"Saving {os.path.basename(filename)}",
+            callback,
+            save,
+            snapshot(gameboard),
+            filename,
+            source,
+        )
+
+    def export_atlas(
+        self,
+        gameboard,
+        filename: str,
+        callback: Callable[[FileResult], None],
+        source: Optional[bundle.Bundle] = None,
+    ) -> FileJob:
+        return self.submit(
+            f"Exporting {os.path.basename(filename)}",
+            callback,
+            atlas.export,
+            snapshot(gameboard),
+            filename,
+            source,
+        )
+
+    def load(
+        self,
+        filename: str,
+        factory: Callable[[], Any],
+        callback: Callable[[FileResult], None],
+    ) -> FileJob:
+        _title: str = f"Opening {os.path.basename(filename)}"
+        if self.preloaded is not None and self.preloaded[0] == filename:
+            _future: Future = self.preloaded[1]
+            self.preloaded = None
+            return self.submit(_title, callback, reuse, _future, filename, factory)
+        return self.submit(_title, callback, load, filename, factory)
+
+    #  Start loading a board that is likely to be opened next. on_preloaded is
+    #  given the board on the main loop once it has been read.
+
+    def preload(
+        self,
+        filename: str,
+        factory: Callable[[], Any],
+        on_preloaded: Callable[[Any], None],
+    ) -> None:
+        _future: Future = self.preloader.submit(preload, filename, factory)
+        self.preloaded = (filename, _future)
+        if self.preload_polling is not None:
+            self.widget.after_cancel(self.preload_polling)
+        self.preload_polling = self.widget.after(
+            POLL_INTERVAL, self.poll_preload, _future, on_preloaded
+        )
+
+    def poll_preload(
+        self, future: Future, on_preloaded: Callable[[Any], None]
+    ) -> None:
+        if not future.done():
+            self.preload_polling = self.widget.after(
+                POLL_INTERVAL, self.poll_preload, future, on_preloaded
+            )
+            return
+        self.preload_polling = None
+        if future.exception() is None:
+            on_preloaded(future.result()[1])
+
+    def submit(
+        self, title: str, callback: Callable[[FileResult], None], function, *args
+    ) -> FileJob:
+        _job = FileJob(title, callback)
+        _job.future = self.executor.submit(function, *args, _job)
+        self.jobs.append(_job)
+        if self.polling is None:
+            self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+        return _job
+
+    def poll(self) -> None:
+        self.polling = None
+
+        while self.jobs and self.jobs[0].future.done():
+            _job: FileJob = self.jobs.pop(0)
+            _job.callback(self.result(_job))
+
+        if not self.jobs:
+            self.close_dialog()
+            return
+
+        _job = self.jobs[0]
+        _job.elapsed += POLL_INTERVAL
+        if _job.elapsed >= DIALOG_DELAY:
+            if self.dialog is None:
+                self.dialog = ProgressDialog(self.widget)
+            self.dialog.show(_job)
+
+        self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+
+    def result(self, job: FileJob) -> FileResult:
+        try:
+            return FileResult(job.future.result(), "", False)
+        except Cancelled:
+            return FileResult(None, "", True)
+        except Exception as _error:
+            return FileResult(None, str(_error) or type(_error).__name__, False)
+
+    def close_dialog(self) -> None:
+        if self.dialog is not None:
+            self.dialog.destroy()
+            self.dialog = None
+
+    #  Wait for outstanding jobs, so that a save started while quitting is not
+    #  lost. Their callbacks are not run.
+
+    def shutdown(self) -> None:
+        if self.polling is not None:
+            self.widget.after_cancel(self.polling)
+            self.polling = None
+        if self.preload_polling is not None:
+            self.widget.after_cancel(self.preload_polling)
+            self.preload_polling = None
+        self.preloader.shutdown(wait=False, cancel_futures=True)
+        self.executor.shutdown(wait=True)
+        self.jobs = []
+        self.close_dialog()
+
+
+#  Save each file the way the designer does, from a snapshot on the worker, and
+#  check that the attributes read back are those of the original plus the runtime
+#  state every legacy save writes. Returns the files that differ.
+
+
+def check(filenames: list[str], directory: str) -> list[str]:
+    _failed: list[str] = []
+    for _filename in filenames:
+        _job: FileJob = FileJob("", lambda _result: None)
+        _gameboard = load(_filename, tabformat.LegacyGameboard, _job)
+        _saved: str = os.path.join(directory, os.path.basename(_filename))
+        save(snapshot(_gameboard), _saved, None, _job)
+
+        _expected: set[str] = set(tabformat.load_legacy(_filename).__dict__)
+        _expected.update(tabformat.LEGACY_STATE)
+        _written: set[str] = set(tabformat.load_legacy(_saved).__dict__)
+        os.remove(_saved)
+        if _written != _expected:
+            _failed.append(_filename)
+            for _field in sorted(_expected - _written):
+                print(f"  {_filename}: missing {_field}", file=sys.stderr)
+            for _field in sorted(_written - _expected):
+                print(f"  {_filename}: added {_field}", file=sys.stderr)
+    return _failed
+
+
+class ProgressDialog(CTkToplevel):
+    def __init__(self, master) -> None:
+        super().__init__(master)
+        self.title("Gameboard Designer")
+        self.resizable(False, False)
+        self.transient(master)
+        self.protocol("WM_DELETE_WINDOW", self.on_cancel)
+
+        self.job: Optional[FileJob] = None
+
+        self.label: CTkLabel = CTkLabel(self, text="", width=280, anchor="w")
+        self.label.pack(padx=20, pady=(20, 5), fill="x")
+        self.progress: CTkProgressBar = CTkProgressBar(self, width=280)
+        self.progress.pack(padx=20, pady=5)
+        self.cancel: CTkButton = CTkButton(self, text="Cancel", command=self.on_cancel)
+        self.cancel.pack(padx=20, pady=(5, 20))
+
+    def show(self, job: FileJob) -> None:
+        self.job = job
+        self.label.configure(text=f"{job.title}: {job.status}")
+        self.progress.set(job.fraction)
+        self.cancel.configure(state="disabled" if job.cancelled.is_set() else "normal")
+
+    def on_cancel(self) -> None:
+        if self.job is not None:
+            self.job.cancel()
+            self.cancel.configure(state="disabled")
+
+
+def main() -> None:
+    _usage: str = "usage: fileworker.py check FILE..."
+    _args: list[str] = sys.argv[1:]
+
+    if len(_args) >= 2 and _args[0] == "check":
+        with tempfile.TemporaryDirectory() as _directory:
+            _failed: list[str] = check(_args[1:], _directory)
+        print(f"{len(_args) - 1 - len(_failed)} of {len(_args) - 1} files round trip")
+        if _failed:
+            sys.exit(1)
+    else:
+        print(_usage)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
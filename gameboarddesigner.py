@@ -2,50 +2,198 @@
 
 #  type: ignore
 
-from pathlib import Path
-from tkinter import Menu
-from typing import Optional
-
-import pygubu.widgets.simpletooltip as tooltip
-from CTkColorPicker import AskColor
-from CTkMessagebox import CTkMessagebox
-from customtkinter import (
-    CENTER,
+import time
+
+#  Taken before any other import so that --profile-startup can time them.
+
+STARTED: float = time.perf_counter()
+
+import sys  # noqa: E402
+from pathlib import Path  # noqa: E402
+from tkinter import Menu  # noqa: E402
+from typing import TYPE_CHECKING, Callable, Optional  # noqa: E402
+
+from customtkinter import (  # noqa: E402
     CTk,
     CTkButton,
     CTkEntry,
     CTkFrame,
-    CTkImage,
     CTkOptionMenu,
     CTkTabview,
     StringVar,
     filedialog,
 )
-from gameboard.gameboard import Gameboard
-from PIL import Image, ImageTk
-from pygubu import Builder
-
-from recentfiles import RecentFiles
-from validation import validated_colour, validated_int
+from pygubu import Builder  # noqa: E402
+
+import bundle  # noqa: E402
+import tabformat  # noqa: E402
+from assetstore import AssetStore  # noqa: E402
+from boardmodel import BoardModel, Change, RedrawScheduler  # noqa: E402
+from bulkfill import board_mask, checkerboard, matching, solid  # noqa: E402
+from diagnostics import DiagnosticsWindow, Instrumentation, event_trigger  # noqa: E402
+from fileworker import FileResult, FileWorker  # noqa: E402
+from generator import Design, build  # noqa: E402
+from generatorwindow import GeneratorWindow  # noqa: E402
+from history import History  # noqa: E402
+from imagecache import ImageCache  # noqa: E402
+from imageloader import ImageLoader  # noqa: E402
+from journal import Journal, pending, remove_journal  # noqa: E402
+from recentfiles import RecentFiles  # noqa: E402
+from renderer import BoardRenderer  # noqa: E402
+from selection import Selection  # noqa: E402
+from startupprofile import StartupProfile  # noqa: E402
+from tilecache import TileCache  # noqa: E402
+from validation import validated_colour, validated_int  # noqa: E402
+
+#  The colour picker, message boxes, tooltips, PIL and the gameboard runtime are
+#  imported where they are first used, to keep them out of startup.
+
+if TYPE_CHECKING:
+    from gameboard.gameboard import Gameboard
+    from PIL import ImageTk
 
 PROJECT_PATH = Path(__file__).parent
 PROJECT_UI = PROJECT_PATH / "gameboarddesigner.ui"
 
+IMAGE_CACHE_BUDGET = 64 * 1024 * 1024
+
+TILE_CACHE_BUDGET = 48 * 1024 * 1024
+
+HISTORY_BUDGET = 8 * 1024 * 1024
+
+#  Largest number of cells on each side of a board. Only the cells in view are
+#  drawn, so this is limited by the size of the files rather than the canvas.
+
+MAX_CELLS = 1000
+
+#  Board decorators can be placed up to this position, or up to the size of the
+#  board if that is bigger.
+
+MAX_DECORATOR_POSITION = 1000
+
+#  Palette tabs that are built the first time they are selected, with the ids of
+#  the tab and of the frame that fills it in the ui definition.
+
+LAZY_TABS = {
+    "Boarders": ("boarders_tab", "boarders_frame"),
+    "Cells": ("cells_tab", "cells_frame"),
+    "Decorators": ("decorators_tab", "decorators_frame"),
+    "Tokens": ("tokens_tab", "tokens_frame"),
+}
+
+#  Entries whose value is applied when they lose focus or Return is pressed, by
+#  palette tab.
+
+ENTRY_CALLBACKS = {
+    "Details": (
+        ("name", "on_name_changed"),
+        ("version", "on_version_changed"),
+        ("date", "on_date_changed"),
+        ("author", "on_author_changed"),
+    ),
+    "Boarders": (
+        ("width_of_left_outer_boarder", "on_width_of_left_outer_boarder_changed"),
+        ("width_of_top_outer_boarder", "on_width_of_top_outer_boarder_changed"),
+        ("width_of_right_outer_boarder", "on_width_of_right_outer_boarder_changed"),
+        ("width_of_bottom_outer_boarder", "on_width_of_bottom_outer_boarder_changed"),
+        ("colour_of_outer_boarder", "on_colour_of_outer_boarder_changed"),
+        ("width_of_left_inner_boarder", "on_width_of_left_inner_boarder_changed"),
+        ("width_of_top_inner_boarder", "on_width_of_top_inner_boarder_changed"),
+        ("width_of_right_inner_boarder", "on_width_of_right_inner_boarder_changed"),
+        ("width_of_bottom_inner_boarder", "on_width_of_bottom_inner_boarder_changed"),
+        ("colour_of_inner_boarder", "on_colour_of_inner_boarder_changed"),
+    ),
+    "Cells": (
+        ("number_of_cells_horizontally", "on_number_of_cells_horizontally_changed"),
+        ("number_of_cells_vertically", "on_number_of_cells_vertically_changed"),
+        ("height_of_cell", "on_height_of_cell_changed"),
+        ("top_padding_of_cell", "on_top_padding_of_cell_changed"),
+        ("bottom_padding_of_cell", "on_bottom_padding_of_cell_changed"),
+        (
+            "size_of_horizontal_gutter_after_cell",
+            "on_size_of_horizontal_gutter_after_cell_changed",
+        ),
+        ("width_of_cell", "on_width_of_cell_changed"),
+        ("left_padding_of_cell", "on_left_padding_of_cell_changed"),
+        ("right_padding_of_cell", "on_right_padding_of_cell_changed"),
+        (
+            "size_of_vertical_gutter_after_cell",
+            "on_size_of_vertical_gutter_after_cell_changed",
+        ),
+        ("colour_of_cell_gutter", "on_colour_of_cell_gutter_changed"),
+        ("colour_of_cell", "on_colour_of_cell_changed"),
+        ("colour_of_cell_padding", "on_colour_of_cell_padding_changed"),
+    ),
+    "Decorators": (
+        ("cell_light_colour", "on_cell_light_colour_changed"),
+        ("cell_dark_colour", "on_cell_dark_colour_changed"),
+        ("board_decorator_x_pos", "on_board_decorator_x_pos_changed"),
+        ("board_decorator_y_pos", "on_board_decorator_y_pos_changed"),
+    ),
+    "Tokens": (
+        ("token_name", "on_token_name_changed"),
+    ),
+}
+
+#  Methods timed by the diagnostics besides the on_* handlers. The first are
+#  triggered by widgets, the others are called from code.
+
+EVENT_HANDLERS = ("palette_selected", "cell_selected")
+TIMED_METHODS = ("load_gameboard", "show_gameboard", "render_changes", "get_image")
+
+
+#  Deferred imports.
+
+
+def new_gameboard() -> "Gameboard":
+    from gameboard.gameboard import Gameboard
+
+    return Gameboard()
+
+
+def create_tooltip(widget, text: str) -> None:
+    import pygubu.widgets.simpletooltip as tooltip
+
+    tooltip.create(widget, text)
+
+
+def ask_colour() -> Optional[str]:
+    from CTkColorPicker import AskColor
+
+    return AskColor().get()
+
+
+def message_box(**kwargs):
+    from CTkMessagebox import CTkMessagebox
+
+    return CTkMessagebox(**kwargs)
+
 
 class GameboarddesignerApp:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        lazy_tabs: bool = True,
+        startup: Optional[StartupProfile] = None,
+        diagnostics: bool = False,
+    ) -> None:
+
+        #  Phase timings, reported by --profile-startup.
+
+        self.startup: StartupProfile = startup or StartupProfile()
 
         #  Initialise the gameboard.
 
-        self.gameboard: Gameboard = Gameboard()
+        self.gameboard: Gameboard = new_gameboard()
         self.gameboard.cell_selected_callback = self.cell_selected
         self.filename: str = ""
+        self.startup.mark("gameboard")
 
         #  Initialisze the pygubu builder.
 
         self.builder: Builder = Builder()
         self.builder.add_resource_path(PROJECT_PATH)
         self.builder.add_from_file(PROJECT_UI)
+        self.startup.mark("ui parse")
 
         # Initialise main widget.
 
@@ -60,13 +208,24 @@ class GameboarddesignerApp:
         self.main_menu: Menu = self.builder.get_object("menu")
         self.mainwindow.configure(menu=self.main_menu)
 
-        #  Get all objects.
+        #  Instrument the handlers before anything holds a reference to them.
+
+        self.diagnostics: Instrumentation = Instrumentation(diagnostics)
+        self.diagnostics_window: Optional[DiagnosticsWindow] = None
+        self.generator_window: Optional[GeneratorWindow] = None
+        self.instrument_handlers()
 
+        #  Get all objects. Only the Details tab is built here, the other palette
+        #  tabs are built by build_tab.
+
+        self.built_tabs: set[str] = set()
         self.get_all_objects()
+        self.startup.mark("widget construction")
 
         #  Import all variables.
 
         self.import_all_variables()
+        self.startup.mark("variable import")
 
         #  Connect all callbacks.
 
@@ -75,14 +234,62 @@ class GameboarddesignerApp:
         #  Connect all accelerators.
 
         self.connect_all_accelerators()
+        self.startup.mark("callbacks")
 
         #  Initialise recent files list.
 
         self.initialise_recent_files_list()
+        self.startup.mark("recent files load")
+
+        #  Initialise the file worker.
+
+        self.file_worker: FileWorker = FileWorker(self.mainwindow)
+
+        #  Initialise the asset store and image cache.
+
+        self.assets: AssetStore = AssetStore()
+
+        self.images: ImageCache = ImageCache(IMAGE_CACHE_BUDGET)
+        self.image_loader: ImageLoader = ImageLoader(
+            self.mainwindow, self.images, self.on_image_ready
+        )
+
+        #  Initialise the tiles shown when zoomed out, and the board renderer.
+
+        self.tiles: TileCache = TileCache(
+            self.mainwindow, self.on_tiles_ready, TILE_CACHE_BUDGET
+        )
+        self.renderer: BoardRenderer = BoardRenderer(
+            self.main, self.cell_selected, self.get_image, self.tiles
+        )
+
+        #  The cell colours last shown in the palette, by field.
+
+        self.shown_colours: dict[str, str] = {}
+
+        #  Initialise board model and coalesced redraws.
 
-        #  Initialise image cache.
+        self.model: BoardModel = BoardModel(self.gameboard)
+        self.redraw: RedrawScheduler = RedrawScheduler(
+            self.mainwindow, self.render_changes
+        )
+        self.model.subscribe(self.redraw.on_change, self.redraw.on_transaction)
+
+        #  Initialise undo and redo.
+
+        self.history: History = History(
+            self.mainwindow, self.model, HISTORY_BUDGET, self.refresh_fields
+        )
 
-        self.images: dict[str, ImageTk.PhotoImage] = {}
+        #  Initialise the journal of unsaved edits.
+
+        self.journal: Journal = Journal(self.mainwindow, self.model)
+        self.startup.mark("services")
+
+        if not lazy_tabs:
+            for _tab in LAZY_TABS:
+                self.build_tab(_tab)
+            self.startup.mark("palette tabs")
 
     def get_all_objects(self) -> None:
 
@@ -93,71 +300,71 @@ class GameboarddesignerApp:
         #  Details tab.
 
         self.name: CTkEntry = self.builder.get_object("name")
-        tooltip.create(
+        create_tooltip(
             self.name,
             "Sets the name of the gameboard.",
         )
         self.version: CTkEntry = self.builder.get_object("version")
-        tooltip.create(
+        create_tooltip(
             self.version,
             "Sets the version of the gameboard.",
         )
         self.date: CTkEntry = self.builder.get_object("date")
-        tooltip.create(
+        create_tooltip(
             self.date,
             "Sets the date of the gameboard.",
         )
         self.author: CTkEntry = self.builder.get_object("author")
-        tooltip.create(
+        create_tooltip(
             self.author,
             "Sets the author of the gameboard.",
         )
 
-        #  Boarders tab.
+    def get_boarders_objects(self) -> None:
 
         self.width_of_left_outer_boarder: CTkEntry = self.builder.get_object(
             "width_of_left_outer_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_left_outer_boarder,
             "Sets the width of the left outer boarder.",
         )
         self.width_of_top_outer_boarder: CTkEntry = self.builder.get_object(
             "width_of_top_outer_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_top_outer_boarder, "Sets the width of the top outer boarder."
         )
         self.width_of_right_outer_boarder: CTkEntry = self.builder.get_object(
             "width_of_right_outer_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_right_outer_boarder,
             "Sets the width of the right outer boarder.",
         )
         self.width_of_bottom_outer_boarder: CTkEntry = self.builder.get_object(
             "width_of_bottom_outer_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_bottom_outer_boarder,
             "Sets the width of the bottom outer boarder.",
         )
         self.all_outer_width: CTkButton = self.builder.get_object("all_outer_width")
-        tooltip.create(
+        create_tooltip(
             self.all_outer_width,
             "Sets the width of all outer boarders to this value.",
         )
         self.colour_of_outer_boarder: CTkEntry = self.builder.get_object(
             "colour_of_outer_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.colour_of_outer_boarder,
             "Sets the colour of the outer boarder.",
         )
         self.pick_outer_boarder_colour: CTkButton = self.builder.get_object(
             "pick_outer_boarder_colour"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_outer_boarder_colour,
             "Picks a colour for the outer boarder.",
         )
@@ -165,119 +372,119 @@ class GameboarddesignerApp:
         self.width_of_left_inner_boarder: CTkEntry = self.builder.get_object(
             "width_of_left_inner_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_left_inner_boarder,
             "Sets the width of the left inner boarder.",
         )
         self.width_of_top_inner_boarder: CTkEntry = self.builder.get_object(
             "width_of_top_inner_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_top_inner_boarder,
             "Sets the width of the top inner boarder.",
         )
         self.width_of_right_inner_boarder: CTkEntry = self.builder.get_object(
             "width_of_right_inner_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_right_inner_boarder,
             "Sets the width of the right inner boarder.",
         )
         self.width_of_bottom_inner_boarder: CTkEntry = self.builder.get_object(
             "width_of_bottom_inner_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.width_of_bottom_inner_boarder,
             "Sets the width of the bottom inner boarder.",
         )
         self.all_inner_width: CTkButton = self.builder.get_object("all_inner_width")
-        tooltip.create(
+        create_tooltip(
             self.all_inner_width,
             "Sets the width of all inner boarders to this value.",
         )
         self.colour_of_inner_boarder: CTkEntry = self.builder.get_object(
             "colour_of_inner_boarder"
         )
-        tooltip.create(
+        create_tooltip(
             self.colour_of_inner_boarder,
             "Sets the colour of the inner boarder.",
         )
         self.pick_inner_boarder_colour: CTkButton = self.builder.get_object(
             "pick_inner_boarder_colour"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_inner_boarder_colour,
             "Picks a colour for the inner boarder.",
         )
 
-        #  Cells tab.
+    def get_cells_objects(self) -> None:
 
         self.number_of_cells_horizontally: CTkEntry = self.builder.get_object(
             "number_of_cells_horizontally"
         )
-        tooltip.create(
+        create_tooltip(
             self.number_of_cells_horizontally,
             "Sets the number of cells horizontally.",
         )
         self.number_of_cells_vertically: CTkEntry = self.builder.get_object(
             "number_of_cells_vertically"
         )
-        tooltip.create(
+        create_tooltip(
             self.number_of_cells_vertically,
             "Sets the number of cells vertically.",
         )
 
         self.cells_on_rows_row: CTkEntry = self.builder.get_object("cells_on_rows_row")
-        tooltip.create(
+        create_tooltip(
             self.cells_on_rows_row,
             "The number (zero indexed) of the selected row.",
         )
 
         self.height_of_cell: CTkEntry = self.builder.get_object("height_of_cell")
-        tooltip.create(
+        create_tooltip(
             self.height_of_cell,
             "Sets the height of the cells on the selected row.",
         )
         self.all_rows_height: CTkButton = self.builder.get_object("all_rows_height")
-        tooltip.create(
+        create_tooltip(
             self.all_rows_height,
             "Sets the height of the cells on all rows to this value.",
         )
         self.top_padding_of_cell: CTkEntry = self.builder.get_object(
             "top_padding_of_cell"
         )
-        tooltip.create(
+        create_tooltip(
             self.top_padding_of_cell,
             "Sets the top padding of the cells on the selected row.",
         )
         self.all_rows_top: CTkButton = self.builder.get_object("all_rows_top")
-        tooltip.create(
+        create_tooltip(
             self.all_rows_top,
             "Sets the top padding of the cells on all rows to this value.",
         )
         self.bottom_padding_of_cell: CTkEntry = self.builder.get_object(
             "bottom_padding_of_cell"
         )
-        tooltip.create(
+        create_tooltip(
             self.bottom_padding_of_cell,
             "Sets the bottom padding of the cells on the selected row.",
         )
         self.all_rows_bottom: CTkButton = self.builder.get_object("all_rows_bottom")
-        tooltip.create(
+        create_tooltip(
             self.all_rows_bottom,
             "Sets the bottom padding of the cells on all rows to this value.",
         )
         self.size_of_horizontal_gutter_after_cell: CTkEntry = self.builder.get_object(
             "size_of_horizontal_gutter_after_cell"
         )
-        tooltip.create(
+        create_tooltip(
             self.size_of_horizontal_gutter_after_cell,
             "Sets the size of the horizontal gutter after the selected row.",
         )
         self.all_rows_horizontal_gutter: CTkButton = self.builder.get_object(
             "all_rows_horizontal_gutter"
         )
-        tooltip.create(
+        create_tooltip(
             self.all_rows_horizontal_gutter,
             "Sets the size of the horizontal gutter following all rows to this value.",
         )
@@ -285,70 +492,70 @@ class GameboarddesignerApp:
         self.cells_on_columns_column: CTkEntry = self.builder.get_object(
             "cells_on_columns_column"
         )
-        tooltip.create(
+        create_tooltip(
             self.cells_on_columns_column,
             "The number (zero indexed) of the selected column.",
         )
 
         self.width_of_cell: CTkEntry = self.builder.get_object("width_of_cell")
-        tooltip.create(
+        create_tooltip(
             self.width_of_cell,
             "Sets the width of the cells on the selected column.",
         )
         self.all_columns_width: CTkButton = self.builder.get_object("all_columns_width")
-        tooltip.create(
+        create_tooltip(
             self.all_columns_width,
             "Sets the width of the cells on all columns to this value.",
         )
         self.left_padding_of_cell: CTkEntry = self.builder.get_object(
             "left_padding_of_cell"
         )
-        tooltip.create(
+        create_tooltip(
             self.left_padding_of_cell,
             "Sets the left padding of the cells on the selected column.",
         )
         self.all_columns_left: CTkButton = self.builder.get_object("all_columns_left")
-        tooltip.create(
+        create_tooltip(
             self.all_columns_left,
             "Sets the left padding of the cells on all columns to this value.",
         )
         self.right_padding_of_cell: CTkEntry = self.builder.get_object(
             "right_padding_of_cell"
         )
-        tooltip.create(
+        create_tooltip(
             self.right_padding_of_cell,
             "Sets the right padding of the cells on the selected column.",
         )
         self.all_columns_right: CTkButton = self.builder.get_object("all_columns_right")
-        tooltip.create(
+        create_tooltip(
             self.all_columns_right,
             "Sets the right padding of the cells on all columns to this value.",
         )
         self.size_of_vertical_gutter_after_cell: CTkEntry = self.builder.get_object(
             "size_of_vertical_gutter_after_cell"
         )
-        tooltip.create(
+        create_tooltip(
             self.size_of_vertical_gutter_after_cell,
             "Sets the size of the vertical gutter after the selected column.",
         )
         self.all_columns_vertical_gutter: CTkButton = self.builder.get_object(
             "all_columns_vertical_gutter"
         )
-        tooltip.create(
+        create_tooltip(
             self.all_columns_vertical_gutter,
             "Sets the size of the vertical gutter following all columns to this value.",
         )
         self.colour_of_cell_gutter: CTkEntry = self.builder.get_object(
             "colour_of_cell_gutter"
         )
-        tooltip.create(
+        create_tooltip(
             self.colour_of_cell_gutter,
             "Sets the colour of the cell gutter.",
         )
         self.pick_gutter_colour: CTkButton = self.builder.get_object(
             "pick_gutter_colour"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_gutter_colour,
             "Picks a colour for the cell gutter.",
         )
@@ -356,7 +563,7 @@ class GameboarddesignerApp:
         self.cells_on_rows_columns_row: CTkEntry = self.builder.get_object(
             "cells_on_rows_columns_row"
         )
-        tooltip.create(
+        create_tooltip(
             self.cells_on_rows_columns_row,
             "The number (zero indexed) of the selected row.",
         )
@@ -364,23 +571,23 @@ class GameboarddesignerApp:
         self.cells_on_rows_columns_column: CTkEntry = self.builder.get_object(
             "cells_on_rows_columns_column"
         )
-        tooltip.create(
+        create_tooltip(
             self.cells_on_rows_columns_column,
             "The number (zero indexed) of the selected column.",
         )
 
         self.colour_of_cell: CTkEntry = self.builder.get_object("colour_of_cell")
-        tooltip.create(
+        create_tooltip(
             self.colour_of_cell,
             "Sets the colour of the cell on the selected row and column.",
         )
 
         self.all_cell_colour: CTkEntry = self.builder.get_object("all_cell_colour")
-        tooltip.create(
+        create_tooltip(
             self.all_cell_colour, "Sets the cell colour of all cells to this value."
         )
         self.pick_cell_colour: CTkEntry = self.builder.get_object("pick_cell_colour")
-        tooltip.create(
+        create_tooltip(
             self.pick_cell_colour,
             "Picks a colour for the cell on the selected row and column.",
         )
@@ -388,56 +595,56 @@ class GameboarddesignerApp:
         self.colour_of_cell_padding: CTkEntry = self.builder.get_object(
             "colour_of_cell_padding"
         )
-        tooltip.create(
+        create_tooltip(
             self.colour_of_cell_padding,
             "Sets the colour of the cell padding on the selected row and column.",
         )
         self.all_cell_padding_colour: CTkEntry = self.builder.get_object(
             "all_cell_padding_colour"
         )
-        tooltip.create(
+        create_tooltip(
             self.all_cell_padding_colour,
             "Sets the cell padding colour of all cells to this value.",
         )
         self.pick_cell_padding_colour: CTkEntry = self.builder.get_object(
             "pick_cell_padding_colour"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_cell_padding_colour,
             "Picks a colour for the padding for the cell on the selected row and column.",
         )
 
-        #  Decorators tab.
+    def get_decorators_objects(self) -> None:
 
         self.cell_light_colour: CTkEntry = self.builder.get_object("cell_light_colour")
-        tooltip.create(
+        create_tooltip(
             self.cell_light_colour,
             "Sets the colour for the light cells in the checkerboard pattern.",
         )
         self.pick_cell_light_colour: CTkEntry = self.builder.get_object(
             "pick_cell_light_colour"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_cell_light_colour,
             "Picks a colour for the light cells in the checkerboard pattern.",
         )
 
         self.cell_dark_colour: CTkEntry = self.builder.get_object("cell_dark_colour")
-        tooltip.create(
+        create_tooltip(
             self.cell_dark_colour,
             "Sets the colour for the dark cells in the checkerboard pattern.",
         )
         self.pick_cell_dark_colour: CTkEntry = self.builder.get_object(
             "pick_cell_dark_colour"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_cell_dark_colour,
             "Picks a colour for the dark cells in the checkerboard pattern.",
         )
         self.apply_checkerboard: CTkEntry = self.builder.get_object(
             "apply_checkerboard"
         )
-        tooltip.create(
+        create_tooltip(
             self.apply_checkerboard,
             "Applies a checkerboard pattern to the current gameboard.",
         )
@@ -445,33 +652,33 @@ class GameboarddesignerApp:
         self.cell_decorators_row: CTkEntry = self.builder.get_object(
             "cell_decorators_row"
         )
-        tooltip.create(
+        create_tooltip(
             self.cell_decorators_row, "The number (zero indexed) of the selected row."
         )
 
         self.cell_decorators_column: CTkEntry = self.builder.get_object(
             "cell_decorators_column"
         )
-        tooltip.create(
+        create_tooltip(
             self.cell_decorators_column,
             "The number (zero indexed) of the selected column.",
         )
         self.cell_decorator: CTkEntry = self.builder.get_object("cell_decorator")
-        tooltip.create(
+        create_tooltip(
             self.cell_decorator,
             "The filename of the decorator for the cell at the selected row and column.",
         )
         self.pick_cell_decorator: CTkEntry = self.builder.get_object(
             "pick_cell_decorator"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_cell_decorator,
             "Pick the decorator for the cell at the selected row and column.",
         )
         self.remove_cell_decorator: CTkEntry = self.builder.get_object(
             "remove_cell_decorator"
         )
-        tooltip.create(
+        create_tooltip(
             self.remove_cell_decorator,
             "Removes the decorator from the cell at the selected row and column.",
         )
@@ -479,13 +686,13 @@ class GameboarddesignerApp:
         self.board_decorator_choice: CTkOptionMenu = self.builder.get_object(
             "board_decorator_choice"
         )
-        tooltip.create(
+        create_tooltip(
             self.board_decorator_choice,
             "Selects a board decorator.",
         )
 
         self.board_decorator: CTkEntry = self.builder.get_object("board_decorator")
-        tooltip.create(
+        create_tooltip(
             self.board_decorator,
             "The filename of the board decorator.",
         )
@@ -493,7 +700,7 @@ class GameboarddesignerApp:
         self.pick_board_decorator: CTkButton = self.builder.get_object(
             "pick_board_decorator"
         )
-        tooltip.create(
+        create_tooltip(
             self.pick_board_decorator,
             "Picks a board decorator.",
         )
@@ -501,59 +708,59 @@ class GameboarddesignerApp:
         self.board_decorator_x_pos: CTkEntry = self.builder.get_object(
             "board_decorator_x_pos"
         )
-        tooltip.create(
+        create_tooltip(
             self.board_decorator_x_pos,
             "Sets the horizontal position of the board decorator.",
         )
         self.board_decorator_y_pos: CTkEntry = self.builder.get_object(
             "board_decorator_y_pos"
         )
-        tooltip.create(
+        create_tooltip(
             self.board_decorator_y_pos,
             "Sets the vertical position of the board decorator.",
         )
         self.remove_board_decorator: CTkButton = self.builder.get_object(
             "remove_board_decorator"
         )
-        tooltip.create(
+        create_tooltip(
             self.remove_board_decorator,
             "Removes the board decorator.",
         )
 
-        #  Tokens tab.
+    def get_tokens_objects(self) -> None:
 
         self.token_choice: CTkOptionMenu = self.builder.get_object("token_choice")
-        tooltip.create(
+        create_tooltip(
             self.token_choice,
             "Selects a token to edit.",
         )
 
         self.token_name: CTkButton = self.builder.get_object("token_name")
-        tooltip.create(
+        create_tooltip(
             self.token_name,
             "Sets the name of the token.",
         )
 
         self.token: CTkButton = self.builder.get_object("token")
-        tooltip.create(
+        create_tooltip(
             self.token,
             "The filename of the token.",
         )
 
         self.pick_token: CTkButton = self.builder.get_object("pick_token")
-        tooltip.create(
+        create_tooltip(
             self.pick_token,
             "Picks a token.",
         )
 
         self.remove_token: CTkButton = self.builder.get_object("remove_token")
-        tooltip.create(
+        create_tooltip(
             self.remove_token,
             "Removes a token.",
         )
 
         self.placed_tokens_row: CTkButton = self.builder.get_object("placed_tokens_row")
-        tooltip.create(
+        create_tooltip(
             self.placed_tokens_row,
             "The number (zero indexed) of the selected row.",
         )
@@ -561,7 +768,7 @@ class GameboarddesignerApp:
         self.placed_tokens_column: CTkButton = self.builder.get_object(
             "placed_tokens_column"
         )
-        tooltip.create(
+        create_tooltip(
             self.placed_tokens_column,
             "The number (zero indexed) of the selected column.",
         )
@@ -569,7 +776,7 @@ class GameboarddesignerApp:
         self.placed_token_name_choice: CTkButton = self.builder.get_object(
             "placed_token_name_choice"
         )
-        tooltip.create(
+        create_tooltip(
             self.placed_token_name_choice,
             "Selects a token to place.",
         )
@@ -577,7 +784,7 @@ class GameboarddesignerApp:
         self.remove_placed_token: CTkButton = self.builder.get_object(
             "remove_placed_token"
         )
-        tooltip.create(
+        create_tooltip(
             self.remove_placed_token,
             "Removes the token at the selected row and column",
         )
@@ -643,191 +850,61 @@ class GameboarddesignerApp:
         self.var_placed_tokens_column: StringVar = None
         self.var_placed_token_name_choice: StringVar = None
 
+        #  Create every variable now, including those of tabs that are not built
+        #  yet. Their widgets pick them up by name when they are built.
+
+        for _name in [_name for _name in vars(self) if _name.startswith("var_")]:
+            self.builder.create_variable(_name)
+
         self.builder.import_variables(self)
 
     def connect_all_callbacks(self) -> None:
 
-        #  Connect callbacks  - <FocusOut>
-
         self.builder.connect_callbacks(self)
+        self.connect_entry_callbacks("Details")
 
-        self.name.bind("<FocusOut>", self.on_name_changed)
-        self.version.bind("<FocusOut>", self.on_version_changed)
-        self.date.bind("<FocusOut>", self.on_date_changed)
-        self.author.bind("<FocusOut>", self.on_author_changed)
-
-        self.width_of_left_outer_boarder.bind(
-            "<FocusOut>", self.on_width_of_left_outer_boarder_changed
-        )
-        self.width_of_top_outer_boarder.bind(
-            "<FocusOut>", self.on_width_of_top_outer_boarder_changed
-        )
-        self.width_of_right_outer_boarder.bind(
-            "<FocusOut>", self.on_width_of_right_outer_boarder_changed
-        )
-        self.width_of_bottom_outer_boarder.bind(
-            "<FocusOut>", self.on_width_of_bottom_outer_boarder_changed
-        )
-        self.colour_of_outer_boarder.bind(
-            "<FocusOut>", self.on_colour_of_outer_boarder_changed
-        )
-
-        self.width_of_left_inner_boarder.bind(
-            "<FocusOut>", self.on_width_of_left_inner_boarder_changed
-        )
-        self.width_of_top_inner_boarder.bind(
-            "<FocusOut>", self.on_width_of_top_inner_boarder_changed
-        )
-        self.width_of_right_inner_boarder.bind(
-            "<FocusOut>", self.on_width_of_right_inner_boarder_changed
-        )
-        self.width_of_bottom_inner_boarder.bind(
-            "<FocusOut>", self.on_width_of_bottom_inner_boarder_changed
-        )
-        self.colour_of_inner_boarder.bind(
-            "<FocusOut>", self.on_colour_of_inner_boarder_changed
-        )
-        self.number_of_cells_horizontally.bind(
-            "<FocusOut>", self.on_number_of_cells_horizontally_changed
-        )
-        self.number_of_cells_vertically.bind(
-            "<FocusOut>", self.on_number_of_cells_vertically_changed
-        )
-
-        self.height_of_cell.bind("<FocusOut>", self.on_height_of_cell_changed)
-        self.top_padding_of_cell.bind("<FocusOut>", self.on_top_padding_of_cell_changed)
+    def connect_entry_callbacks(self, tab: str) -> None:
+        for _widget, _callback in ENTRY_CALLBACKS[tab]:
+            for _event in ("<FocusOut>", "<Return>"):
+                getattr(self, _widget).bind(_event, getattr(self, _callback))
 
-        self.bottom_padding_of_cell.bind(
-            "<FocusOut>", self.on_bottom_padding_of_cell_changed
-        )
-        self.size_of_horizontal_gutter_after_cell.bind(
-            "<FocusOut>", self.on_size_of_horizontal_gutter_after_cell_changed
-        )
-
-        self.width_of_cell.bind("<FocusOut>", self.on_width_of_cell_changed)
-        self.left_padding_of_cell.bind(
-            "<FocusOut>", self.on_left_padding_of_cell_changed
-        )
-
-        self.right_padding_of_cell.bind(
-            "<FocusOut>", self.on_right_padding_of_cell_changed
-        )
-        self.size_of_vertical_gutter_after_cell.bind(
-            "<FocusOut>", self.on_size_of_vertical_gutter_after_cell_changed
-        )
-
-        self.colour_of_cell_gutter.bind(
-            "<FocusOut>", self.on_colour_of_cell_gutter_changed
-        )
-
-        self.colour_of_cell.bind("<FocusOut>", self.on_colour_of_cell_changed)
-
-        self.colour_of_cell_padding.bind(
-            "<FocusOut>", self.on_colour_of_cell_padding_changed
-        )
-
-        self.cell_light_colour.bind("<FocusOut>", self.on_cell_light_colour_changed)
-
-        self.cell_dark_colour.bind("<FocusOut>", self.on_cell_dark_colour_changed)
-
-        self.board_decorator_x_pos.bind(
-            "<FocusOut>", self.on_board_decorator_x_pos_changed
-        )
-
-        self.board_decorator_y_pos.bind(
-            "<FocusOut>", self.on_board_decorator_y_pos_changed
-        )
-
-        self.token_name.bind("<FocusOut>", self.on_token_name_changed)
-
-        #  Connect callbacks  - <Return>
-
-        self.name.bind("<Return>", self.on_name_changed)
-        self.version.bind("<Return>", self.on_version_changed)
-        self.date.bind("<Return>", self.on_date_changed)
-        self.author.bind("<Return>", self.on_author_changed)
-
-        self.width_of_left_outer_boarder.bind(
-            "<Return>", self.on_width_of_left_outer_boarder_changed
-        )
-        self.width_of_top_outer_boarder.bind(
-            "<Return>", self.on_width_of_top_outer_boarder_changed
-        )
-        self.width_of_right_outer_boarder.bind(
-            "<Return>", self.on_width_of_right_outer_boarder_changed
-        )
-        self.width_of_bottom_outer_boarder.bind(
-            "<Return>", self.on_width_of_bottom_outer_boarder_changed
-        )
-        self.colour_of_outer_boarder.bind(
-            "<Return>", self.on_colour_of_outer_boarder_changed
-        )
-
-        self.width_of_left_inner_boarder.bind(
-            "<Return>", self.on_width_of_left_inner_boarder_changed
-        )
-        self.width_of_top_inner_boarder.bind(
-            "<Return>", self.on_width_of_top_inner_boarder_changed
-        )
-        self.width_of_right_inner_boarder.bind(
-            "<Return>", self.on_width_of_right_inner_boarder_changed
-        )
-        self.width_of_bottom_inner_boarder.bind(
-            "<Return>", self.on_width_of_bottom_inner_boarder_changed
-        )
-        self.colour_of_inner_boarder.bind(
-            "<Return>", self.on_colour_of_inner_boarder_changed
-        )
-        self.number_of_cells_horizontally.bind(
-            "<Return>", self.on_number_of_cells_horizontally_changed
-        )
-        self.number_of_cells_vertically.bind(
-            "<Return>", self.on_number_of_cells_vertically_changed
-        )
-
-        self.height_of_cell.bind("<Return>", self.on_height_of_cell_changed)
-        self.top_padding_of_cell.bind("<Return>", self.on_top_padding_of_cell_changed)
-
-        self.bottom_padding_of_cell.bind(
-            "<Return>", self.on_bottom_padding_of_cell_changed
-        )
-        self.size_of_horizontal_gutter_after_cell.bind(
-            "<Return>", self.on_size_of_horizontal_gutter_after_cell_changed
-        )
-
-        self.width_of_cell.bind("<Return>", self.on_width_of_cell_changed)
-        self.left_padding_of_cell.bind("<Return>", self.on_left_padding_of_cell_changed)
-
-        self.right_padding_of_cell.bind(
-            "<Return>", self.on_right_padding_of_cell_changed
-        )
-        self.size_of_vertical_gutter_after_cell.bind(
-            "<Return>", self.on_size_of_vertical_gutter_after_cell_changed
-        )
-
-        self.colour_of_cell_gutter.bind(
-            "<Return>", self.on_colour_of_cell_gutter_changed
-        )
-
-        self.colour_of_cell.bind("<Return>", self.on_colour_of_cell_changed)
-
-        self.colour_of_cell_padding.bind(
-            "<Return>", self.on_colour_of_cell_padding_changed
-        )
+    #  Build a palette tab from the ui definition, connect its commands and
+    #  entries and bring its widgets up to date with the gameboard.
 
-        self.cell_light_colour.bind("<Return>", self.on_cell_light_colour_changed)
-
-        self.cell_dark_colour.bind("<Return>", self.on_cell_dark_colour_changed)
-
-        self.board_decorator_x_pos.bind(
-            "<Return>", self.on_board_decorator_x_pos_changed
-        )
-
-        self.board_decorator_y_pos.bind(
-            "<Return>", self.on_board_decorator_y_pos_changed
-        )
-
-        self.token_name.bind("<Return>", self.on_token_name_changed)
+    def build_tab(self, tab: str) -> None:
+        if tab not in LAZY_TABS or tab in self.built_tabs:
+            return
+        self.built_tabs.add(tab)
+
+        _tab_id, _frame_id = LAZY_TABS[tab]
+        _existing: set[str] = set(self.builder.objects)
+        self.builder.get_object(_frame_id, self.builder.get_object(_tab_id))
+        for _id, _object in list(self.builder.objects.items()):
+            if _id not in _existing:
+                _object.connect_commands(self)
+                _object.connect_bindings(self)
+
+        getattr(self, f"get_{tab.lower()}_objects")()
+        self.connect_entry_callbacks(tab)
+
+        if tab == "Decorators":
+            self.load_decorators()
+            self.update_remove_cell_decorator()
+        if tab == "Tokens":
+            self.load_tokens()
+            self.update_remove_placed_token()
+
+    def instrument_handlers(self) -> None:
+        _trigger = event_trigger(self.mainwindow)
+        for _name in dir(type(self)):
+            if _name.startswith("on_") or _name in EVENT_HANDLERS:
+                setattr(
+                    self,
+                    _name,
+                    self.diagnostics.wrap(_name, getattr(self, _name), _trigger),
+                )
+        for _name in TIMED_METHODS:
+            setattr(self, _name, self.diagnostics.wrap(_name, getattr(self, _name)))
 
     def connect_all_accelerators(self) -> None:
 
@@ -838,11 +915,18 @@ class GameboarddesignerApp:
         self.mainwindow.bind_all("<Control-s>", self.on_save)
         self.mainwindow.bind_all("<Control-q>", self.on_quit)
 
+        self.mainwindow.bind_all("<Control-z>", self.on_undo)
+        self.mainwindow.bind_all("<Control-y>", self.on_redo)
+
+        self.mainwindow.bind_all("<Control-plus>", self.on_zoom_in)
+        self.mainwindow.bind_all("<Control-equal>", self.on_zoom_in)
+        self.mainwindow.bind_all("<Control-minus>", self.on_zoom_out)
+        self.mainwindow.bind_all("<Control-Key-0>", self.on_zoom_reset)
+
     def initialise_recent_files_list(self) -> None:
 
-        self.recent_files_list: list[str] = []
         self.recent_files: RecentFiles = RecentFiles(
-            self.recent_files_list, self.recent_files_menu, self.on_open_recent
+            self.recent_files_menu, self.on_open_recent
         )
         self.recent_files.load_recent_files()
 
@@ -850,10 +934,31 @@ class GameboarddesignerApp:
 
         self.load_gameboard()
         self.show_gameboard()
+        self.startup.mark("first show_gameboard")
+
+        self.mainwindow.after(0, self.startup.finish)
+        self.mainwindow.after_idle(self.prefetch_recent)
+        self.mainwindow.after_idle(self.recover)
         self.mainwindow.mainloop()
 
     def load_gameboard(self) -> None:
 
+        self.redraw.cancel()
+        self.model.attach(self.gameboard)
+        self.image_loader.prefetch(self.gameboard)
+
+        self.var_board_decorator_choice.set("Add decorator")
+        self.var_token_choice.set("Add token")
+        self.show_fields((0, 0))
+
+        self.gameboard.cell_selected_callback = self.cell_selected
+        self.history.clear()
+        self.journal.start(self.filename)
+
+    #  Bring the palette up to date with the gameboard, showing the given cell.
+
+    def show_fields(self, cell: tuple[int, int]) -> None:
+
         self.var_name.set(self.gameboard.name)
         self.var_version.set(self.gameboard.version)
         self.var_date.set(self.gameboard.date)
@@ -893,61 +998,58 @@ class GameboarddesignerApp:
             self.gameboard.number_of_cells_vertically
         )
 
-        self.var_cells_on_rows_row.set(0)
-        self.var_height_of_cell.set(self.gameboard.height_of_cell[0])
-        self.var_top_padding_of_cell.set(self.gameboard.top_padding_of_cell[0])
-        self.var_bottom_padding_of_cell.set(self.gameboard.bottom_padding_of_cell[0])
-        self.var_size_of_horizontal_gutter_after_cell.set(
-            self.gameboard.size_of_horizontal_gutter_after_cell[0]
-        )
-
-        self.var_cells_on_columns_column.set(0)
-        self.var_width_of_cell.set(self.gameboard.width_of_cell[0])
-        self.var_left_padding_of_cell.set(self.gameboard.left_padding_of_cell[0])
-        self.var_right_padding_of_cell.set(self.gameboard.right_padding_of_cell[0])
-        self.var_size_of_vertical_gutter_after_cell.set(
-            self.gameboard.size_of_vertical_gutter_after_cell[0]
-        )
-
         self.var_colour_of_cell_gutter.set(self.gameboard.colour_of_cell_gutter)
 
-        self.var_cells_on_rows_columns_row.set(0)
-        self.var_cells_on_rows_columns_column.set(0)
-        self.var_colour_of_cell.set(self.gameboard.colour_of_cell[0][0])
-        self.var_colour_of_cell_padding.set(self.gameboard.colour_of_cell_padding[0][0])
+        self.cell_selected(cell)
 
-        self.var_cell_decorators_row.set(0)
-        self.var_cell_decorators_column.set(0)
-        self.var_cell_decorator.set(self.gameboard.cell_decorator[0][0])
+    #  Called after an undo or redo, which may have removed the selected row,
+    #  column, decorator or token.
 
-        if self.gameboard.cell_decorator[0][0] == "":
-            self.remove_cell_decorator.configure(state="disabled")
-        else:
-            self.remove_cell_decorator.configure(state="normal")
+    def refresh_fields(self) -> None:
+        _row: int = min(
+            int(self.var_cells_on_rows_columns_row.get()),
+            self.gameboard.number_of_cells_vertically - 1,
+        )
+        _column: int = min(
+            int(self.var_cells_on_rows_columns_column.get()),
+            self.gameboard.number_of_cells_horizontally - 1,
+        )
 
         self.var_board_decorator_choice.set("Add decorator")
         self.var_token_choice.set("Add token")
+        self.show_fields((_row, _column))
 
-        self.var_placed_tokens_row.set(0)
-        self.var_placed_tokens_column.set(0)
-        self.var_placed_token_name_choice.set(self.gameboard.placed_tokens[0][0])
-
-        self.gameboard.cell_selected_callback = self.cell_selected
+        self.load_decorators()
+        self.load_tokens()
 
     def show_gameboard(self) -> None:
 
-        self.mainwindow.title(f"Gameboard Designer - {self.gameboard.name}")
+        with self.diagnostics.phase("show_gameboard.show_title"):
+            self.show_title()
 
-        for widget in self.main.winfo_children():
-            widget.destroy()
+        with self.diagnostics.phase("show_gameboard.load_decorators"):
+            self.load_decorators()
+        with self.diagnostics.phase("show_gameboard.load_tokens"):
+            self.load_tokens()
 
-        self.load_decorators()
-        self.load_tokens()
+        with self.diagnostics.phase("show_gameboard.draw"):
+            self.renderer.draw(self.gameboard)
+
+    def show_title(self) -> None:
+        self.mainwindow.title(f"Gameboard Designer - {self.gameboard.name}")
+
+    def render_changes(self, changes: list[Change]) -> None:
+        if any(_change.field == "name" for _change in changes):
+            self.show_title()
+        self.renderer.apply_changes(changes)
 
-        canvas: Canvas = self.gameboard.draw(self.main)
-        canvas.pack(anchor=CENTER, expand=True)
+    #  The decorator and token widgets are only brought up to date once their
+    #  tab has been built, build_tab does so when it is.
 
     def load_decorators(self) -> None:
+        if "Decorators" not in self.built_tabs:
+            return
+
         _decorators = [
             f"Decorator {i+1}" for i in range(len(self.gameboard.board_decorator))
         ]
@@ -958,7 +1060,9 @@ class GameboarddesignerApp:
         )
 
         if _index > 0:
-            self.var_board_decorator.set(self.gameboard.board_decorator[_index - 1][0])
+            self.var_board_decorator.set(
+                self.assets.name_of(self.gameboard.board_decorator[_index - 1][0])
+            )
             self.var_board_decorator_x_pos.set(
                 self.gameboard.board_decorator[_index - 1][1]
             )
@@ -971,6 +1075,9 @@ class GameboarddesignerApp:
             self.var_board_decorator_y_pos.set(0)
 
     def load_tokens(self) -> None:
+        if "Tokens" not in self.built_tabs:
+            return
+
         _tokens = [_token[0] for _token in self.gameboard.tokens]
         self.token_choice.configure(values=["Add token"] + _tokens)
 
@@ -978,7 +1085,9 @@ class GameboarddesignerApp:
 
         if _index > 0:
             self.var_token_name.set(self.gameboard.tokens[_index - 1][0])
-            self.var_token.set(self.gameboard.tokens[_index - 1][1])
+            self.var_token.set(
+                self.assets.name_of(self.gameboard.tokens[_index - 1][1])
+            )
             self.token_name.configure(state="normal")
             self.pick_token.configure(state="normal")
             self.remove_token.configure(state="normal")
@@ -995,11 +1104,34 @@ class GameboarddesignerApp:
         if self.placed_token_name_choice.get() == "":
             self.remove_placed_token.configure("disabled")
 
+    def update_remove_cell_decorator(self) -> None:
+        if "Decorators" not in self.built_tabs:
+            return
+
+        if self.var_cell_decorator.get() == "":
+            self.remove_cell_decorator.configure(state="disabled")
+        else:
+            self.remove_cell_decorator.configure(state="normal")
+
+    def update_remove_placed_token(self) -> None:
+        if "Tokens" not in self.built_tabs:
+            return
+
+        if self.var_placed_token_name_choice.get() == "":
+            self.remove_placed_token.configure(state="disabled")
+        else:
+            self.remove_placed_token.configure(state="normal")
+
     #  File menu actions.
 
-    def check_save(self, *args) -> None:
+    #  Offer to save an edited board before then replaces it. Saves finish on the
+    #  file worker, so when the board is saved then is run once the file has been
+    #  written, and not at all if the save fails or is cancelled, leaving the board
+    #  open to be saved again.
+
+    def check_save(self, then: Callable[[], None]) -> None:
         if self.gameboard.saved is False:
-            msg = CTkMessagebox(
+            msg = message_box(
                 title="Save gameboard",
                 message="Do you want to save the current gameboard before continuing?",
                 icon="question",
@@ -1009,38 +1141,48 @@ class GameboarddesignerApp:
             response = msg.get()
 
             if response == "Yes":
-                self.save()
+                self.save(then)
+                return
+            self.journal.discard()
+        then()
 
     def on_new(self, *args) -> None:
+        self.check_save(self.new)
 
-        self.check_save()
-        self.gameboard = Gameboard()
+    def new(self) -> None:
+        self.gameboard = new_gameboard()
         self.filename = ""
+        self.attach_bundle("")
         self.load_gameboard()
         self.show_gameboard()
         self.palette.set("Details")
 
-    def on_open(self, *args) -> None:
+    def on_generate(self) -> None:
+        _window: Optional[GeneratorWindow] = self.generator_window
+        if _window is not None and _window.winfo_exists():
+            _window.focus()
+            return
+        self.generator_window = GeneratorWindow(self.mainwindow, self.generated)
 
-        self.check_save()
-        _result = self.open()
-        if _result is not None:
-            self.gameboard = _result[0]
-            self.filename = _result[1]
-            self.load_gameboard()
-            self.show_gameboard()
-            self.palette.set("Details")
+    #  Start a new board from a design picked in the generator window.
 
-    def on_open_recent(self, filename: str) -> None:
+    def generated(self, design: Design) -> None:
+        self.check_save(lambda: self.create(design))
+
+    def create(self, design: Design) -> None:
+        self.gameboard = build(design, new_gameboard())
+        self.gameboard.saved = False
+        self.filename = ""
+        self.attach_bundle("")
+        self.load_gameboard()
+        self.show_gameboard()
+        self.palette.set("Details")
+
+    def on_open(self, *args) -> None:
+        self.check_save(self.open)
 
-        self.check_save()
-        _result = self.open_filename(filename)
-        if _result is not None:
-            self.gameboard = _result[0]
-            self.filename = _result[1]
-            self.load_gameboard()
-            self.show_gameboard()
-            self.palette.set("Details")
+    def on_open_recent(self, filename: str) -> None:
+        self.check_save(lambda: self.open_filename(filename))
 
     def on_clear_recent_files(self) -> None:
         self.recent_files.clear_recent_files_list()
@@ -1051,77 +1193,285 @@ class GameboarddesignerApp:
     def on_save_as(self) -> None:
         self.save_as()
 
+    def on_export_atlas(self) -> None:
+        self.export_atlas()
+
+    #  Edit menu actions.
+
+    def on_undo(self, *args) -> None:
+        self.history.undo()
+
+    def on_redo(self, *args) -> None:
+        self.history.redo()
+
+    #  View menu actions.
+
+    def on_zoom_in(self, *args) -> None:
+        self.renderer.zoom_in()
+
+    def on_zoom_out(self, *args) -> None:
+        self.renderer.zoom_out()
+
+    def on_zoom_reset(self, *args) -> None:
+        self.renderer.zoom_reset()
+
+    #  Help menu actions.
+
+    def on_diagnostics(self) -> None:
+        _window: Optional[DiagnosticsWindow] = self.diagnostics_window
+        if _window is not None and _window.winfo_exists():
+            _window.focus()
+            return
+        self.diagnostics_window = DiagnosticsWindow(
+            self.mainwindow, self.diagnostics, self.diagnostics_extra
+        )
+
+    #  Saved with the handler timings.
+
+    def diagnostics_extra(self) -> dict:
+        return {
+            "startup_ms": {
+                _phase: _seconds * 1000 for _phase, _seconds in self.startup.phases
+            },
+            "board": [
+                self.gameboard.number_of_cells_vertically,
+                self.gameboard.number_of_cells_horizontally,
+            ],
+            "history": self.history.statistics(),
+        }
+
     def on_quit(self, *args) -> None:
-        self.check_save()
+        self.check_save(self.quit)
+
+    def quit(self) -> None:
+        self.journal.shutdown()
+        self.recent_files.shutdown()
+        self.image_loader.shutdown()
+        self.tiles.shutdown()
+        self.file_worker.shutdown()
         self.mainwindow.quit()
 
     #  File IO
 
-    def open_filename(self, filename: str) -> tuple[Gameboard, str] | None:
+    #  Files are read and written on the file worker. Opening and saving only
+    #  start a job, the results are handled by opened and saved on the main loop.
+
+    def open_filename(self, filename: str, recover: Optional[bool] = None) -> None:
 
         if filename != "":
-            _gameboard, _message = Gameboard.load(filename)
-            if _gameboard is not None:
-                self.recent_files.add_to_recent_files_list(self.relative_path(filename))
-                return _gameboard, filename
-            else:
-                CTkMessagebox(
-                    title="Error while loading gameboard",
-                    message=_message,
-                    icon="cancel",
-                )
-                return None
+            self.file_worker.load(
+                filename,
+                new_gameboard,
+                lambda _result: self.opened(filename, _result, recover),
+            )
+
+    #  A journal of unsaved edits to the board is replayed if recover is set, or
+    #  if the user asks for it when recover is None.
+
+    def opened(
+        self, filename: str, result: FileResult, recover: Optional[bool] = None
+    ) -> None:
+
+        if result.cancelled:
+            return
+        if result.error != "":
+            message_box(
+                title="Error while loading gameboard",
+                message=result.error,
+                icon="cancel",
+            )
+            return
+
+        self.recent_files.add_to_recent_files_list(self.relative_path(filename))
+        self.gameboard = result.value
+        self.filename = filename
+        self.attach_bundle(filename)
+        self.load_gameboard()
+        self.show_gameboard()
+        self.palette.set("Details")
+
+        if not pending(filename):
+            return
+        if recover is None:
+            recover = self.ask_recover(filename)
+        if recover:
+            self.journal.replay()
+            self.gameboard.saved = False
         else:
-            return None
+            self.journal.discard()
+
+    def ask_recover(self, filename: str) -> bool:
+        msg = message_box(
+            title="Recover gameboard",
+            message=f"{filename} has changes that were not saved. "
+            "Do you want to recover them?",
+            icon="question",
+            option_1="No",
+            option_2="Yes",
+        )
+        return msg.get() == "Yes"
+
+    #  Offer to recover the most recent board left with unsaved edits.
+
+    def recover(self) -> None:
+        for _filename in self.recent_files.recent_files:
+            if pending(_filename):
+                if self.ask_recover(_filename):
+                    self.open_filename(_filename, recover=True)
+                else:
+                    remove_journal(_filename)
+                return
+
+    #  Check the recent files, and read the most recent board and decode its
+    #  assets ahead of it being opened.
+
+    def prefetch_recent(self) -> None:
+        self.recent_files.verify()
+        if self.recent_files.most_recent != "":
+            self.file_worker.preload(
+                self.recent_files.most_recent,
+                new_gameboard,
+                self.image_loader.prefetch,
+            )
+
+    #  The images of a board opened from a bundle are read from the bundle.
+
+    def attach_bundle(self, filename: str) -> None:
+        _bundle: Optional[bundle.Bundle] = None
+        if filename != "" and bundle.is_bundle(filename):
+            try:
+                _bundle = bundle.Bundle(filename)
+            except (OSError, ValueError, bundle.BundleError):
+                pass
+        self.image_loader.bundle = _bundle
+        self.tiles.images = _bundle.load_image if _bundle is not None else None
 
-    def open(self) -> tuple[Gameboard, str] | None:
+    def open(self) -> None:
 
-        _filetypes = (("gameboards", "*.tab"), ("All files", "*.*"))
+        _filetypes = (
+            ("gameboards", "*.tab *" + tabformat.EXTENSION + " *" + bundle.EXTENSION),
+            ("All files", "*.*"),
+        )
 
         _filename: str = filedialog.askopenfilename(
             title="Open gameboard", initialdir=".", filetypes=_filetypes
         )
 
-        return self.open_filename(_filename)
+        self.open_filename(_filename)
 
-    def save(self):
+    def save(self, then: Optional[Callable[[], None]] = None):
         if self.filename == "":
-            self.save_as()
+            self.save_as(then)
         else:
-            _error = self.gameboard.save(self.filename)
-            if _error == "":
-                self.recent_files.add_to_recent_files_list(
-                    self.relative_path(self.filename)
-                )
-            else:
-                CTkMessagebox(
-                    title="Error while saving gameboard", message=_error, icon="cancel"
-                )
+            self.write_gameboard(self.filename, then)
 
-    def save_as(self):
-        _filetypes = (("gameboards", "*.tab"), ("All files", "*.*"))
+    def save_as(self, then: Optional[Callable[[], None]] = None):
+        _filetypes = (
+            ("gameboards", "*.tab *" + tabformat.EXTENSION + " *" + bundle.EXTENSION),
+            ("All files", "*.*"),
+        )
 
         _filename: str = filedialog.asksaveasfilename(
             title="Save gameboard", initialdir=".", filetypes=_filetypes
         )
         if _filename != "":
-            if not _filename.lower().endswith(".tab"):
+            if not _filename.lower().endswith(
+                (".tab", tabformat.EXTENSION, bundle.EXTENSION)
+            ):
                 _filename += ".tab"
 
-            _error = self.gameboard.save(_filename)
-            if _error == "":
-                self.recent_files.add_to_recent_files_list(
-                    self.relative_path(_filename)
-                )
-                self.filename = _filename
-            else:
-                CTkMessagebox(
-                    title="Error while saving gameboard", message=_error, icon="cancel"
-                )
+            self.write_gameboard(_filename, then)
+
+    #  Files ending in .tab2 are written in the binary format, files ending in
+    #  .tabz as bundles, anything else as the pickle the gameboard runtime loads.
+    #  then is run once the file has been written.
+
+    def write_gameboard(
+        self, filename: str, then: Optional[Callable[[], None]] = None
+    ) -> None:
+        _gameboard: Gameboard = self.gameboard
+        _mark: int = self.journal.mark()
+        self.file_worker.save(
+            _gameboard,
+            filename,
+            lambda _result: self.saved(_gameboard, filename, _mark, _result, then),
+            self.image_loader.bundle,
+        )
+
+    #  The recent files list is only updated, and the journal compacted, once the
+    #  file has been renamed into place.
+
+    def saved(
+        self,
+        gameboard: "Gameboard",
+        filename: str,
+        mark: int,
+        result: FileResult,
+        then: Optional[Callable[[], None]] = None,
+    ) -> None:
+
+        if result.cancelled:
+            return
+        if result.error != "":
+            message_box(
+                title="Error while saving gameboard",
+                message=result.error,
+                icon="cancel",
+            )
+            return
+
+        gameboard.saved = True
+        self.recent_files.add_to_recent_files_list(self.relative_path(filename))
+        if gameboard is self.gameboard:
+            self.filename = filename
+            self.journal.saved(filename, mark)
+            if filename.lower().endswith(bundle.EXTENSION):
+                self.attach_bundle(filename)
+        if then is not None:
+            then()
+
+    #  The atlas is drawn, packed and written on the file worker, and how well it
+    #  packed is reported once it is done.
+
+    def export_atlas(self) -> None:
+        _filetypes = (("images", "*.png"), ("All files", "*.*"))
+
+        _filename: str = filedialog.asksaveasfilename(
+            title="Export atlas", initialdir=".", filetypes=_filetypes
+        )
+        if _filename != "":
+            if not _filename.lower().endswith(".png"):
+                _filename += ".png"
+
+            self.file_worker.export_atlas(
+                self.gameboard,
+                _filename,
+                lambda _result: self.exported_atlas(_filename, _result),
+                self.image_loader.bundle,
+            )
+
+    def exported_atlas(self, filename: str, result: FileResult) -> None:
+
+        if result.cancelled:
+            return
+        if result.error != "":
+            message_box(
+                title="Error while exporting atlas",
+                message=result.error,
+                icon="cancel",
+            )
+            return
+
+        _message: str = f"{filename}: {result.value}"
+        if result.value.missing:
+            _message += "\n\nMissing " + ", ".join(result.value.missing)
+        message_box(title="Export atlas", message=_message, icon="check")
 
     #  Field change callbacks.
 
     def palette_selected(self, *args):
+        self.build_tab(self.palette.get())
+
         if self.palette.get() == "Details":
             self.name.focus()
         if self.palette.get() == "Boarders":
@@ -1132,415 +1482,291 @@ class GameboarddesignerApp:
             ...
 
     def on_name_changed(self, *args) -> None:
-        self.gameboard.name = self.var_name.get()
-        self.show_gameboard()
+        self.model.set("name", self.var_name.get())
 
     def on_version_changed(self, *args) -> None:
-        self.gameboard.version = self.var_version.get()
-        self.show_gameboard()
+        self.model.set("version", self.var_version.get())
 
     def on_date_changed(self, *args) -> None:
-        self.gameboard.date = self.var_date.get()
-        self.show_gameboard()
+        self.model.set("date", self.var_date.get())
 
     def on_author_changed(self, *args) -> None:
-        self.gameboard.author = self.var_author.get()
-        self.show_gameboard()
+        self.model.set("author", self.var_author.get())
 
     def on_width_of_left_outer_boarder_changed(self, *args) -> None:
-        self.gameboard.width_of_left_outer_boarder = validated_int(
-            self.var_width_of_left_outer_boarder,
-            self.width_of_left_outer_boarder,
-            self.gameboard.width_of_left_outer_boarder,
-            max=500,
+        self.model.set(
+            "width_of_left_outer_boarder",
+            validated_int(
+                self.var_width_of_left_outer_boarder,
+                self.width_of_left_outer_boarder,
+                self.gameboard.width_of_left_outer_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_top_outer_boarder_changed(self, *args) -> None:
-        self.gameboard.width_of_top_outer_boarder = validated_int(
-            self.var_width_of_top_outer_boarder,
-            self.width_of_top_outer_boarder,
-            self.gameboard.width_of_top_outer_boarder,
-            max=500,
+        self.model.set(
+            "width_of_top_outer_boarder",
+            validated_int(
+                self.var_width_of_top_outer_boarder,
+                self.width_of_top_outer_boarder,
+                self.gameboard.width_of_top_outer_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_right_outer_boarder_changed(self, *args) -> None:
-
-        self.gameboard.width_of_right_outer_boarder = validated_int(
-            self.var_width_of_right_outer_boarder,
-            self.width_of_right_outer_boarder,
-            self.gameboard.width_of_right_outer_boarder,
-            max=500,
+        self.model.set(
+            "width_of_right_outer_boarder",
+            validated_int(
+                self.var_width_of_right_outer_boarder,
+                self.width_of_right_outer_boarder,
+                self.gameboard.width_of_right_outer_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_bottom_outer_boarder_changed(self, *args) -> None:
-        self.gameboard.width_of_bottom_outer_boarder = validated_int(
-            self.var_width_of_bottom_outer_boarder,
-            self.width_of_bottom_outer_boarder,
-            self.gameboard.width_of_bottom_outer_boarder,
-            max=500,
+        self.model.set(
+            "width_of_bottom_outer_boarder",
+            validated_int(
+                self.var_width_of_bottom_outer_boarder,
+                self.width_of_bottom_outer_boarder,
+                self.gameboard.width_of_bottom_outer_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_colour_of_outer_boarder_changed(self, *args) -> None:
-        self.gameboard.colour_of_outer_boarder = validated_colour(
-            self.var_colour_of_outer_boarder,
-            self.colour_of_outer_boarder,
-            self.gameboard.colour_of_outer_boarder,
+        self.model.set(
+            "colour_of_outer_boarder",
+            validated_colour(
+                self.var_colour_of_outer_boarder,
+                self.colour_of_outer_boarder,
+                self.gameboard.colour_of_outer_boarder,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_left_inner_boarder_changed(self, *args) -> None:
-        self.gameboard.width_of_left_inner_boarder = validated_int(
-            self.var_width_of_left_inner_boarder,
-            self.width_of_left_inner_boarder,
-            self.gameboard.width_of_left_inner_boarder,
-            max=500,
+        self.model.set(
+            "width_of_left_inner_boarder",
+            validated_int(
+                self.var_width_of_left_inner_boarder,
+                self.width_of_left_inner_boarder,
+                self.gameboard.width_of_left_inner_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_top_inner_boarder_changed(self, *args) -> None:
-        self.gameboard.width_of_top_inner_boarder = validated_int(
-            self.var_width_of_top_inner_boarder,
-            self.width_of_top_inner_boarder,
-            self.gameboard.width_of_top_inner_boarder,
-            max=500,
+        self.model.set(
+            "width_of_top_inner_boarder",
+            validated_int(
+                self.var_width_of_top_inner_boarder,
+                self.width_of_top_inner_boarder,
+                self.gameboard.width_of_top_inner_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_right_inner_boarder_changed(self, *args) -> None:
-
-        self.gameboard.width_of_right_inner_boarder = validated_int(
-            self.var_width_of_right_inner_boarder,
-            self.width_of_right_inner_boarder,
-            self.gameboard.width_of_right_inner_boarder,
-            max=500,
+        self.model.set(
+            "width_of_right_inner_boarder",
+            validated_int(
+                self.var_width_of_right_inner_boarder,
+                self.width_of_right_inner_boarder,
+                self.gameboard.width_of_right_inner_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_bottom_inner_boarder_changed(self, *args) -> None:
-        self.gameboard.width_of_bottom_inner_boarder = validated_int(
-            self.var_width_of_bottom_inner_boarder,
-            self.width_of_bottom_inner_boarder,
-            self.gameboard.width_of_bottom_inner_boarder,
-            max=500,
+        self.model.set(
+            "width_of_bottom_inner_boarder",
+            validated_int(
+                self.var_width_of_bottom_inner_boarder,
+                self.width_of_bottom_inner_boarder,
+                self.gameboard.width_of_bottom_inner_boarder,
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_colour_of_inner_boarder_changed(self, *args) -> None:
-        self.gameboard.colour_of_inner_boarder = validated_colour(
-            self.var_colour_of_inner_boarder,
-            self.colour_of_inner_boarder,
-            self.gameboard.colour_of_inner_boarder,
+        self.model.set(
+            "colour_of_inner_boarder",
+            validated_colour(
+                self.var_colour_of_inner_boarder,
+                self.colour_of_inner_boarder,
+                self.gameboard.colour_of_inner_boarder,
+            ),
         )
-        self.show_gameboard()
 
     def on_number_of_cells_horizontally_changed(self, *args) -> None:
-        _original_number_of_cells: int = self.gameboard.number_of_cells_horizontally
-        self.gameboard.number_of_cells_horizontally = validated_int(
-            self.var_number_of_cells_horizontally,
-            self.number_of_cells_horizontally,
-            self.gameboard.number_of_cells_horizontally,
-            min=1,
-        )
-
-        #  If the number of horizontal cells has reduced then trim the lists that hold multiple values based on the number of columns.
-
-        if self.gameboard.number_of_cells_horizontally < _original_number_of_cells:
-            self.gameboard.width_of_cell = self.gameboard.width_of_cell[
-                : self.gameboard.number_of_cells_horizontally
-            ]
-            self.gameboard.left_padding_of_cell = self.gameboard.left_padding_of_cell[
-                : self.gameboard.number_of_cells_horizontally
-            ]
-            self.gameboard.right_padding_of_cell = self.gameboard.right_padding_of_cell[
-                : self.gameboard.number_of_cells_horizontally
-            ]
-            self.gameboard.size_of_vertical_gutter_after_cell = (
-                self.gameboard.size_of_vertical_gutter_after_cell[
-                    : self.gameboard.number_of_cells_horizontally
-                ]
-            )
-
-            for _row in range(self.gameboard.number_of_cells_vertically):
-                self.gameboard.colour_of_cell[_row] = self.gameboard.colour_of_cell[
-                    _row
-                ][: self.gameboard.number_of_cells_horizontally]
-                self.gameboard.colour_of_cell_padding[_row] = (
-                    self.gameboard.colour_of_cell_padding[_row][
-                        : self.gameboard.number_of_cells_horizontally
-                    ]
-                )
-                self.gameboard.cell_decorator[_row] = self.gameboard.cell_decorator[
-                    _row
-                ][: self.gameboard.number_of_cells_horizontally]
-                self.gameboard.placed_tokens[_row] = self.gameboard.placed_tokens[_row][
-                    : self.gameboard.number_of_cells_horizontally
-                ]
-
-        #  If the number of horizontal cells has increased then expand the lists that hold multiple values based on the number of columns.
-
-        if self.gameboard.number_of_cells_horizontally > _original_number_of_cells:
-            _increase: int = (
-                self.gameboard.number_of_cells_horizontally - _original_number_of_cells
+        self.model.resize_columns(
+            validated_int(
+                self.var_number_of_cells_horizontally,
+                self.number_of_cells_horizontally,
+                self.gameboard.number_of_cells_horizontally,
+                min=1,
+                max=MAX_CELLS,
             )
-
-            for _ in range(_increase):
-
-                self.gameboard.width_of_cell.append(
-                    self.gameboard.width_of_cell[_original_number_of_cells - 1]
-                )
-                self.gameboard.left_padding_of_cell.append(
-                    self.gameboard.left_padding_of_cell[_original_number_of_cells - 1]
-                )
-                self.gameboard.right_padding_of_cell.append(
-                    self.gameboard.right_padding_of_cell[_original_number_of_cells - 1]
-                )
-                self.gameboard.size_of_vertical_gutter_after_cell.append(
-                    self.gameboard.size_of_vertical_gutter_after_cell[
-                        _original_number_of_cells - 1
-                    ]
-                )
-
-            for _row in range(self.gameboard.number_of_cells_vertically):
-
-                for _ in range(_increase):
-                    self.gameboard.colour_of_cell[_row].append(
-                        self.gameboard.colour_of_cell[_row][
-                            _original_number_of_cells - 1
-                        ]
-                    )
-                    self.gameboard.colour_of_cell_padding[_row].append(
-                        self.gameboard.colour_of_cell_padding[_row][
-                            _original_number_of_cells - 1
-                        ]
-                    )
-                    self.gameboard.cell_decorator[_row].append("")
-                    self.gameboard.placed_tokens[_row].append("")
-
-        self.show_gameboard()
+        )
 
     def on_number_of_cells_vertically_changed(self, *args) -> None:
-        _original_number_of_cells: int = self.gameboard.number_of_cells_vertically
-        self.gameboard.number_of_cells_vertically = validated_int(
-            self.var_number_of_cells_vertically,
-            self.number_of_cells_vertically,
-            self.gameboard.number_of_cells_vertically,
-            min=1,
-        )
-
-        #  If the number of vertical cells has reduced then trim the lists that hold multiple values based on the number of rows.
-
-        if self.gameboard.number_of_cells_vertically < _original_number_of_cells:
-            self.gameboard.height_of_cell = self.gameboard.height_of_cell[
-                : self.gameboard.number_of_cells_vertically
-            ]
-            self.gameboard.top_padding_of_cell = self.gameboard.top_padding_of_cell[
-                : self.gameboard.number_of_cells_vertically
-            ]
-            self.gameboard.bottom_padding_of_cell = (
-                self.gameboard.bottom_padding_of_cell[
-                    : self.gameboard.number_of_cells_vertically
-                ]
-            )
-            self.gameboard.size_of_horizontal_gutter_after_cell = (
-                self.gameboard.size_of_horizontal_gutter_after_cell[
-                    : self.gameboard.number_of_cells_vertically
-                ]
-            )
-            self.gameboard.colour_of_cell = self.gameboard.colour_of_cell[
-                : self.gameboard.number_of_cells_vertically
-            ]
-            self.gameboard.colour_of_cell_padding = (
-                self.gameboard.colour_of_cell_padding[
-                    : self.gameboard.number_of_cells_vertically
-                ]
-            )
-            self.gameboard.cell_decorator = self.gameboard.cell_decorator[
-                : self.gameboard.number_of_cells_vertically
-            ]
-            self.gameboard.placed_tokens = self.gameboard.placed_tokens[
-                : self.gameboard.number_of_cells_vertically
-            ]
-
-        #  If the number of vertical cells has increased then expand the lists that hold multiple values based on the number of rows.
-
-        if self.gameboard.number_of_cells_vertically > _original_number_of_cells:
-            _increase: int = (
-                self.gameboard.number_of_cells_vertically - _original_number_of_cells
+        self.model.resize_rows(
+            validated_int(
+                self.var_number_of_cells_vertically,
+                self.number_of_cells_vertically,
+                self.gameboard.number_of_cells_vertically,
+                min=1,
+                max=MAX_CELLS,
             )
-
-            for _ in range(_increase):
-
-                self.gameboard.height_of_cell.append(
-                    self.gameboard.height_of_cell[_original_number_of_cells - 1]
-                )
-                self.gameboard.top_padding_of_cell.append(
-                    self.gameboard.top_padding_of_cell[_original_number_of_cells - 1]
-                )
-                self.gameboard.bottom_padding_of_cell.append(
-                    self.gameboard.bottom_padding_of_cell[_original_number_of_cells - 1]
-                )
-                self.gameboard.size_of_horizontal_gutter_after_cell.append(
-                    self.gameboard.size_of_horizontal_gutter_after_cell[
-                        _original_number_of_cells - 1
-                    ]
-                )
-
-                self.gameboard.colour_of_cell.append(
-                    self.gameboard.colour_of_cell[_original_number_of_cells - 1].copy()
-                )
-                self.gameboard.colour_of_cell_padding.append(
-                    self.gameboard.colour_of_cell_padding[
-                        _original_number_of_cells - 1
-                    ].copy()
-                )
-                self.gameboard.cell_decorator.append(
-                    [""] * self.gameboard.number_of_cells_horizontally
-                )
-                self.gameboard.placed_tokens.append(
-                    [""] * self.gameboard.number_of_cells_horizontally
-                )
-
-        self.show_gameboard()
+        )
 
     def on_height_of_cell_changed(self, *args) -> None:
-        self.gameboard.height_of_cell[int(self.var_cells_on_rows_row.get())] = (
+        _row: int = int(self.var_cells_on_rows_row.get())
+        self.model.set_item(
+            "height_of_cell",
+            _row,
             validated_int(
                 self.var_height_of_cell,
                 self.height_of_cell,
-                self.gameboard.height_of_cell[int(self.var_cells_on_rows_row.get())],
+                self.gameboard.height_of_cell[_row],
                 min=10,
                 max=500,
-            )
+            ),
         )
-        self.show_gameboard()
 
     def on_top_padding_of_cell_changed(self, *args) -> None:
-        self.gameboard.top_padding_of_cell[int(self.var_cells_on_rows_row.get())] = (
+        _row: int = int(self.var_cells_on_rows_row.get())
+        self.model.set_item(
+            "top_padding_of_cell",
+            _row,
             validated_int(
                 self.var_top_padding_of_cell,
                 self.top_padding_of_cell,
-                self.gameboard.top_padding_of_cell[
-                    int(self.var_cells_on_rows_row.get())
-                ],
+                self.gameboard.top_padding_of_cell[_row],
                 max=500,
-            )
+            ),
         )
-        self.show_gameboard()
 
     def on_bottom_padding_of_cell_changed(self, *args) -> None:
-        self.gameboard.bottom_padding_of_cell[int(self.var_cells_on_rows_row.get())] = (
+        _row: int = int(self.var_cells_on_rows_row.get())
+        self.model.set_item(
+            "bottom_padding_of_cell",
+            _row,
             validated_int(
                 self.var_bottom_padding_of_cell,
                 self.bottom_padding_of_cell,
-                self.gameboard.bottom_padding_of_cell[
-                    int(self.var_cells_on_rows_row.get())
-                ],
+                self.gameboard.bottom_padding_of_cell[_row],
                 max=500,
-            )
+            ),
         )
-        self.show_gameboard()
 
     def on_size_of_horizontal_gutter_after_cell_changed(self, *args) -> None:
-        self.gameboard.size_of_horizontal_gutter_after_cell[
-            int(self.var_cells_on_rows_row.get())
-        ] = validated_int(
-            self.var_size_of_horizontal_gutter_after_cell,
-            self.size_of_horizontal_gutter_after_cell,
-            self.gameboard.size_of_horizontal_gutter_after_cell[
-                int(self.var_cells_on_rows_row.get())
-            ],
-            max=500,
+        _row: int = int(self.var_cells_on_rows_row.get())
+        self.model.set_item(
+            "size_of_horizontal_gutter_after_cell",
+            _row,
+            validated_int(
+                self.var_size_of_horizontal_gutter_after_cell,
+                self.size_of_horizontal_gutter_after_cell,
+                self.gameboard.size_of_horizontal_gutter_after_cell[_row],
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_width_of_cell_changed(self, *args) -> None:
-        self.gameboard.width_of_cell[int(self.var_cells_on_columns_column.get())] = (
+        _column: int = int(self.var_cells_on_columns_column.get())
+        self.model.set_item(
+            "width_of_cell",
+            _column,
             validated_int(
                 self.var_width_of_cell,
                 self.width_of_cell,
-                self.gameboard.width_of_cell[
-                    int(self.var_cells_on_columns_column.get())
-                ],
+                self.gameboard.width_of_cell[_column],
                 min=10,
                 max=500,
-            )
+            ),
         )
-        self.show_gameboard()
 
     def on_left_padding_of_cell_changed(self, *args) -> None:
-        self.gameboard.left_padding_of_cell[
-            int(self.var_cells_on_rows_columns_column.get())
-        ] = validated_int(
-            self.var_left_padding_of_cell,
-            self.left_padding_of_cell,
-            self.gameboard.left_padding_of_cell[
-                int(self.var_cells_on_rows_columns_column.get())
-            ],
-            max=500,
+        _column: int = int(self.var_cells_on_rows_columns_column.get())
+        self.model.set_item(
+            "left_padding_of_cell",
+            _column,
+            validated_int(
+                self.var_left_padding_of_cell,
+                self.left_padding_of_cell,
+                self.gameboard.left_padding_of_cell[_column],
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_right_padding_of_cell_changed(self, *args) -> None:
-        self.gameboard.right_padding_of_cell[
-            int(self.var_cells_on_rows_columns_column.get())
-        ] = validated_int(
-            self.var_right_padding_of_cell,
-            self.right_padding_of_cell,
-            self.gameboard.right_padding_of_cell[
-                int(self.var_cells_on_rows_columns_column.get())
-            ],
-            max=500,
+        _column: int = int(self.var_cells_on_rows_columns_column.get())
+        self.model.set_item(
+            "right_padding_of_cell",
+            _column,
+            validated_int(
+                self.var_right_padding_of_cell,
+                self.right_padding_of_cell,
+                self.gameboard.right_padding_of_cell[_column],
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_size_of_vertical_gutter_after_cell_changed(self, *args) -> None:
-        self.gameboard.size_of_vertical_gutter_after_cell[
-            int(self.var_cells_on_rows_row.get())
-        ] = validated_int(
-            self.var_size_of_vertical_gutter_after_cell,
-            self.size_of_vertical_gutter_after_cell,
-            self.gameboard.size_of_vertical_gutter_after_cell[
-                int(self.var_cells_on_rows_row.get())
-            ],
-            max=500,
+        _column: int = int(self.var_cells_on_rows_row.get())
+        self.model.set_item(
+            "size_of_vertical_gutter_after_cell",
+            _column,
+            validated_int(
+                self.var_size_of_vertical_gutter_after_cell,
+                self.size_of_vertical_gutter_after_cell,
+                self.gameboard.size_of_vertical_gutter_after_cell[_column],
+                max=500,
+            ),
         )
-        self.show_gameboard()
 
     def on_colour_of_cell_gutter_changed(self, *args) -> None:
-        self.gameboard.colour_of_cell_gutter = validated_colour(
-            self.var_colour_of_cell_gutter,
-            self.colour_of_cell_gutter,
-            self.gameboard.colour_of_cell_gutter,
+        self.model.set(
+            "colour_of_cell_gutter",
+            validated_colour(
+                self.var_colour_of_cell_gutter,
+                self.colour_of_cell_gutter,
+                self.gameboard.colour_of_cell_gutter,
+            ),
         )
-        self.show_gameboard()
 
     def on_colour_of_cell_changed(self, *args) -> None:
-        self.gameboard.colour_of_cell[int(self.var_cells_on_rows_columns_row.get())][
-            int(self.var_cells_on_rows_columns_column.get())
-        ] = validated_colour(
-            self.var_colour_of_cell,
-            self.colour_of_cell,
-            self.gameboard.colour_of_cell[
-                int(self.var_cells_on_rows_columns_row.get())
-            ][int(self.var_cells_on_rows_columns_column.get())],
+        self.cell_colour_entered(
+            "colour_of_cell", self.var_colour_of_cell, self.colour_of_cell
         )
-        self.show_gameboard()
 
     def on_colour_of_cell_padding_changed(self, *args) -> None:
-        self.gameboard.colour_of_cell_padding[
-            int(self.var_cells_on_rows_columns_row.get())
-        ][int(self.var_cells_on_rows_columns_column.get())] = validated_colour(
+        self.cell_colour_entered(
+            "colour_of_cell_padding",
             self.var_colour_of_cell_padding,
             self.colour_of_cell_padding,
-            self.gameboard.colour_of_cell_padding[
-                int(self.var_cells_on_rows_columns_row.get())
-            ][int(self.var_cells_on_rows_columns_column.get())],
         )
-        self.show_gameboard()
+
+    #  The cell colour entries also fire when they lose focus. Only a colour that
+    #  differs from the one the palette last showed is applied, otherwise leaving
+    #  an untouched entry would paint the whole selection with the colour of the
+    #  cell shown.
+
+    def cell_colour_entered(self, field: str, variable: StringVar, entry) -> None:
+        _row: int = int(self.var_cells_on_rows_columns_row.get())
+        _column: int = int(self.var_cells_on_rows_columns_column.get())
+        _shown: str = self.shown_colours.get(
+            field, getattr(self.gameboard, field)[_row][_column]
+        )
+        _colour: str = validated_colour(variable, entry, _shown)
+        if _colour == _shown:
+            return
+        self.shown_colours[field] = _colour
+        self.set_selected_cells(field, _row, _column, _colour)
 
     def on_cell_light_colour_changed(self, *args) -> None:
         self.var_cell_light_colour.set(
@@ -1569,18 +1795,21 @@ class GameboarddesignerApp:
             - 1
         )
 
-        self.gameboard.board_decorator[_index] = (
-            self.gameboard.board_decorator[_index][0],
-            validated_int(
-                self.var_board_decorator_x_pos,
-                self.board_decorator_x_pos,
-                self.gameboard.board_decorator[_index][1],
-                min=0,
-                max=1000,
+        self.model.set_item(
+            "board_decorator",
+            _index,
+            (
+                self.gameboard.board_decorator[_index][0],
+                validated_int(
+                    self.var_board_decorator_x_pos,
+                    self.board_decorator_x_pos,
+                    self.gameboard.board_decorator[_index][1],
+                    min=0,
+                    max=max(MAX_DECORATOR_POSITION, self.renderer.layout.width),
+                ),
+                self.gameboard.board_decorator[_index][2],
             ),
-            self.gameboard.board_decorator[_index][2],
         )
-        self.show_gameboard()
 
     def on_board_decorator_y_pos_changed(self, *args) -> None:
         _index = (
@@ -1590,238 +1819,243 @@ class GameboarddesignerApp:
             - 1
         )
 
-        self.gameboard.board_decorator[_index] = (
-            self.gameboard.board_decorator[_index][0],
-            self.gameboard.board_decorator[_index][1],
-            validated_int(
-                self.var_board_decorator_y_pos,
-                self.board_decorator_y_pos,
-                self.gameboard.board_decorator[_index][2],
-                min=0,
-                max=1000,
+        self.model.set_item(
+            "board_decorator",
+            _index,
+            (
+                self.gameboard.board_decorator[_index][0],
+                self.gameboard.board_decorator[_index][1],
+                validated_int(
+                    self.var_board_decorator_y_pos,
+                    self.board_decorator_y_pos,
+                    self.gameboard.board_decorator[_index][2],
+                    min=0,
+                    max=max(MAX_DECORATOR_POSITION, self.renderer.layout.height),
+                ),
             ),
         )
-        self.show_gameboard()
 
     def on_token_name_changed(self, *args) -> None:
 
         _index = self.token_choice._values.index(self.token_choice.get()) - 1
 
-        self.gameboard.tokens[_index] = (self.var_token_name.get(), self.token.get())
+        self.model.set_item(
+            "tokens",
+            _index,
+            (self.var_token_name.get(), self.gameboard.tokens[_index][1]),
+        )
 
         _tokens = [_token[0] for _token in self.gameboard.tokens]
         self.token_choice.configure(values=["Add token"] + _tokens)
         self.token_choice.set(self.var_token_name.get())
-        self.show_gameboard()
+        self.load_tokens()
 
-    #  Handle button presses.
+    #  Handle button presses. Buttons that make several edits make them in one
+    #  transaction, so they are drawn once and undone as one step.
 
     def on_all_outer_width(self):
 
-        self.gameboard.width_of_left_outer_boarder = int(
-            self.var_width_of_left_outer_boarder.get()
-        )
+        with self.model.transaction():
+            self.model.set(
+                "width_of_left_outer_boarder",
+                int(self.var_width_of_left_outer_boarder.get()),
+            )
 
-        self.var_width_of_top_outer_boarder.set(
-            self.var_width_of_left_outer_boarder.get()
-        )
-        self.gameboard.width_of_top_outer_boarder = int(
-            self.var_width_of_left_outer_boarder.get()
-        )
+            self.var_width_of_top_outer_boarder.set(
+                self.var_width_of_left_outer_boarder.get()
+            )
+            self.model.set(
+                "width_of_top_outer_boarder",
+                int(self.var_width_of_left_outer_boarder.get()),
+            )
 
-        self.var_width_of_right_outer_boarder.set(
-            self.var_width_of_left_outer_boarder.get()
-        )
-        self.gameboard.width_of_right_outer_boarder = int(
-            self.var_width_of_left_outer_boarder.get()
-        )
+            self.var_width_of_right_outer_boarder.set(
+                self.var_width_of_left_outer_boarder.get()
+            )
+            self.model.set(
+                "width_of_right_outer_boarder",
+                int(self.var_width_of_left_outer_boarder.get()),
+            )
 
-        self.var_width_of_bottom_outer_boarder.set(
-            self.var_width_of_left_outer_boarder.get()
-        )
-        self.gameboard.width_of_bottom_outer_boarder = int(
-            self.var_width_of_left_outer_boarder.get()
-        )
-        self.show_gameboard()
+            self.var_width_of_bottom_outer_boarder.set(
+                self.var_width_of_left_outer_boarder.get()
+            )
+            self.model.set(
+                "width_of_bottom_outer_boarder",
+                int(self.var_width_of_left_outer_boarder.get()),
+            )
 
     def on_all_inner_width(self):
 
-        self.gameboard.width_of_left_inner_boarder = int(
-            self.var_width_of_left_inner_boarder.get()
-        )
+        with self.model.transaction():
+            self.model.set(
+                "width_of_left_inner_boarder",
+                int(self.var_width_of_left_inner_boarder.get()),
+            )
 
-        self.var_width_of_top_inner_boarder.set(
-            self.var_width_of_left_inner_boarder.get()
-        )
-        self.gameboard.width_of_top_inner_boarder = int(
-            self.var_width_of_left_inner_boarder.get()
-        )
+            self.var_width_of_top_inner_boarder.set(
+                self.var_width_of_left_inner_boarder.get()
+            )
+            self.model.set(
+                "width_of_top_inner_boarder",
+                int(self.var_width_of_left_inner_boarder.get()),
+            )
 
-        self.var_width_of_right_inner_boarder.set(
-            self.var_width_of_left_inner_boarder.get()
-        )
-        self.gameboard.width_of_right_inner_boarder = int(
-            self.var_width_of_left_inner_boarder.get()
-        )
+            self.var_width_of_right_inner_boarder.set(
+                self.var_width_of_left_inner_boarder.get()
+            )
+            self.model.set(
+                "width_of_right_inner_boarder",
+                int(self.var_width_of_left_inner_boarder.get()),
+            )
 
-        self.var_width_of_bottom_inner_boarder.set(
-            self.var_width_of_left_inner_boarder.get()
-        )
-        self.gameboard.width_of_bottom_inner_boarder = int(
-            self.var_width_of_left_inner_boarder.get()
-        )
-        self.show_gameboard()
+            self.var_width_of_bottom_inner_boarder.set(
+                self.var_width_of_left_inner_boarder.get()
+            )
+            self.model.set(
+                "width_of_bottom_inner_boarder",
+                int(self.var_width_of_left_inner_boarder.get()),
+            )
 
     def on_all_rows_height(self):
-        self.gameboard.height_of_cell = [
-            int(self.var_height_of_cell.get())
-        ] * self.gameboard.number_of_cells_vertically
-        self.show_gameboard()
+        self.model.set(
+            "height_of_cell",
+            [int(self.var_height_of_cell.get())]
+            * self.gameboard.number_of_cells_vertically,
+        )
 
     def on_all_rows_top(self):
-        self.gameboard.top_padding_of_cell = [
-            int(self.var_top_padding_of_cell.get())
-        ] * self.gameboard.number_of_cells_vertically
-        self.show_gameboard()
+        self.model.set(
+            "top_padding_of_cell",
+            [int(self.var_top_padding_of_cell.get())]
+            * self.gameboard.number_of_cells_vertically,
+        )
 
     def on_all_rows_bottom(self):
-        self.gameboard.bottom_padding_of_cell = [
-            int(self.var_bottom_padding_of_cell.get())
-        ] * self.gameboard.number_of_cells_vertically
-        self.show_gameboard()
+        self.model.set(
+            "bottom_padding_of_cell",
+            [int(self.var_bottom_padding_of_cell.get())]
+            * self.gameboard.number_of_cells_vertically,
+        )
 
     def on_all_rows_horizontal_gutter(self):
-        self.gameboard.size_of_horizontal_gutter_after_cell = [
-            int(self.var_size_of_horizontal_gutter_after_cell.get())
-        ] * self.gameboard.number_of_cells_vertically
-        self.show_gameboard()
+        self.model.set(
+            "size_of_horizontal_gutter_after_cell",
+            [int(self.var_size_of_horizontal_gutter_after_cell.get())]
+            * self.gameboard.number_of_cells_vertically,
+        )
 
     def on_all_columns_width(self):
-        self.gameboard.width_of_cell = [
-            int(self.var_width_of_cell.get())
-        ] * self.gameboard.number_of_cells_horizontally
-        self.show_gameboard()
+        self.model.set(
+            "width_of_cell",
+            [int(self.var_width_of_cell.get())]
+            * self.gameboard.number_of_cells_horizontally,
+        )
 
     def on_all_columns_left(self):
-        self.gameboard.left_padding_of_cell = [
-            int(self.var_left_padding_of_cell.get())
-        ] * self.gameboard.number_of_cells_horizontally
-        self.show_gameboard()
+        self.model.set(
+            "left_padding_of_cell",
+            [int(self.var_left_padding_of_cell.get())]
+            * self.gameboard.number_of_cells_horizontally,
+        )
 
     def on_all_columns_right(self):
-        self.gameboard.right_padding_of_cell = [
-            int(self.var_right_padding_of_cell.get())
-        ] * self.gameboard.number_of_cells_horizontally
-        self.show_gameboard()
+        self.model.set(
+            "right_padding_of_cell",
+            [int(self.var_right_padding_of_cell.get())]
+            * self.gameboard.number_of_cells_horizontally,
+        )
 
     def on_all_columns_vertical_gutter(self):
-        self.gameboard.size_of_vertical_gutter_after_cell = [
-            int(self.var_size_of_vertical_gutter_after_cell.get())
-        ] * self.gameboard.number_of_cells_horizontally
-        self.show_gameboard()
+        self.model.set(
+            "size_of_vertical_gutter_after_cell",
+            [int(self.var_size_of_vertical_gutter_after_cell.get())]
+            * self.gameboard.number_of_cells_horizontally,
+        )
 
     def on_all_cell_colour(self):
-        for _row in range(self.gameboard.number_of_cells_vertically):
-            for _column in range(self.gameboard.number_of_cells_horizontally):
-                self.gameboard.colour_of_cell[_row][
-                    _column
-                ] = self.var_colour_of_cell.get()
-        self.show_gameboard()
+        self.model.fill_mask(
+            "colour_of_cell",
+            board_mask(self.gameboard, solid),
+            self.var_colour_of_cell.get(),
+        )
 
     def on_all_cells_padding_colour(self):
-        for _row in range(self.gameboard.number_of_cells_vertically):
-            for _column in range(self.gameboard.number_of_cells_horizontally):
-                self.gameboard.colour_of_cell_padding[_row][
-                    _column
-                ] = self.var_colour_of_cell_padding.get()
-        self.show_gameboard()
+        self.model.fill_mask(
+            "colour_of_cell_padding",
+            board_mask(self.gameboard, solid),
+            self.var_colour_of_cell_padding.get(),
+        )
 
     def on_apply_checkerboard_colours(self):
 
-        for _row_index in range(self.gameboard.number_of_cells_vertically):
-            for _column_index in range(self.gameboard.number_of_cells_horizontally):
-                if _row_index % 2 == 0:
-                    if _column_index % 2 == 0:
-                        self.gameboard.colour_of_cell[_row_index][
-                            _column_index
-                        ] = self.var_cell_light_colour.get()
-                    else:
-                        self.gameboard.colour_of_cell[_row_index][
-                            _column_index
-                        ] = self.var_cell_dark_colour.get()
-                else:
-                    if _column_index % 2 != 0:
-                        self.gameboard.colour_of_cell[_row_index][
-                            _column_index
-                        ] = self.var_cell_light_colour.get()
-                    else:
-                        self.gameboard.colour_of_cell[_row_index][
-                            _column_index
-                        ] = self.var_cell_dark_colour.get()
-
-        self.show_gameboard()
+        with self.model.transaction():
+            self.model.fill_mask(
+                "colour_of_cell",
+                board_mask(self.gameboard, checkerboard, 0),
+                self.var_cell_light_colour.get(),
+            )
+            self.model.fill_mask(
+                "colour_of_cell",
+                board_mask(self.gameboard, checkerboard, 1),
+                self.var_cell_dark_colour.get(),
+            )
 
     def on_pick_outer_boarder_colour(self) -> None:
-        pick_color: AskColor = AskColor()
-        colour: str = pick_color.get()
+        colour: str = ask_colour()
         if colour is not None:
             self.var_colour_of_outer_boarder.set(colour)
-            self.gameboard.colour_of_outer_boarder = (
-                self.var_colour_of_outer_boarder.get()
+            self.model.set(
+                "colour_of_outer_boarder", self.var_colour_of_outer_boarder.get()
             )
-            self.show_gameboard()
 
     def on_pick_inner_boarder_colour(self) -> None:
-        pick_color: AskColor = AskColor()
-        colour: str = pick_color.get()
+        colour: str = ask_colour()
         if colour is not None:
             self.var_colour_of_inner_boarder.set(colour)
-            self.gameboard.colour_of_inner_boarder = (
-                self.var_colour_of_inner_boarder.get()
+            self.model.set(
+                "colour_of_inner_boarder", self.var_colour_of_inner_boarder.get()
             )
-            self.show_gameboard()
 
     def on_pick_gutter_colour(self) -> None:
-        pick_color: AskColor = AskColor()
-        colour: str = pick_color.get()
+        colour: str = ask_colour()
         if colour is not None:
             self.var_colour_of_cell_gutter.set(colour)
-            self.gameboard.colour_of_cell_gutter = self.var_colour_of_cell_gutter.get()
-            self.show_gameboard()
+            self.model.set(
+                "colour_of_cell_gutter", self.var_colour_of_cell_gutter.get()
+            )
 
     def on_pick_cell_colour(self) -> None:
-        pick_color: AskColor = AskColor()
-        colour: str = pick_color.get()
+        colour: str = ask_colour()
         if colour is not None:
             self.var_colour_of_cell.set(colour)
-            self.gameboard.colour_of_cell[
-                int(self.var_cells_on_rows_columns_row.get())
-            ][
-                int(self.var_cells_on_rows_columns_column.get())
-            ] = self.var_colour_of_cell.get()
-            self.show_gameboard()
+            self.shown_colours["colour_of_cell"] = colour
+            self.set_selected_cells(
+                "colour_of_cell",
+                int(self.var_cells_on_rows_columns_row.get()),
+                int(self.var_cells_on_rows_columns_column.get()),
+                self.var_colour_of_cell.get(),
+            )
 
     def on_pick_cell_padding_colour(self) -> None:
-        pick_color: AskColor = AskColor()
-        colour: str = pick_color.get()
+        colour: str = ask_colour()
         if colour is not None:
             self.var_colour_of_cell_padding.set(colour)
-            self.gameboard.colour_of_cell_padding[
-                int(self.var_cells_on_rows_columns_row.get())
-            ][
-                int(self.var_cells_on_rows_columns_column.get())
-            ] = self.var_colour_of_cell_padding.get()
-            self.show_gameboard()
+            self.shown_colours["colour_of_cell_padding"] = colour
+            self.set_selected_cells(
+                "colour_of_cell_padding",
+                int(self.var_cells_on_rows_columns_row.get()),
+                int(self.var_cells_on_rows_columns_column.get()),
+                self.var_colour_of_cell_padding.get(),
+            )
 
     def on_pick_cell_light_colour(self) -> None:
-        pick_color: AskColor = AskColor()
-        colour: str = pick_color.get()
+        colour: str = ask_colour()
         if colour is not None:
             self.var_cell_light_colour.set(colour)
 
     def on_pick_cell_dark_colour(self) -> None:
-        pick_color: AskColor = AskColor()
-        colour: str = pick_color.get()
+        colour: str = ask_colour()
         if colour is not None:
             self.var_cell_dark_colour.set(colour)
 
@@ -1832,31 +2066,34 @@ class GameboarddesignerApp:
             title="Select decorator", initialdir=".", filetypes=_filetypes
         )
         if _filename != "":
-            self.var_cell_decorator.set(self.relative_path(_filename))
-            self.gameboard.cell_decorator[
-                int(self.var_cells_on_rows_columns_row.get())
-            ][int(self.var_cells_on_rows_columns_column.get())] = self.relative_path(
-                _filename
+            _stored: str = self.store_asset(_filename)
+            self.var_cell_decorator.set(self.assets.name_of(_stored))
+            self.set_selected_cells(
+                "cell_decorator",
+                int(self.var_cells_on_rows_columns_row.get()),
+                int(self.var_cells_on_rows_columns_column.get()),
+                _stored,
             )
 
-        self.show_gameboard()
-
     def on_remove_cell_decorator(self) -> None:
-        self.gameboard.cell_decorator[int(self.var_cell_decorators_row.get())][
-            int(self.var_cell_decorators_column.get())
-        ] = ""
+        self.set_selected_cells(
+            "cell_decorator",
+            int(self.var_cell_decorators_row.get()),
+            int(self.var_cell_decorators_column.get()),
+            "",
+        )
         self.var_cell_decorator.set("")
         self.remove_cell_decorator.configure(state="disabled")
 
-        self.show_gameboard()
-
     def on_board_decorator_selected(self, choice: str) -> None:
         if choice == "Add decorator":
             self.on_add_board_decorator()
         else:
             _index = self.board_decorator_choice._values.index(choice) - 1
 
-            self.var_board_decorator.set(self.gameboard.board_decorator[_index][0])
+            self.var_board_decorator.set(
+                self.assets.name_of(self.gameboard.board_decorator[_index][0])
+            )
             self.var_board_decorator_x_pos.set(
                 self.gameboard.board_decorator[_index][1]
             )
@@ -1878,7 +2115,7 @@ class GameboarddesignerApp:
         self.var_board_decorator.set("")
         self.var_board_decorator_x_pos.set(0)
         self.var_board_decorator_y_pos.set(0)
-        self.gameboard.board_decorator.append(("", 0, 0))
+        self.model.append_item("board_decorator", ("", 0, 0))
 
         self.pick_board_decorator.configure(state="normal")
         self.board_decorator_x_pos.configure(state="normal")
@@ -1900,35 +2137,41 @@ class GameboarddesignerApp:
                 )
                 - 1
             )
-            self.var_board_decorator.set(self.relative_path(_filename))
-            self.gameboard.board_decorator[_index] = (
-                self.relative_path(_filename),
-                self.var_board_decorator_x_pos.get(),
-                self.var_board_decorator_y_pos.get(),
+            _stored: str = self.store_asset(_filename)
+            self.var_board_decorator.set(self.assets.name_of(_stored))
+            self.model.set_item(
+                "board_decorator",
+                _index,
+                (
+                    _stored,
+                    int(self.var_board_decorator_x_pos.get()),
+                    int(self.var_board_decorator_y_pos.get()),
+                ),
             )
 
-        self.show_gameboard()
+        self.load_decorators()
 
     def on_remove_board_decorator(self) -> None:
-        _index = (
-            self.board_decorator_choice._values.index(
-                self.var_board_decorator_choice.get()
+        with self.model.transaction():
+            _index = (
+                self.board_decorator_choice._values.index(
+                    self.var_board_decorator_choice.get()
+                )
+                - 1
             )
-            - 1
-        )
-        del self.board_decorator_choice._values[_index + 1]
-        del self.gameboard.board_decorator[_index]
-        self.var_board_decorator_choice.set("Add decorator")
-        self.var_board_decorator.set("")
-        self.var_board_decorator_x_pos.set(0)
-        self.var_board_decorator_y_pos.set(0)
+            del self.board_decorator_choice._values[_index + 1]
+            self.model.delete_item("board_decorator", _index)
+            self.var_board_decorator_choice.set("Add decorator")
+            self.var_board_decorator.set("")
+            self.var_board_decorator_x_pos.set(0)
+            self.var_board_decorator_y_pos.set(0)
 
-        self.pick_board_decorator.configure(state="disabled")
-        self.board_decorator_x_pos.configure(state="disabled")
-        self.board_decorator_y_pos.configure(state="disabled")
-        self.remove_board_decorator.configure(state="disabled")
+            self.pick_board_decorator.configure(state="disabled")
+            self.board_decorator_x_pos.configure(state="disabled")
+            self.board_decorator_y_pos.configure(state="disabled")
+            self.remove_board_decorator.configure(state="disabled")
 
-        self.show_gameboard()
+            self.load_decorators()
 
     def on_token_choice(self, choice: str) -> None:
 
@@ -1938,7 +2181,7 @@ class GameboarddesignerApp:
             _index = self.token_choice._values.index(choice) - 1
 
             self.var_token_name.set(self.gameboard.tokens[_index][0])
-            self.var_token.set(self.gameboard.tokens[_index][1])
+            self.var_token.set(self.assets.name_of(self.gameboard.tokens[_index][1]))
 
         self.token_name.configure(state="normal")
         self.pick_token.configure(state="normal")
@@ -1946,7 +2189,7 @@ class GameboarddesignerApp:
 
     def on_add_token(self) -> None:
 
-        self.gameboard.tokens.append(("Token", ""))
+        self.model.append_item("tokens", ("Token", ""))
         self.load_tokens()
 
         self.var_token_choice.set(f"Token")
@@ -1968,55 +2211,75 @@ class GameboarddesignerApp:
         )
         if _filename != "":
             _index = self.token_choice._values.index(self.var_token_choice.get()) - 1
-            self.var_token.set(self.relative_path(_filename))
-            self.gameboard.tokens[_index] = (
-                self.var_token_name.get(),
-                self.relative_path(_filename),
-            )
+            _stored: str = self.store_asset(_filename)
+            self.var_token.set(self.assets.name_of(_stored))
+            self.model.set_item("tokens", _index, (self.var_token_name.get(), _stored))
 
-        self.show_gameboard()
+        self.load_tokens()
 
     def on_remove_token(self) -> None:
 
-        _token = self.token_choice.get()
-        _index = self.token_choice._values.index(_token) - 1
-        del self.token_choice._values[_index + 1]
-        del self.gameboard.tokens[_index]
-        self.var_token_choice.set("Add token")
-        self.var_token_name.set("")
-        self.var_token.set("")
+        with self.model.transaction():
+            _token = self.token_choice.get()
+            _index = self.token_choice._values.index(_token) - 1
+            del self.token_choice._values[_index + 1]
+            self.model.delete_item("tokens", _index)
+            self.var_token_choice.set("Add token")
+            self.var_token_name.set("")
+            self.var_token.set("")
 
-        self.token_name.configure(state="disabled")
-        self.pick_token.configure(state="disabled")
-        self.remove_token.configure(state="disabled")
+            self.token_name.configure(state="disabled")
+            self.pick_token.configure(state="disabled")
+            self.remove_token.configure(state="disabled")
 
-        for _row, _ in enumerate(self.gameboard.placed_tokens):
-            for _column, _ in enumerate(self.gameboard.placed_tokens[_row]):
-                if self.gameboard.placed_tokens[_row][_column] == _token:
-                    self.gameboard.placed_tokens[_row][_column] = ""
+            self.model.fill_mask(
+                "placed_tokens", matching(self.model.grid("placed_tokens"), _token), ""
+            )
 
-        if self.placed_token_name_choice.get() == _token:
-            self.placed_token_name_choice.set("")
+            if self.placed_token_name_choice.get() == _token:
+                self.placed_token_name_choice.set("")
 
-        self.show_gameboard()
+            self.load_tokens()
 
     def on_placed_token_name_choice(self, choice: str) -> None:
-        self.gameboard.placed_tokens[int(self.placed_tokens_row.get())][
-            int(self.placed_tokens_column.get())
-        ] = choice
-        self.show_gameboard()
+        self.set_selected_cells(
+            "placed_tokens",
+            int(self.placed_tokens_row.get()),
+            int(self.placed_tokens_column.get()),
+            choice,
+        )
 
     def on_remove_placed_token(self) -> None:
-        self.gameboard.placed_tokens[int(self.var_placed_tokens_row.get())][
-            int(self.var_placed_tokens_column.get())
-        ] = ""
+        self.set_selected_cells(
+            "placed_tokens",
+            int(self.var_placed_tokens_row.get()),
+            int(self.var_placed_tokens_column.get()),
+            "",
+        )
         self.var_placed_token_name_choice.set("")
         self.remove_placed_token.configure(state="disabled")
 
-        self.show_gameboard()
-
     #  Handle cell selection.
 
+    #  The cell controls apply to every selected cell, as one bulk fill, or to
+    #  the cell shown in the palette when no other cells are selected.
+
+    def set_selected_cells(self, field: str, row: int, column: int, value: str):
+        _selection: Selection = self.renderer.selection
+        if _selection.blocks and _selection.blocks != [
+            (row, column, row + 1, column + 1)
+        ]:
+            self.model.fill_mask(
+                field,
+                _selection.mask(
+                    self.gameboard.number_of_cells_vertically,
+                    self.gameboard.number_of_cells_horizontally,
+                ),
+                value,
+            )
+        else:
+            self.model.set_cell(field, row, column, value)
+
     def cell_selected(self, cell: tuple[int, int]) -> None:
         _row: int = cell[0]
         _column: int = cell[1]
@@ -2045,19 +2308,24 @@ class GameboarddesignerApp:
         self.var_cells_on_rows_columns_row.set(_row)
         self.var_cells_on_rows_columns_column.set(_column)
 
-        self.var_colour_of_cell.set(self.gameboard.colour_of_cell[_row][_column])
+        self.shown_colours = {
+            "colour_of_cell": self.gameboard.colour_of_cell[_row][_column],
+            "colour_of_cell_padding": (
+                self.gameboard.colour_of_cell_padding[_row][_column]
+            ),
+        }
+        self.var_colour_of_cell.set(self.shown_colours["colour_of_cell"])
         self.var_colour_of_cell_padding.set(
-            self.gameboard.colour_of_cell_padding[_row][_column]
+            self.shown_colours["colour_of_cell_padding"]
         )
 
         self.var_cell_decorators_row.set(_row)
         self.var_cell_decorators_column.set(_column)
-        self.var_cell_decorator.set(self.gameboard.cell_decorator[_row][_column])
+        self.var_cell_decorator.set(
+            self.assets.name_of(self.gameboard.cell_decorator[_row][_column])
+        )
 
-        if self.gameboard.cell_decorator[_row][_column] == "":
-            self.remove_cell_decorator.configure(state="disabled")
-        else:
-            self.remove_cell_decorator.configure(state="normal")
+        self.update_remove_cell_decorator()
 
         self.var_placed_tokens_row.set(_row)
         self.var_placed_tokens_column.set(_column)
@@ -2065,35 +2333,30 @@ class GameboarddesignerApp:
             self.gameboard.placed_tokens[_row][_column]
         )
 
-        if self.placed_token_name_choice.get() == "":
-            self.remove_placed_token.configure(state="disabled")
-        else:
-            self.remove_placed_token.configure(state="normal")
+        self.update_remove_placed_token()
 
-    #  Handle image retreival, resizing and caching.
+    #  Handle image retreival. Images are decoded and resized in the background
+    #  and cached by the image loader.
 
     def get_image(
         self, filename: str, width: Optional[int], height: Optional[int]
-    ) -> Optional[ImageTk.PhotoImage]:
-        if filename in self.images:
-            return self.images[filename]
-        else:
-            try:
-                _image = Image.open(filename)  # type:ignore
+    ) -> Optional["ImageTk.PhotoImage"]:
+        return self.image_loader.request(filename, width, height)
 
-                if width is not None and height is not None:
-                    _resized_image = _ctkImage.resize()  # type:ignore
-                else:
-                    _resized_image = CTkImage(
-                        _image,
-                        _image,
-                    )
-                    _resized_image = _image
-                _decorator = ImageTk.PhotoImage(_resized_image)
-                self.images[filename] = _decorator
-                return _decorator
-            except Exception:
-                return None
+    def on_image_ready(self, filename: str) -> None:
+        self.renderer.refresh_image(filename)
+
+    def on_tiles_ready(self, keys: list) -> None:
+        self.renderer.refresh_tiles(keys)
+
+    #  Picked images are copied into the asset store. One that cannot be is used
+    #  from where it is.
+
+    def store_asset(self, filename: str) -> str:
+        try:
+            return self.assets.add(filename)
+        except OSError:
+            return self.relative_path(filename)
 
     #  Convert absolute to relative path.
 
@@ -2117,8 +2380,24 @@ class GameboarddesignerApp:
         return ".\\" + str(_relative_path)
 
 
+#  "gameboarddesigner.py render FILE..." renders boards to PNG without the GUI.
+#  "gameboarddesigner.py --profile-startup" prints how long each phase of startup
+#  took once the main loop is running. "gameboarddesigner.py --diagnostics" records
+#  handler latencies from startup, see Help - Diagnostics.
+
+
 def main() -> None:
-    app = GameboarddesignerApp()
+    if sys.argv[1:2] == ["render"]:
+        import rasterize
+
+        sys.exit(rasterize.main(sys.argv[2:]))
+
+    _startup = StartupProfile(STARTED, report="--profile-startup" in sys.argv[1:])
+    _startup.mark("imports")
+
+    app = GameboarddesignerApp(
+        startup=_startup, diagnostics="--diagnostics" in sys.argv[1:]
+    )
     app.run()
 
 
@@ -0,0 +1,566 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+import tabformat
+from boardmodel import CELL_FIELDS, COLUMN_FIELDS, GRID_TYPES, ROW_FIELDS
+from bulkfill import (
+    SYMMETRIES,
+    Mask,
+    cell,
+    centre,
+    checkerboard,
+    column_stripes,
+    corners,
+    diamond,
+    rings,
+    row_stripes,
+    solid,
+    symmetric,
+    track,
+)
+from cellgrid import Grid
+from layout import BoardLayout
+
+#  Procedural board generation.
+
+#  A design is a board's size and settings and a stack of layers. Each layer
+#  fills the cells of a bulkfill mask in one of the cell fields, colours, cell
+#  decorators or placed tokens, and later layers paint over earlier ones, so
+#  patterns compose: a checkerboard, then rings over it, then special squares,
+#  then starting positions. Filling a layer is a few slice assignments on the
+#  grid buffer, so a board is built without a loop over its cells.
+
+#  A layer names its mask by a builder and its arguments rather than holding
+#  the mask, so designs are plain values, and masks are built once for each
+#  board size and shared by every board that uses them.
+
+#  Presets build the classic layouts from parameters, and variants draws random
+#  designs from a seed, the same seed always giving the same boards. Boards are
+#  built headless into a LegacyGameboard, or into a Gameboard in the designer.
+
+#  "generator.py make PRESET FILE [SIZE]" writes a preset board,
+#  "generator.py variants DIRECTORY COUNT [SIZE] [SEED]" writes random boards and
+#  "generator.py bench [COUNT] [SIZE]" reports how many boards are built a
+#  second.
+
+CELL_SIZE = 100
+
+#  Values of the fields a design does not set, those of the saved boards.
+
+DEFAULTS: dict[str, Any] = {
+    "version": "1.0.0",
+    "author": "",
+    "colour_of_outer_boarder": "#19dbff",
+    "colour_of_inner_boarder": "#0c88a3",
+    "colour_of_cell_gutter": "#BBBBBB",
+    "width_of_left_outer_boarder": 10,
+    "width_of_top_outer_boarder": 10,
+    "width_of_right_outer_boarder": 10,
+    "width_of_bottom_outer_boarder": 10,
+    "width_of_left_inner_boarder": 10,
+    "width_of_top_inner_boarder": 10,
+    "width_of_right_inner_boarder": 10,
+    "width_of_bottom_inner_boarder": 10,
+}
+
+#  Values of the cells no layer covers.
+
+BLANK: dict[str, str] = {
+    "colour_of_cell": "#ffffff",
+    "colour_of_cell_padding": "#000000",
+    "cell_decorator": "",
+    "placed_tokens": "",
+}
+
+#  Light, dark and accent cell colours, then the outer and inner boarder
+#  colours.
+
+PALETTES: tuple[tuple[str, str, str, str, str], ...] = (
+    ("#0394a6", "#076c72", "#6ad6ff", "#076c72", "#0394a6"),
+    ("#bb844e", "#814f39", "#e8c48c", "#814f39", "#bb844e"),
+    ("#6ad6ff", "#2686b9", "#ffd700", "#19dbff", "#0c88a3"),
+    ("#00a010", "#006e0b", "#c8e6c9", "#006e0b", "#004608"),
+    ("#f0d9b5", "#b58863", "#cd5c5c", "#8b5a2b", "#5c3a1e"),
+    ("#eeeed2", "#769656", "#baca44", "#4b5e3a", "#2f3b25"),
+)
+
+FLOWER = ".\\saved\\decorators\\ur_flower.png"
+SPOT = ".\\saved\\decorators\\reversi_spot.png"
+
+#  Pairs of tokens, the side that starts at the top first.
+
+TOKENS: tuple[tuple[tuple[str, str], tuple[str, str]], ...] = (
+    (
+        ("Light", ".\\saved\\tokens\\checker_light.png"),
+        ("Dark", ".\\saved\\tokens\\checker_dark.png"),
+    ),
+    (
+        ("White", ".\\saved\\tokens\\reversi_white.png"),
+        ("Black", ".\\saved\\tokens\\reversi_black.png"),
+    ),
+    (
+        ("Light", ".\\saved\\tokens\\ur_light.png"),
+        ("Dark", ".\\saved\\tokens\\ur_dark.png"),
+    ),
+)
+
+
+#  The arguments of a layer's builder are those after the board size, and must
+#  be hashable: cells are given as tuples of (row, column) tuples.
+
+
+class Layer(NamedTuple):
+    field: str
+    value: str
+    builder: Callable[..., Mask]
+    args: tuple = ()
+
+
+def layer(field: str, value: str, builder: Callable[..., Mask], *args) -> Layer:
+    if field not in CELL_FIELDS:
+        raise ValueError(f"{field} is not a cell field")
+    return Layer(field, value, builder, args)
+
+
+class Design(NamedTuple):
+    name: str
+    rows: int
+    columns: int
+    layers: tuple[Layer, ...]
+    tokens: tuple[tuple[str, str], ...] = ()
+    board_decorator: tuple[tuple[str, int, int], ...] = ()
+    cell_size: int = CELL_SIZE
+
+    #  Any other board fields, as (field, value), such as the boarder colours.
+
+    settings: tuple[tuple[str, Any], ...] = ()
+
+
+@lru_cache(maxsize=4096)
+def layer_mask(builder: Callable[..., Mask], args: tuple, rows: int, columns: int):
+    return builder(rows, columns, *args)
+
+
+#  Build a design into gameboard, by default a LegacyGameboard. The cell fields
+#  are set to grids, as TabFile.read sets them.
+
+
+def build(design: Design, gameboard: Any = None) -> Any:
+    if gameboard is None:
+        gameboard = tabformat.LegacyGameboard()
+    _rows: int = design.rows
+    _columns: int = design.columns
+
+    for _field, _value in DEFAULTS.items():
+        setattr(gameboard, _field, _value)
+    gameboard.name = design.name
+    gameboard.date = time.strftime("%Y")
+    for _field, _value in design.settings:
+        setattr(gameboard, _field, _value)
+
+    gameboard.number_of_cells_vertically = _rows
+    gameboard.number_of_cells_horizontally = _columns
+    for _fields, _count in ((ROW_FIELDS, _rows), (COLUMN_FIELDS, _columns)):
+        _size, _leading, _trailing, _gutter = _fields
+        setattr(gameboard, _size, [design.cell_size] * _count)
+        setattr(gameboard, _leading, [1] + [0] * (_count - 1))
+        setattr(gameboard, _trailing, [1] * _count)
+        setattr(gameboard, _gutter, [0] * _count)
+
+    _grids: dict[str, Grid] = {}
+    for _field in CELL_FIELDS:
+        _grid: Grid = GRID_TYPES[_field](_rows, _columns)
+        _grid.fill(BLANK[_field])
+        _grids[_field] = _grid
+    for _layer in design.layers:
+        _grids[_layer.field].fill_mask(
+            layer_mask(_layer.builder, _layer.args, _rows, _columns), _layer.value
+        )
+    for _field, _grid in _grids.items():
+        setattr(gameboard, _field, _grid)
+
+    gameboard.tokens = list(design.tokens)
+    gameboard.board_decorator = list(design.board_decorator)
+    return gameboard
+
+
+def boarders(outer: str, inner: str, width: int = 10) -> tuple[tuple[str, Any], ...]:
+    return (
+        ("colour_of_outer_boarder", outer),
+        ("colour_of_inner_boarder", inner),
+        ("width_of_left_inner_boarder", width),
+        ("width_of_top_inner_boarder", width),
+        ("width_of_right_inner_boarder", width),
+        ("width_of_bottom_inner_boarder", width),
+    )
+
+
+#  Board decorators centred on the points where the lines between cells cross,
+#  given as the (row, column) of the cell below and to the right of each.
+
+
+def crossings(
+    design: Design, filename: str, points
+) -> tuple[tuple[str, int, int], ...]:
+    _layout = BoardLayout(build(design._replace(layers=())))
+    return tuple(
+        (filename, _layout.column_offsets[_column] - 1, _layout.row_offsets[_row] - 1)
+        for _row, _column in points
+    )
+
+
+#  Presets.
+
+
+def checkers(
+    size: int = 8,
+    rows_of_tokens: int = 3,
+    light: str = "#0394a6",
+    dark: str = "#076c72",
+) -> Design:
+    _top, _bottom = TOKENS[0]
+    _rows: int = min(rows_of_tokens, (size - 1) // 2)
+    return Design(
+        "Checkers",
+        size,
+        size,
+        (
+            layer("colour_of_cell", light, solid),
+            layer("colour_of_cell", dark, checkerboard, 1),
+            layer("placed_tokens", _top[0], checkerboard, 1, 0, _rows),
+            layer("placed_tokens", _bottom[0], checkerboard, 1, size - _rows, size),
+        ),
+        (_top, _bottom),
+        settings=boarders(dark, light),
+    )
+
+
+#  The board needs an even size, an odd one is rounded up.
+
+
+def reversi(size: int = 8, colour: str = "#006e0b") -> Design:
+    size += size % 2
+    _white, _black = TOKENS[1]
+    _middle: int = size // 2 - 1
+    _first: tuple[tuple[int, int], ...] = ((_middle, _middle),)
+    _second: tuple[tuple[int, int], ...] = ((_middle, _middle + 1),)
+    _design = Design(
+        "Reversi",
+        size,
+        size,
+        (
+            layer("colour_of_cell", colour, solid),
+            layer("placed_tokens", _white[0], symmetric, _first, "rotate"),
+            layer("placed_tokens", _black[0], symmetric, _second, "rotate"),
+        ),
+        (_black, _white),
+        settings=boarders(colour, "#004608", 20),
+    )
+
+    #  Spots where the lines two cells in from each corner cross.
+
+    _near: int = min(2, size // 2)
+    _far: int = size - _near
+    return _design._replace(
+        board_decorator=crossings(
+            _design,
+            SPOT,
+            ((_near, _near), (_near, _far), (_far, _near), (_far, _far)),
+        )
+    )
+
+
+#  Corners, the throne and the starting squares of both sides are dark. The
+#  attackers start on a row of arm * 2 + 1 squares in the middle of each edge
+#  and the square inside it, the defenders on the diamond around the throne.
+#  The board needs an odd size, an even one is rounded up.
+
+
+def hnefatafl(
+    size: int = 11,
+    arm: int = 2,
+    light: str = "#bb844e",
+    dark: str = "#814f39",
+) -> Design:
+    size |= 1
+    _attacker, _defender = TOKENS[0][1], TOKENS[0][0]
+    _middle: int = size // 2
+    _attackers: tuple[tuple[int, int], ...] = tuple(
+        (0, _column) for _column in range(_middle - arm, _middle + arm + 1)
+    ) + ((1, _middle),)
+    return Design(
+        "Hnefatafl",
+        size,
+        size,
+        (
+            layer("colour_of_cell", light, solid),
+            layer("colour_of_cell", dark, corners),
+            layer("colour_of_cell", dark, symmetric, _attackers, "dihedral"),
+            layer("colour_of_cell", dark, diamond, arm),
+            layer("placed_tokens", _attacker[0], symmetric, _attackers, "dihedral"),
+            layer("placed_tokens", _defender[0], diamond, arm),
+        ),
+        (_defender, _attacker),
+        cell_size=80,
+        settings=boarders(dark, light, 30),
+    )
+
+
+#  Two rows of squares where each side enters the board, joined by the shared
+#  middle row, with gap squares between the entry and the exit and rosettes at
+#  the ends and the middle.
+
+
+def ur(
+    columns: int = 8,
+    gap: int = 2,
+    track_colour: str = "#2686b9",
+    gap_colour: str = "#6ad6ff",
+) -> Design:
+    _light, _dark = TOKENS[2]
+    _entry: int = max(columns - gap - 2, 1)
+    _last: int = columns - 1
+    _rosettes: tuple[tuple[int, int], ...] = ((0, 0), (0, _last - 1))
+    _tracks: list[Layer] = [
+        layer(
+            "colour_of_cell",
+            track_colour,
+            track,
+            (
+                (_row, _entry - 1),
+                (_row, 0),
+                (1, 0),
+                (1, _last),
+                (_row, _last),
+                (_row, _last - 1),
+            ),
+        )
+        for _row in (0, 2)
+    ]
+    return Design(
+        "Ur",
+        3,
+        columns,
+        (
+            layer("colour_of_cell", gap_colour, solid),
+            *_tracks,
+            layer("cell_decorator", FLOWER, symmetric, _rosettes, "flip"),
+            layer("cell_decorator", FLOWER, cell, 1, _entry - 1),
+        ),
+        (_dark, _light),
+    )
+
+
+#  Concentric rings of alternating colours around a centre square.
+
+
+def target(
+    size: int = 9,
+    light: str = "#6ad6ff",
+    dark: str = "#2686b9",
+    accent: str = "#ffd700",
+) -> Design:
+    return Design(
+        "Target",
+        size,
+        size,
+        (
+            layer("colour_of_cell", light, solid),
+            layer("colour_of_cell", dark, rings),
+            layer("colour_of_cell", accent, centre, 2 - size % 2),
+            layer("cell_decorator", FLOWER, corners),
+        ),
+    )
+
+
+#  Presets by name, each taking the board size, or the length for Ur, first.
+
+PRESETS: dict[str, Callable[..., Design]] = {
+    "checkers": checkers,
+    "reversi": reversi,
+    "hnefatafl": hnefatafl,
+    "ur": ur,
+    "target": target,
+}
+
+
+#  Random designs.
+
+
+#  Up to count cells in the top left quarter of the board, to be repeated by a
+#  symmetry.
+
+
+def _quarter(generator: random.Random, rows: int, columns: int, count: int):
+    return tuple(
+        sorted(
+            {
+                (
+                    generator.randrange((rows + 1) // 2),
+                    generator.randrange((columns + 1) // 2),
+                )
+                for _ in range(count)
+            }
+        )
+    )
+
+
+def variant(generator: random.Random, rows: int, columns: int) -> Design:
+    _light, _dark, _accent, _outer, _inner = generator.choice(PALETTES)
+    _symmetries: list[str] = [
+        _symmetry
+        for _symmetry in SYMMETRIES
+        if _symmetry != "dihedral" or rows == columns
+    ]
+
+    _layers: list[Layer] = [layer("colour_of_cell", _light, solid)]
+    _pattern: int = generator.randrange(5)
+    if _pattern == 0:
+        _layers.append(layer("colour_of_cell", _dark, checkerboard, 1))
+    elif _pattern == 1:
+        _layers.append(
+            layer("colour_of_cell", _dark, rings, 1, generator.randint(1, 2))
+        )
+    elif _pattern == 2:
+        _layers.append(
+            layer("colour_of_cell", _dark, row_stripes, generator.randint(2, 3))
+        )
+    elif _pattern == 3:
+        _layers.append(
+            layer("colour_of_cell", _dark, column_stripes, generator.randint(2, 3))
+        )
+    if generator.random() < 0.5:
+        _layers.append(layer("colour_of_cell_padding", _dark, solid))
+
+    _special = (
+        _quarter(generator, rows, columns, generator.randint(1, 3)),
+        generator.choice(_symmetries),
+    )
+    _layers.append(layer("colour_of_cell", _accent, symmetric, *_special))
+    if generator.random() < 0.5:
+        _layers.append(layer("cell_decorator", FLOWER, symmetric, *_special))
+    if generator.random() < 0.3:
+        _layers.append(layer("colour_of_cell", _accent, corners))
+
+    _top, _bottom = generator.choice(TOKENS)
+    _start: int = generator.randrange(3)
+    _rows: int = min(generator.randint(1, 3), (rows - 1) // 2)
+    if _start == 0:
+        _layers.append(layer("placed_tokens", _top[0], checkerboard, 1, 0, _rows))
+        _layers.append(
+            layer("placed_tokens", _bottom[0], checkerboard, 1, rows - _rows, rows)
+        )
+    elif _start == 1:
+        _layers.append(layer("placed_tokens", _top[0], row_stripes, rows, 0, _rows))
+        _layers.append(
+            layer("placed_tokens", _bottom[0], row_stripes, rows, rows - _rows, _rows)
+        )
+    else:
+        _middle_row: int = rows // 2 - 1
+        _middle_column: int = columns // 2 - 1
+        _layers.append(
+            layer(
+                "placed_tokens",
+                _top[0],
+                symmetric,
+                ((_middle_row, _middle_column),),
+                "rotate",
+            )
+        )
+        _layers.append(
+            layer(
+                "placed_tokens",
+                _bottom[0],
+                symmetric,
+                ((_middle_row, _middle_column + 1),),
+                "rotate",
+            )
+        )
+
+    return Design(
+        f"Variant {rows}x{columns}",
+        rows,
+        columns,
+        tuple(_layers),
+        (_top, _bottom),
+        settings=boarders(_outer, _inner),
+    )
+
+
+def variants(
+    count: int, rows: int = 8, columns: int = 8, seed: Optional[int] = None
+) -> Iterator[Design]:
+    _generator = random.Random(seed)
+    for _ in range(count):
+        yield variant(_generator, rows, columns)
+
+
+#  Build count random boards, and count boards of each preset, returning the
+#  boards built a second of each.
+
+
+def bench(count: int, size: int = 8) -> dict[str, float]:
+    _rates: dict[str, float] = {}
+
+    _start: float = time.perf_counter()
+    for _design in variants(count, size, size, 0):
+        build(_design)
+    _rates["variants"] = count / (time.perf_counter() - _start)
+
+    for _name, _preset in PRESETS.items():
+        _start = time.perf_counter()
+        for _ in range(count):
+            build(_preset(size))
+        _rates[_name] = count / (time.perf_counter() - _start)
+    return _rates
+
+
+def main() -> None:
+    _usage: str = (
+        "usage: generator.py make " + "|".join(PRESETS) + " FILE [SIZE]\n"
+        "       generator.py variants DIRECTORY COUNT [SIZE] [SEED]\n"
+        "       generator.py bench [COUNT] [SIZE]"
+    )
+    _args: list[str] = sys.argv[1:]
+
+    if len(_args) in (3, 4) and _args[0] == "make" and _args[1] in PRESETS:
+        _preset: Callable[..., Design] = PRESETS[_args[1]]
+        _design: Design = _preset(*map(int, _args[3:]))
+        _error: str = tabformat.save(build(_design), _args[2])
+        if _error != "":
+            print(_error, file=sys.stderr)
+            sys.exit(1)
+    elif len(_args) in (3, 4, 5) and _args[0] == "variants":
+        _size: int = int(_args[3]) if len(_args) > 3 else 8
+        _seed: Optional[int] = int(_args[4]) if len(_args) > 4 else None
+        os.makedirs(_args[1], exist_ok=True)
+        for _number, _design in enumerate(
+            variants(int(_args[2]), _size, _size, _seed)
+        ):
+            _filename: str = os.path.join(
+                _args[1], f"variant_{_number:05}" + tabformat.EXTENSION
+            )
+            _error = tabformat.save(build(_design), _filename)
+            if _error != "":
+                print(_error, file=sys.stderr)
+                sys.exit(1)
+    elif 1 <= len(_args) <= 3 and _args[0] == "bench":
+        _count: int = int(_args[1]) if len(_args) > 1 else 1000
+        _size = int(_args[2]) if len(_args) > 2 else 8
+        for _name, _rate in bench(_count, _size).items():
+            print(f"{_name:<10} {_rate:>10.0f} boards a second")
+    else:
+        print(_usage)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
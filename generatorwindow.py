@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import random
+from typing import Callable, Optional
+
+from customtkinter import (
+    CTkButton,
+    CTkEntry,
+    CTkFrame,
+    CTkImage,
+    CTkLabel,
+    CTkOptionMenu,
+    CTkToplevel,
+    StringVar,
+)
+
+import generator
+from generator import Design
+from validation import validated_int
+
+#  Board generator window.
+
+#  Shows a preview of a preset or a random variant at the size chosen, drawn
+#  headless by rasterize and scaled down. Create hands the design to the
+#  designer, which builds it as a new board.
+
+RANDOM = "random"
+
+PREVIEW_SIZE = 360
+
+MIN_SIZE = 3
+MAX_SIZE = 50
+
+
+class GeneratorWindow(CTkToplevel):
+    def __init__(self, master, create: Callable[[Design], None]) -> None:
+        super().__init__(master)
+        self.title("Gameboard Designer - Generate")
+        self.resizable(False, False)
+
+        self.callback: Callable[[Design], None] = create
+        self.board_size: int = 8
+        self.seed: int = random.randrange(1 << 32)
+        self.design: Optional[Design] = None
+
+        _options: CTkFrame = CTkFrame(self, fg_color="transparent")
+        _options.pack(padx=10, pady=(10, 5), fill="x")
+        self.var_preset: StringVar = StringVar(value=RANDOM)
+        CTkOptionMenu(
+            _options,
+            values=[RANDOM, *generator.PRESETS],
+            variable=self.var_preset,
+            command=self.on_preset,
+        ).pack(side="left")
+        self.var_size: StringVar = StringVar(value=str(self.board_size))
+        self.size_entry: CTkEntry = CTkEntry(
+            _options, width=50, textvariable=self.var_size
+        )
+        self.size_entry.pack(side="left", padx=(10, 0))
+        self.size_entry.bind("<Return>", self.on_size)
+        self.size_entry.bind("<FocusOut>", self.on_size)
+        self.shuffle: CTkButton = CTkButton(
+            _options, text="Shuffle", width=80, command=self.on_shuffle
+        )
+        self.shuffle.pack(side="right")
+
+        self.preview: CTkLabel = CTkLabel(
+            self, text="", width=PREVIEW_SIZE, height=PREVIEW_SIZE
+        )
+        self.preview.pack(padx=10, pady=5)
+
+        _buttons: CTkFrame = CTkFrame(self, fg_color="transparent")
+        _buttons.pack(padx=10, pady=(5, 10), fill="x")
+        CTkButton(_buttons, text="Create", width=80, command=self.on_create).pack(
+            side="right"
+        )
+        CTkButton(_buttons, text="Cancel", width=80, command=self.destroy).pack(
+            side="right", padx=(0, 10)
+        )
+
+        self.refresh()
+
+    #  Build the chosen design and draw its preview.
+
+    def refresh(self) -> None:
+        from PIL import Image
+
+        import rasterize
+
+        _preset: str = self.var_preset.get()
+        if _preset == RANDOM:
+            self.design = generator.variant(
+                random.Random(self.seed), self.board_size, self.board_size
+            )
+            self.shuffle.configure(state="normal")
+        else:
+            self.design = generator.PRESETS[_preset](self.board_size)
+            self.shuffle.configure(state="disabled")
+
+        _image, _ = rasterize.render(generator.build(self.design))
+        _image.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE), Image.LANCZOS)
+        self.preview.configure(
+            image=CTkImage(light_image=_image, dark_image=_image, size=_image.size)
+        )
+
+    def on_preset(self, *args) -> None:
+        self.refresh()
+
+    def on_size(self, *args) -> None:
+        _size: int = validated_int(
+            self.var_size, self.size_entry, self.board_size, MIN_SIZE, MAX_SIZE
+        )
+        if _size != self.board_size:
+            self.board_size = _size
+            self.refresh()
+
+    def on_shuffle(self) -> None:
+        self.seed = random.randrange(1 << 32)
+        self.refresh()
+
+    def on_create(self) -> None:
+        _design: Optional[Design] = self.design
+        self.destroy()
+        if _design is not None:
+            self.callback(_design)
@@ -0,0 +1,248 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from boardmodel import BoardModel, Change, Resize
+from cellgrid import GridPatch
+from layout import DIMENSION_FIELDS
+
+#  Undo and redo.
+
+#  The history keeps the changes reported by the model, which already hold the
+#  old and the new value of whatever was edited, and undoes an edit by applying
+#  its changes backwards. A recoloured cell is one change, a bulk fill holds only
+#  the cells it overwrote, and only a board that shrinks keeps a copy of what it
+#  lost. Undoing or redoing an edit costs the size of the edit, never the size of
+#  the board.
+
+#  Changes are grouped into steps, one per burst of changes, the same way as the
+#  redraws, and one per model transaction. Successive edits of the same value, as
+#  when a number is typed, are merged into one step. The oldest steps are dropped
+#  once the history takes more than budget bytes.
+
+DEFAULT_BUDGET = 8 * 1024 * 1024
+
+MERGE_INTERVAL = 1.0
+
+
+def change_size(change: Change) -> int:
+    _size: int = sys.getsizeof(change)
+    for _value in (change.old, change.new):
+        if isinstance(_value, (GridPatch, Resize)):
+            _size += _value.nbytes
+        else:
+            _size += sys.getsizeof(_value)
+    return _size
+
+
+#  Whether a change only replaces one value, so that it can be merged with the
+#  next change of that value.
+
+
+def replaces_value(change: Change) -> bool:
+    return (
+        change.field not in DIMENSION_FIELDS
+        and change.old is not None
+        and change.new is not None
+        and not isinstance(change.old, GridPatch)
+    )
+
+
+class Step:
+    def __init__(self) -> None:
+        self.changes: list[Change] = []
+        self.size: int = 0
+        self.time: float = time.monotonic()
+
+    def add(self, change: Change) -> None:
+        self.changes.append(change)
+        self.size += change_size(change)
+
+
+class History:
+    def __init__(
+        self,
+        widget,
+        model: BoardModel,
+        budget: int = DEFAULT_BUDGET,
+        on_replayed: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.widget = widget
+        self.model: BoardModel = model
+        self.budget: int = budget
+        self.on_replayed: Optional[Callable[[], None]] = on_replayed
+
+        self.done: deque[Step] = deque()
+        self.undone: list[Step] = []
+        self.size: int = 0
+
+        self.current: Optional[Step] = None
+        self.scheduled: Optional[str] = None
+        self.replaying: bool = False
+
+        model.subscribe(self.on_change, self.on_transaction)
+
+    def on_change(self, change: Change) -> None:
+        if self.replaying:
+            return
+        if self.current is None:
+            self.current = Step()
+            self.scheduled = self.widget.after_idle(self.close)
+        self.current.add(change)
+
+    #  A transaction is a step of its own and is never merged.
+
+    def on_transaction(self, changes: list[Change]) -> None:
+        if self.replaying:
+            return
+        self.close()
+        _step = Step()
+        for _change in changes:
+            _step.add(_change)
+        self.push(_step)
+
+    #  Close the current step.
+
+    def close(self) -> None:
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        _step, self.current = self.current, None
+        if _step is not None:
+            self.push(_step, merge=True)
+
+    #  Add a step. A new edit can no longer be redone over.
+
+    def push(self, step: Step, merge: bool = False) -> None:
+        self.size -= sum(_undone.size for _undone in self.undone)
+        self.undone = []
+
+        if not (merge and self.merge(step)):
+            self.done.append(step)
+            self.size += step.size
+
+        while self.size > self.budget and len(self.done) > 1:
+            self.size -= self.done.popleft().size
+
+    def merge(self, step: Step) -> bool:
+        if not self.done or len(step.changes) != 1:
+            return False
+        _last: Step = self.done[-1]
+        if len(_last.changes) != 1 or step.time - _last.time > MERGE_INTERVAL:
+            return False
+
+        _previous: Change = _last.changes[0]
+        _change: Change = step.changes[0]
+        if (_previous.field, _previous.key) != (_change.field, _change.key):
+            return False
+        if not (replaces_value(_previous) and replaces_value(_change)):
+            return False
+
+        _last.changes[0] = _change._replace(old=_previous.old)
+        _last.time = step.time
+        return True
+
+    def clear(self) -> None:
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        self.current = None
+        self.done.clear()
+        self.undone = []
+        self.size = 0
+
+    def undo(self) -> bool:
+        self.close()
+        if not self.done:
+            return False
+        _step: Step = self.done.pop()
+        with self.replay():
+            for _change in reversed(_step.changes):
+                self.revert(_change)
+        self.undone.append(_step)
+        return True
+
+    def redo(self) -> bool:
+        self.close()
+        if not self.undone:
+            return False
+        _step: Step = self.undone.pop()
+        with self.replay():
+            for _change in _step.changes:
+                self.reapply(_change)
+        self.done.append(_step)
+        return True
+
+    #  Changes made while replaying, including any made by on_replayed as the
+    #  widgets catch up with the board, are not recorded. The step is replayed in
+    #  a transaction so that it is drawn in one pass and journalled as one record.
+
+    @contextmanager
+    def replay(self) -> Iterator[None]:
+        self.replaying = True
+        try:
+            with self.model.transaction():
+                yield
+            if self.on_replayed is not None:
+                self.on_replayed()
+        finally:
+            self.replaying = False
+
+    def resize(self, field: str, size: int) -> None:
+        if field == "number_of_cells_horizontally":
+            self.model.resize_columns(size)
+        else:
+            self.model.resize_rows(size)
+
+    def revert(self, change: Change) -> None:
+        _model: BoardModel = self.model
+        _field: str = change.field
+        if _field in DIMENSION_FIELDS:
+            if change.old.lists:
+                _model.restore(_field, change.old)
+            else:
+                self.resize(_field, change.old.size)
+        elif isinstance(change.old, GridPatch):
+            _model.apply_patch(_field, change.old)
+        elif change.key is None:
+            _model.set(_field, change.old)
+        elif isinstance(change.key, tuple):
+            _model.set_cell(_field, *change.key, change.old)
+        elif change.old is None:
+            _model.delete_item(_field, change.key)
+        elif change.new is None:
+            _model.insert_item(_field, change.key, change.old)
+        else:
+            _model.set_item(_field, change.key, change.old)
+
+    def reapply(self, change: Change) -> None:
+        _model: BoardModel = self.model
+        _field: str = change.field
+        if _field in DIMENSION_FIELDS:
+            self.resize(_field, change.new)
+        elif isinstance(change.new, GridPatch):
+            _model.apply_patch(_field, change.new)
+        elif change.key is None:
+            _model.set(_field, change.new)
+        elif isinstance(change.key, tuple):
+            _model.set_cell(_field, *change.key, change.new)
+        elif change.old is None:
+            _model.insert_item(_field, change.key, change.new)
+        elif change.new is None:
+            _model.delete_item(_field, change.key)
+        else:
+            _model.set_item(_field, change.key, change.new)
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "steps": len(self.done),
+            "redo_steps": len(self.undone),
+            "size": self.size,
+            "budget": self.budget,
+        }
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+from assetstore import is_stored, local_path
+
+#  Size-aware bounded image cache.
+
+#  Entries are keyed by (path, width, height, mtime) so the same file shown at
+#  two sizes gets two bitmaps and an edited file is reloaded. Files in the asset
+#  store never change and are not checked. The cache holds at
+#  most budget bytes of decoded image data and evicts the least recently used
+#  entries first.
+
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+BYTES_PER_PIXEL = 4
+
+ImageKey = tuple[str, Optional[int], Optional[int], float]
+
+#  Returned in place of an image that is still being decoded.
+
+PENDING = object()
+
+
+class ImageCache:
+    def __init__(self, budget: int = DEFAULT_BUDGET) -> None:
+        self.budget: int = budget
+        self.size: int = 0
+        self.entries: OrderedDict[ImageKey, tuple[Any, int]] = OrderedDict()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def key(
+        self, filename: str, width: Optional[int], height: Optional[int]
+    ) -> Optional[ImageKey]:
+        if is_stored(filename):
+            return filename, width, height, 0.0
+        try:
+            _mtime: float = os.stat(local_path(filename)).st_mtime
+        except OSError:
+            return None
+        return filename, width, height, _mtime
+
+    def get(self, key: ImageKey) -> Optional[Any]:
+        _entry = self.entries.get(key)
+        if _entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return _entry[0]
+
+    def put(self, key: ImageKey, image: Any, width: int, height: int) -> None:
+        _size: int = width * height * BYTES_PER_PIXEL
+
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+
+        #  An image larger than the whole budget is never cached.
+
+        if _size > self.budget:
+            return
+
+        #  Drop any stale entries for older versions of the same file and size.
+
+        for _key in [
+            _key
+            for _key in self.entries
+            if _key[:3] == key[:3] and _key[3] != key[3]
+        ]:
+            self.size -= self.entries.pop(_key)[1]
+
+        self.entries[key] = (image, _size)
+        self.size += _size
+
+        while self.size > self.budget:
+            _, (_, _evicted) = self.entries.popitem(last=False)
+            self.size -= _evicted
+            self.evictions += 1
+
+    def invalidate(self, filename: str) -> None:
+        for _key in [_key for _key in self.entries if _key[0] == filename]:
+            self.size -= self.entries.pop(_key)[1]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "size": self.size,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from typing import TYPE_CHECKING, Callable, Optional
+
+from assetstore import local_path
+from cellgrid import Grid
+from imagecache import PENDING, ImageCache, ImageKey
+
+if TYPE_CHECKING:
+    from PIL import ImageTk
+
+    from bundle import Bundle
+
+#  Background image decoding.
+
+#  PNG decoding and resizing run with PIL on a pool of worker threads. Only the
+#  creation of the PhotoImage, which must happen on the Tk thread, is handed back
+#  to the main loop. The workers never touch Tk or the cache, their results are
+#  passed back through a queue that is polled with after().
+
+#  PIL is imported on first use so that it stays out of the designer's startup.
+
+WORKERS = 4
+
+POLL_INTERVAL = 20
+
+
+#  Every asset on a board with the size it is drawn at, width and height are None
+#  for board decorators, which are drawn at their own size. Tokens can be placed
+#  on any cell and are listed at the size of every cell.
+
+#  Every width is drawn with every height, so the cell sizes come from the
+#  distinct widths and heights. The cell decorators of a board with cells of one
+#  size are the distinct values of the grid buffer. Otherwise they are gathered a
+#  row at a time, pairing each value with the width of its column, so there is
+#  no Python loop over the cells of large boards.
+
+
+def drawn_sizes(gameboard) -> set[tuple[str, Optional[int], Optional[int]]]:
+    _drawn: set[tuple[str, Optional[int], Optional[int]]] = set()
+    _widths: list[int] = list(gameboard.width_of_cell)
+    _heights: list[int] = list(gameboard.height_of_cell)
+    _sizes: set[tuple[int, int]] = {
+        (_width, _height) for _width in set(_widths) for _height in set(_heights)
+    }
+
+    _decorators = gameboard.cell_decorator
+    if isinstance(_decorators, Grid):
+        _columns: int = _decorators.columns
+        _rows = (
+            _decorators.data[_row * _columns : (_row + 1) * _columns]
+            for _row in range(_decorators.rows)
+        )
+        _decode: Callable = _decorators.decode
+        _blank = _decorators.interned.get("")
+    else:
+        _rows = iter(_decorators)
+        _decode = str
+        _blank = ""
+
+    _by_height: dict[int, set] = {}
+    if len(_sizes) == 1 and isinstance(_decorators, Grid):
+        _width, _height = next(iter(_sizes))
+        _by_height[_height] = {(_value, _width) for _value in set(_decorators.data)}
+    else:
+        for _row, _height in zip(_rows, _heights):
+            _by_height.setdefault(_height, set()).update(zip(_row, _widths))
+    for _height, _pairs in _by_height.items():
+        for _value, _width in _pairs:
+            if _value != _blank:
+                _filename: str = _decode(_value)
+                if _filename != "":
+                    _drawn.add((_filename, _width, _height))
+
+    for _, _filename in gameboard.tokens:
+        if _filename != "":
+            for _size in _sizes:
+                _drawn.add((_filename, *_size))
+
+    for _filename, _, _ in gameboard.board_decorator:
+        if _filename != "":
+            _drawn.add((_filename, None, None))
+
+    return _drawn
+
+
+class ImageLoader:
+    def __init__(
+        self,
+        widget,
+        cache: ImageCache,
+        on_ready: Callable[[str], None],
+        workers: int = WORKERS,
+    ) -> None:
+        self.widget = widget
+        self.cache: ImageCache = cache
+        self.on_ready: Callable[[str], None] = on_ready
+
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="imageloader"
+        )
+        self.decoded: SimpleQueue = SimpleQueue()
+        self.pending: set[ImageKey] = set()
+        self.failed: set[ImageKey] = set()
+
+        #  Images decoded in the current poll. These are handed out even if the
+        #  cache could not keep them, for instance when larger than its budget.
+
+        self.ready: dict[ImageKey, ImageTk.PhotoImage] = {}
+        self.polling: Optional[str] = None
+
+        #  The bundle the board was opened from. The images packed in it are used
+        #  in place of the files they were packed from.
+
+        self.bundle: Optional[Bundle] = None
+
+    #  Return the image if it is cached, otherwise start decoding it and return
+    #  PENDING. None is returned for images that cannot be loaded.
+
+    def request(self, filename: str, width: Optional[int], height: Optional[int]):
+        _bundle: Optional[Bundle] = self.bundle
+        if _bundle is not None and _bundle.has(filename):
+            _key = filename, width, height, _bundle.mtime
+        else:
+            _bundle = None
+            _key = self.cache.key(filename, width, height)
+        if _key is None or _key in self.failed:
+            return None
+
+        _image = self.ready.get(_key)
+        if _image is None:
+            _image = self.cache.get(_key)
+        if _image is not None:
+            return _image
+
+        if _key not in self.pending:
+            self.pending.add(_key)
+            self.executor.submit(self.decode, _key, _bundle)
+            if self.polling is None:
+                self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+
+        return PENDING
+
+    #  Start decoding every asset on the board at the sizes it is drawn at.
+
+    def prefetch(self, gameboard) -> None:
+        for _filename, _width, _height in drawn_sizes(gameboard):
+            self.request(_filename, _width, _height)
+
+    #  Worker thread.
+
+    def decode(self, key: ImageKey, bundle: Optional["Bundle"]) -> None:
+        from PIL import Image
+
+        _filename, _width, _height, _ = key
+        try:
+            if bundle is not None:
+                _image = bundle.image(_filename, _width, _height)
+            else:
+                _image = Image.open(local_path(_filename))
+                _image.load()
+                if _width is not None and _height is not None:
+                    _image = _image.resize((_width, _height))
+        except Exception:
+            _image = None
+        self.decoded.put((key, _image))
+
+    #  Main thread.
+
+    def poll(self) -> None:
+        from PIL import ImageTk
+
+        self.polling = None
+        _ready: set[str] = set()
+
+        while True:
+            try:
+                _key, _image = self.decoded.get_nowait()
+            except Empty:
+                break
+
+            self.pending.discard(_key)
+            if _image is None:
+                self.failed.add(_key)
+            else:
+                self.ready[_key] = ImageTk.PhotoImage(_image)
+                self.cache.put(_key, self.ready[_key], _image.width, _image.height)
+            _ready.add(_key[0])
+
+        for _filename in _ready:
+            self.on_ready(_filename)
+        self.ready.clear()
+
+        if self.pending:
+            self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+
+    def shutdown(self) -> None:
+        if self.polling is not None:
+            self.widget.after_cancel(self.polling)
+            self.polling = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
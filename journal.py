@@ -0,0 +1,392 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import os
+import pickle
+import struct
+import zlib
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Optional
+
+from boardmodel import (
+    CELL_FIELDS,
+    COLUMN_FIELDS,
+    ROW_FIELDS,
+    BoardModel,
+    Change,
+    Resize,
+)
+from cellgrid import Grid, GridPatch
+from layout import DIMENSION_FIELDS
+
+#  Edit journal.
+
+#  Every change to a board that has been saved is appended to a journal file next
+#  to it, board.tab.journal for board.tab, so that edits made since the last save
+#  survive a crash. Appending costs the size of the edit, the records are written
+#  as they happen and synced to disk by a worker thread at most once a second.
+
+#  A journal newer than its board holds edits that were never saved, and can be
+#  replayed onto the board after it is opened. A successful save compacts the
+#  journal down to the edits made while the save was being written, normally
+#  none, in which case the journal is removed.
+
+#  Each record is a pickled (kind, field, key, value) tuple framed by its length
+#  and CRC, so that a record torn by a crash is detected and the journal is read
+#  up to it. A model transaction is written as one record holding the records of
+#  its changes, so it is replayed whole or not at all. Grid patches hold encoded
+#  values, they are written together with the strings they encode and encoded
+#  again against the board they are replayed on. Undoing a shrink puts back what
+#  it trimmed, so its record holds the row or column lists and the whole grids,
+#  encoded the same way.
+
+MAGIC = b"GBJOURNAL1\n"
+
+EXTENSION = ".journal"
+
+SYNC_INTERVAL = 1000
+
+FRAME = struct.Struct("<II")
+
+
+def journal_filename(filename: str) -> str:
+    return filename + EXTENSION
+
+
+#  Whether the board saved as filename has a journal of edits made since.
+
+
+def pending(filename: str) -> bool:
+    _journal: str = journal_filename(filename)
+    try:
+        return os.path.getsize(_journal) > len(MAGIC) and os.path.getmtime(
+            _journal
+        ) > os.path.getmtime(filename)
+    except OSError:
+        return False
+
+
+def remove_journal(filename: str) -> None:
+    try:
+        os.remove(journal_filename(filename))
+    except OSError:
+        pass
+
+
+#  Records.
+
+
+def encode_patch(grid: Grid, patch: GridPatch) -> tuple:
+    _codes: set[int] = set()
+    for _values in patch.values:
+        _codes.update(_values)
+    return (
+        [_values.tobytes() for _values in patch.values],
+        {_code: grid.decode(_code) for _code in _codes},
+    )
+
+
+def decode_patch(grid: Grid, slices: list[slice], value: tuple) -> GridPatch:
+    _buffers, _table = value
+    _codes: dict[int, int] = {
+        _code: grid.encode(_string) for _code, _string in _table.items()
+    }
+    _values: list[array] = []
+    for _buffer in _buffers:
+        _encoded: array = array(grid.typecode)
+        _encoded.frombytes(_buffer)
+        _values.append(array(grid.typecode, map(_codes.__getitem__, _encoded)))
+    return GridPatch(slices, _values)
+
+
+def resize_fields(field: str) -> tuple[str, ...]:
+    if field == "number_of_cells_horizontally":
+        return COLUMN_FIELDS
+    return ROW_FIELDS
+
+
+def to_record(model: BoardModel, change: Change) -> tuple:
+    _field: str = change.field
+    if _field in DIMENSION_FIELDS:
+        if change.old.restored:
+            return (
+                "restore",
+                _field,
+                change.new,
+                (
+                    {
+                        _list: list(getattr(model.gameboard, _list))
+                        for _list in resize_fields(_field)
+                    },
+                    {
+                        _grid: encode_patch(
+                            model.grid(_grid),
+                            GridPatch([slice(None)], [model.grid(_grid).data]),
+                        )
+                        for _grid in CELL_FIELDS
+                    },
+                ),
+            )
+        return ("resize", _field, None, change.new)
+    if isinstance(change.new, GridPatch):
+        return (
+            "patch",
+            _field,
+            change.new.slices,
+            encode_patch(model.grid(_field), change.new),
+        )
+    if change.key is None:
+        return ("set", _field, None, change.new)
+    if isinstance(change.key, tuple):
+        return ("cell", _field, change.key, change.new)
+    if change.old is None:
+        return ("insert", _field, change.key, change.new)
+    if change.new is None:
+        return ("delete", _field, change.key, None)
+    return ("item", _field, change.key, change.new)
+
+
+def apply_record(model: BoardModel, record: tuple) -> None:
+    _kind, _field, _key, _value = record
+    if _kind == "transaction":
+        with model.transaction():
+            for _record in _value:
+                apply_record(model, _record)
+    elif _kind == "resize":
+        if _field == "number_of_cells_horizontally":
+            model.resize_columns(_value)
+        else:
+            model.resize_rows(_value)
+    elif _kind == "restore":
+        _lists, _grids = _value
+        model.restore(
+            _field,
+            Resize(
+                _key,
+                _lists,
+                {
+                    _grid: decode_patch(
+                        model.grid(_grid), [slice(None)], _encoded
+                    ).values[0]
+                    for _grid, _encoded in _grids.items()
+                },
+            ),
+        )
+    elif _kind == "patch":
+        model.apply_patch(_field, decode_patch(model.grid(_field), _key, _value))
+    elif _kind == "set":
+        model.set(_field, _value)
+    elif _kind == "cell":
+        model.set_cell(_field, *_key, _value)
+    elif _kind == "insert":
+        model.insert_item(_field, _key, _value)
+    elif _kind == "delete":
+        model.delete_item(_field, _key)
+    else:
+        model.set_item(_field, _key, _value)
+
+
+#  Read the records of a journal, and the length of the journal up to the end of
+#  the last good record.
+
+
+def read_records(filename: str) -> tuple[list[tuple], int]:
+    with open(filename, "rb") as _file:
+        _data: bytes = _file.read()
+    if not _data.startswith(MAGIC):
+        return [], 0
+
+    _records: list[tuple] = []
+    _offset: int = len(MAGIC)
+    while _offset + FRAME.size <= len(_data):
+        _length, _crc = FRAME.unpack_from(_data, _offset)
+        _payload: bytes = _data[_offset + FRAME.size : _offset + FRAME.size + _length]
+        if len(_payload) != _length or zlib.crc32(_payload) != _crc:
+            break
+        try:
+            _records.append(pickle.loads(_payload))
+        except Exception:
+            break
+        _offset += FRAME.size + _length
+    return _records, _offset
+
+
+class Journal:
+    def __init__(self, widget, model: BoardModel, interval: int = SYNC_INTERVAL):
+        self.widget = widget
+        self.model: BoardModel = model
+        self.interval: int = interval
+
+        #  The journal of the current board, "" while the board is unsaved.
+
+        self.filename: str = ""
+        self.file: Optional[IO[bytes]] = None
+
+        #  Bytes of records written, used to mark where a save was taken.
+
+        self.length: int = 0
+
+        self.scheduled: Optional[str] = None
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="journal"
+        )
+        self.syncing: Optional[Future] = None
+        self.replaying: bool = False
+
+        model.subscribe(self.on_change, self.on_transaction)
+
+    #  Follow the board saved as filename, or an unsaved board. A journal left
+    #  over from before the board was last saved is out of date and removed.
+
+    def start(self, filename: str) -> None:
+        self.close()
+        self.filename = journal_filename(filename) if filename != "" else ""
+        self.length = 0
+        if self.filename == "":
+            return
+        if pending(filename):
+            self.length = os.path.getsize(self.filename) - len(MAGIC)
+        else:
+            self.remove()
+
+    def on_change(self, change: Change) -> None:
+        if self.replaying or self.filename == "":
+            return
+        self.write(to_record(self.model, change))
+
+    def on_transaction(self, changes: list[Change]) -> None:
+        if self.replaying or self.filename == "":
+            return
+        self.write(
+            (
+                "transaction",
+                None,
+                None,
+                [to_record(self.model, _change) for _change in changes],
+            )
+        )
+
+    def write(self, record: tuple) -> None:
+        _payload: bytes = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+        try:
+            if self.file is None:
+                self.open()
+            self.file.write(FRAME.pack(len(_payload), zlib.crc32(_payload)))
+            self.file.write(_payload)
+        except OSError:
+            self.close()
+            self.filename = ""
+            return
+        self.length += FRAME.size + len(_payload)
+        if self.scheduled is None:
+            self.scheduled = self.widget.after(self.interval, self.sync)
+
+    def open(self) -> None:
+        if os.path.exists(self.filename):
+            self.file = open(self.filename, "ab")
+            self.length = self.file.tell() - len(MAGIC)
+        else:
+            self.file = open(self.filename, "wb")
+            self.file.write(MAGIC)
+            self.length = 0
+
+    #  Hand the records written so far to the worker to sync. A sync still in
+    #  progress is left to finish and the next one is tried later.
+
+    def sync(self) -> None:
+        self.scheduled = None
+        if self.file is None:
+            return
+        if self.syncing is not None and not self.syncing.done():
+            self.scheduled = self.widget.after(self.interval, self.sync)
+            return
+        try:
+            self.file.flush()
+        except OSError:
+            return
+        self.syncing = self.executor.submit(os.fsync, self.file.fileno())
+
+    def close(self) -> None:
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        if self.syncing is not None:
+            self.syncing.exception()
+            self.syncing = None
+        if self.file is not None:
+            try:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except OSError:
+                pass
+            self.file.close()
+            self.file = None
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+    #  Apply the journal to the board that has just been opened. Records are
+    #  appended after the last good one from then on.
+
+    def replay(self) -> int:
+        self.close()
+        try:
+            _records, _length = read_records(self.filename)
+            os.truncate(self.filename, max(_length, len(MAGIC)))
+        except OSError:
+            return 0
+        self.length = max(_length - len(MAGIC), 0)
+
+        self.replaying = True
+        try:
+            for _record in _records:
+                apply_record(self.model, _record)
+        finally:
+            self.replaying = False
+        return len(_records)
+
+    def discard(self) -> None:
+        self.close()
+        if self.filename != "":
+            self.remove()
+        self.length = 0
+
+    #  The position a save is taken from.
+
+    def mark(self) -> int:
+        return self.length
+
+    #  The board as it was at mark has been saved as filename. Only the records
+    #  written after mark are kept, in the journal of filename.
+
+    def saved(self, filename: str, mark: int) -> None:
+        _tail: bytes = b""
+        self.close()
+        if self.filename != "":
+            try:
+                with open(self.filename, "rb") as _file:
+                    _file.seek(len(MAGIC) + mark)
+                    _tail = _file.read()
+            except OSError:
+                pass
+            self.remove()
+
+        self.filename = journal_filename(filename)
+        self.length = 0
+        self.remove()
+        if _tail != b"":
+            try:
+                self.open()
+                self.file.write(_tail)
+                self.length = len(_tail)
+            except OSError:
+                self.close()
+
+    def shutdown(self) -> None:
+        self.close()
+        self.executor.shutdown(wait=True)
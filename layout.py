@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable
+
+from boardmodel import COLUMN_FIELDS, ROW_FIELDS, Change
+
+#  Board layout.
+
+#  Holds the offset of the top left of each cell, including its padding, as
+#  cumulative arrays over the columns and rows in board pixels. They are built
+#  once per board and kept up to date as it is edited: a change to one row or
+#  column only moves the rows or columns after it. The rectangle of a cell is
+#  then a lookup, and the cell under a point a binary search.
+
+#  Used by the designer's renderer and by rasterize. No Tk is needed.
+
+BOARDER_WIDTH_FIELDS = (
+    "width_of_left_outer_boarder",
+    "width_of_top_outer_boarder",
+    "width_of_right_outer_boarder",
+    "width_of_bottom_outer_boarder",
+    "width_of_left_inner_boarder",
+    "width_of_top_inner_boarder",
+    "width_of_right_inner_boarder",
+    "width_of_bottom_inner_boarder",
+)
+
+DIMENSION_FIELDS = ("number_of_cells_horizontally", "number_of_cells_vertically")
+
+Rectangle = tuple[int, int, int, int]
+
+
+class BoardLayout:
+    def __init__(self, gameboard=None) -> None:
+        self.gameboard = None
+        self.column_offsets: list[int] = []
+        self.row_offsets: list[int] = []
+        self.width: int = 0
+        self.height: int = 0
+
+        #  Bumped on every change, so users can tell whether a copy is current.
+
+        self.version: int = 0
+
+        if gameboard is not None:
+            self.rebuild(gameboard)
+
+    def copy(self) -> "BoardLayout":
+        _copy = BoardLayout()
+        _copy.gameboard = self.gameboard
+        _copy.column_offsets = list(self.column_offsets)
+        _copy.row_offsets = list(self.row_offsets)
+        _copy.width = self.width
+        _copy.height = self.height
+        _copy.version = self.version
+        return _copy
+
+    #  Width of a column and height of a row, including padding and gutter.
+
+    def column_span(self, column: int) -> int:
+        _gameboard = self.gameboard
+        return (
+            _gameboard.left_padding_of_cell[column]
+            + _gameboard.width_of_cell[column]
+            + _gameboard.right_padding_of_cell[column]
+            + _gameboard.size_of_vertical_gutter_after_cell[column]
+        )
+
+    def row_span(self, row: int) -> int:
+        _gameboard = self.gameboard
+        return (
+            _gameboard.top_padding_of_cell[row]
+            + _gameboard.height_of_cell[row]
+            + _gameboard.bottom_padding_of_cell[row]
+            + _gameboard.size_of_horizontal_gutter_after_cell[row]
+        )
+
+    def rebuild(self, gameboard) -> None:
+        self.gameboard = gameboard
+        self.column_offsets = [0] * gameboard.number_of_cells_horizontally
+        self.row_offsets = [0] * gameboard.number_of_cells_vertically
+        self.update_columns(0)
+        self.update_rows(0)
+
+    #  Recalculate the offsets from a column or row to the end.
+
+    def update_columns(self, start: int) -> None:
+        _gameboard = self.gameboard
+        if start == 0:
+            _x: int = (
+                _gameboard.width_of_left_outer_boarder
+                + _gameboard.width_of_left_inner_boarder
+            )
+        else:
+            _x = self.column_offsets[start - 1] + self.column_span(start - 1)
+        for _column in range(start, len(self.column_offsets)):
+            self.column_offsets[_column] = _x
+            _x += self.column_span(_column)
+        self.width = (
+            _x
+            + _gameboard.width_of_right_inner_boarder
+            + _gameboard.width_of_right_outer_boarder
+        )
+        self.version += 1
+
+    def update_rows(self, start: int) -> None:
+        _gameboard = self.gameboard
+        if start == 0:
+            _y: int = (
+                _gameboard.width_of_top_outer_boarder
+                + _gameboard.width_of_top_inner_boarder
+            )
+        else:
+            _y = self.row_offsets[start - 1] + self.row_span(start - 1)
+        for _row in range(start, len(self.row_offsets)):
+            self.row_offsets[_row] = _y
+            _y += self.row_span(_row)
+        self.height = (
+            _y
+            + _gameboard.width_of_bottom_inner_boarder
+            + _gameboard.width_of_bottom_outer_boarder
+        )
+        self.version += 1
+
+    #  Bring the layout up to date with a batch of model changes. A change to
+    #  one row or column moves the rows or columns from the first one changed.
+    #  Anything that moves the whole board rebuilds it.
+
+    def update(self, changes: Iterable[Change]) -> None:
+        _column: int = len(self.column_offsets)
+        _row: int = len(self.row_offsets)
+
+        for _change in changes:
+            if _change.field in BOARDER_WIDTH_FIELDS + DIMENSION_FIELDS:
+                self.rebuild(self.gameboard)
+                return
+            if _change.field in COLUMN_FIELDS:
+                _column = 0 if _change.key is None else min(_column, _change.key)
+            elif _change.field in ROW_FIELDS:
+                _row = 0 if _change.key is None else min(_row, _change.key)
+
+        if _column < len(self.column_offsets):
+            self.update_columns(_column)
+        if _row < len(self.row_offsets):
+            self.update_rows(_row)
+
+    #  Rectangle of a cell including its padding.
+
+    def cell_bounds(self, row: int, column: int) -> Rectangle:
+        _gameboard = self.gameboard
+        _x0: int = self.column_offsets[column]
+        _y0: int = self.row_offsets[row]
+        return (
+            _x0,
+            _y0,
+            _x0
+            + _gameboard.left_padding_of_cell[column]
+            + _gameboard.width_of_cell[column]
+            + _gameboard.right_padding_of_cell[column],
+            _y0
+            + _gameboard.top_padding_of_cell[row]
+            + _gameboard.height_of_cell[row]
+            + _gameboard.bottom_padding_of_cell[row],
+        )
+
+    #  Rectangle of a cell excluding its padding.
+
+    def cell_rectangle(self, row: int, column: int) -> Rectangle:
+        _gameboard = self.gameboard
+        _x0: int = (
+            self.column_offsets[column] + _gameboard.left_padding_of_cell[column]
+        )
+        _y0: int = self.row_offsets[row] + _gameboard.top_padding_of_cell[row]
+        return (
+            _x0,
+            _y0,
+            _x0 + _gameboard.width_of_cell[column],
+            _y0 + _gameboard.height_of_cell[row],
+        )
+
+    #  The outer boarder, the inner boarder and the cell gutter, each drawn over
+    #  the one before.
+
+    def boarders(self) -> tuple[Rectangle, Rectangle, Rectangle]:
+        _gameboard = self.gameboard
+        _outer = (0, 0, self.width, self.height)
+        _inner = (
+            _outer[0] + _gameboard.width_of_left_outer_boarder,
+            _outer[1] + _gameboard.width_of_top_outer_boarder,
+            _outer[2] - _gameboard.width_of_right_outer_boarder,
+            _outer[3] - _gameboard.width_of_bottom_outer_boarder,
+        )
+        _gutter = (
+            _inner[0] + _gameboard.width_of_left_inner_boarder,
+            _inner[1] + _gameboard.width_of_top_inner_boarder,
+            _inner[2] - _gameboard.width_of_right_inner_boarder,
+            _inner[3] - _gameboard.width_of_bottom_inner_boarder,
+        )
+        return _outer, _inner, _gutter
+
+    #  The cell whose padded rectangle contains a point, with -1 for a row or
+    #  column that misses, as in the gutters and boarders.
+
+    def cell_at(self, x: float, y: float) -> tuple[int, int]:
+        _column: int = bisect_right(self.column_offsets, x) - 1
+        if _column >= 0:
+            _x0, _, _x1, _ = self.cell_bounds(0, _column)
+            if not _x0 <= x < _x1:
+                _column = -1
+
+        _row: int = bisect_right(self.row_offsets, y) - 1
+        if _row >= 0:
+            _, _y0, _, _y1 = self.cell_bounds(_row, 0)
+            if not _y0 <= y < _y1:
+                _row = -1
+
+        return _row, _column
+
+    #  The rows and columns whose spans intersect y0 to y1 or x0 to x1.
+
+    def rows_between(self, y0: float, y1: float) -> range:
+        return range(
+            max(bisect_right(self.row_offsets, y0) - 1, 0),
+            bisect_left(self.row_offsets, y1),
+        )
+
+    def columns_between(self, x0: float, x1: float) -> range:
+        return range(
+            max(bisect_right(self.column_offsets, x0) - 1, 0),
+            bisect_left(self.column_offsets, x1),
+        )
@@ -0,0 +1,285 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Optional
+
+from PIL import Image, ImageColor, ImageDraw
+
+import tabformat
+from bundle import Bundle, is_bundle
+from layout import BoardLayout
+
+#  Headless rendering of gameboards to PNG.
+
+#  Draws a board with PIL the same way the designer draws it on the canvas:
+#  outer and inner boarders, the cell gutter, each cell's padding and colour,
+#  cell decorators, board decorators and placed tokens. No Tk or display is
+#  needed, boards are read with tabformat so the gameboard package is not needed
+#  either.
+
+#  Files are spread over a pool of processes, each rendering whole boards. The
+#  designer also uses render_region to draw zoomed out boards as tiles.
+
+#  Images are read through an image source, by default load_image, which reads
+#  the files. Boards opened from a bundle read the images packed in it.
+
+PLACEHOLDER_COLOUR = "#808080"
+
+ImageSource = Callable[[str, Optional[int], Optional[int]], Optional[Image.Image]]
+
+
+class RenderResult(NamedTuple):
+    source: str
+    destination: str
+    seconds: float
+    error: str
+    missing: list[str]
+
+
+#  Asset paths are saved with Windows separators.
+
+
+def asset_path(filename: str) -> str:
+    return filename.replace("\\", os.sep)
+
+
+def colour(value: str) -> tuple[int, int, int]:
+    try:
+        return ImageColor.getrgb(value)[:3]
+    except ValueError:
+        return ImageColor.getrgb(PLACEHOLDER_COLOUR)
+
+
+@lru_cache(maxsize=256)
+def load_image(
+    filename: str, width: Optional[int], height: Optional[int]
+) -> Optional[Image.Image]:
+    try:
+        _image = Image.open(asset_path(filename))
+        _image.load()
+    except OSError:
+        return None
+    _image = _image.convert("RGBA")
+    if width is not None and height is not None:
+        _image = _image.resize((width, height))
+    return _image
+
+
+#  Draw a filled rectangle with the same extent as a Tk canvas rectangle, which
+#  covers x0 up to but not including x1.
+
+
+def fill(draw: ImageDraw.ImageDraw, bounds: tuple[int, int, int, int], value: str):
+    _x0, _y0, _x1, _y1 = bounds
+    if _x1 > _x0 and _y1 > _y0:
+        draw.rectangle((_x0, _y0, _x1 - 1, _y1 - 1), fill=colour(value))
+
+
+#  Composite an image centred on (x, y), clipped to the canvas.
+
+
+def paste(canvas: Image.Image, image: Image.Image, x: int, y: int) -> None:
+    _x0: int = x - image.width // 2
+    _y0: int = y - image.height // 2
+    _left: int = max(0, -_x0)
+    _top: int = max(0, -_y0)
+    _right: int = min(image.width, canvas.width - _x0)
+    _bottom: int = min(image.height, canvas.height - _y0)
+    if _right > _left and _bottom > _top:
+        canvas.alpha_composite(
+            image, (_x0 + _left, _y0 + _top), (_left, _top, _right, _bottom)
+        )
+
+
+def render(
+    gameboard: Any, images: ImageSource = load_image
+) -> tuple[Image.Image, list[str]]:
+    _layout = BoardLayout(gameboard)
+    return render_region(
+        gameboard,
+        (0, 0, max(_layout.width, 1), max(_layout.height, 1)),
+        1.0,
+        _layout,
+        images,
+    )
+
+
+#  Render part of the board scaled by zoom. The region is in scaled pixels, so a
+#  zoomed board can be drawn a tile at a time. Only the cells that intersect the
+#  region are drawn. Edges are scaled rather than sizes, the same as the designer
+#  does on its canvas, so neighbouring tiles meet exactly.
+
+
+def render_region(
+    gameboard: Any,
+    region: tuple[int, int, int, int],
+    zoom: float = 1.0,
+    layout: Optional[BoardLayout] = None,
+    images: ImageSource = load_image,
+) -> tuple[Image.Image, list[str]]:
+    _missing: list[str] = []
+    _layout: BoardLayout = layout or BoardLayout(gameboard)
+    _left, _top, _right, _bottom = region
+
+    def _scaled(bounds: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+        return (
+            round(bounds[0] * zoom) - _left,
+            round(bounds[1] * zoom) - _top,
+            round(bounds[2] * zoom) - _left,
+            round(bounds[3] * zoom) - _top,
+        )
+
+    _canvas: Image.Image = Image.new("RGBA", (_right - _left, _bottom - _top))
+    _draw = ImageDraw.Draw(_canvas)
+
+    #  Boarders and gutter.
+
+    _outer, _inner, _gutter = _layout.boarders()
+    fill(_draw, _scaled(_outer), gameboard.colour_of_outer_boarder)
+    fill(_draw, _scaled(_inner), gameboard.colour_of_inner_boarder)
+    fill(_draw, _scaled(_gutter), gameboard.colour_of_cell_gutter)
+
+    #  Cells that intersect the region, with their decorators.
+
+    _cells: dict[tuple[int, int], tuple[int, int, int, int]] = {}
+    for _row in _layout.rows_between(_top / zoom, _bottom / zoom):
+        for _column in _layout.columns_between(_left / zoom, _right / zoom):
+            _cells[(_row, _column)] = _scaled(_layout.cell_rectangle(_row, _column))
+            fill(
+                _draw,
+                _scaled(_layout.cell_bounds(_row, _column)),
+                gameboard.colour_of_cell_padding[_row][_column],
+            )
+            fill(
+                _draw, _cells[(_row, _column)], gameboard.colour_of_cell[_row][_column]
+            )
+
+    _tokens: dict[str, str] = dict(gameboard.tokens)
+
+    def _draw_image(filename: str, cell: tuple[int, int, int, int]) -> None:
+        if cell[2] <= cell[0] or cell[3] <= cell[1]:
+            return
+        _image = images(filename, cell[2] - cell[0], cell[3] - cell[1])
+        if _image is None:
+            _missing.append(filename)
+            return
+        paste(_canvas, _image, (cell[0] + cell[2]) // 2, (cell[1] + cell[3]) // 2)
+
+    for (_row, _column), _cell in _cells.items():
+        _decorator: str = gameboard.cell_decorator[_row][_column]
+        if _decorator != "":
+            _draw_image(_decorator, _cell)
+
+    #  Board decorators over the cells, then the placed tokens on top.
+
+    for _filename, _decorator_x, _decorator_y in gameboard.board_decorator:
+        if _filename == "":
+            continue
+        _image = images(_filename, None, None)
+        if _image is not None and zoom != 1.0:
+            _image = images(
+                _filename, round(_image.width * zoom), round(_image.height * zoom)
+            )
+        if _image is None:
+            _missing.append(_filename)
+            continue
+        paste(
+            _canvas,
+            _image,
+            round(int(_decorator_x) * zoom) - _left,
+            round(int(_decorator_y) * zoom) - _top,
+        )
+
+    for (_row, _column), _cell in _cells.items():
+        _token: str = _tokens.get(gameboard.placed_tokens[_row][_column], "")
+        if _token != "":
+            _draw_image(_token, _cell)
+
+    return _canvas, sorted(set(_missing))
+
+
+#  Render one file, run in a worker process.
+
+
+def render_file(source: str, destination: str) -> RenderResult:
+    _start: float = time.perf_counter()
+    try:
+        if is_bundle(source):
+            _bundle = Bundle(source)
+            _image, _missing = render(_bundle.board(), _bundle.load_image)
+        else:
+            _image, _missing = render(tabformat.load_any(source))
+        _image.convert("RGB").save(destination, "PNG")
+    except Exception as _error:
+        return RenderResult(
+            source, destination, time.perf_counter() - _start, str(_error), []
+        )
+    return RenderResult(source, destination, time.perf_counter() - _start, "", _missing)
+
+
+def destination_for(source: str, output: Optional[str]) -> str:
+    _name: str = os.path.splitext(os.path.basename(source))[0] + ".png"
+    if output:
+        return os.path.join(output, _name)
+    return os.path.join(os.path.dirname(source), _name)
+
+
+def main(args: Optional[list[str]] = None) -> int:
+    _parser = argparse.ArgumentParser(
+        prog="gameboarddesigner.py render",
+        description="Render gameboards to PNG without opening the designer.",
+    )
+    _parser.add_argument(
+        "files", nargs="+", help=".tab, .tab2 or .tabz files to render"
+    )
+    _parser.add_argument(
+        "-o", "--output", help="directory for the PNG files, default beside each file"
+    )
+    _parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count(), help="number of processes"
+    )
+    _options = _parser.parse_args(args)
+
+    if _options.output:
+        os.makedirs(_options.output, exist_ok=True)
+
+    _start: float = time.perf_counter()
+    _failed: int = 0
+    with ProcessPoolExecutor(max_workers=max(_options.jobs, 1)) as _executor:
+        _futures = [
+            _executor.submit(
+                render_file, _source, destination_for(_source, _options.output)
+            )
+            for _source in _options.files
+        ]
+        for _future in as_completed(_futures):
+            _result: RenderResult = _future.result()
+            if _result.error != "":
+                _failed += 1
+                print(f"{_result.source}: {_result.error}", file=sys.stderr)
+                continue
+            print(
+                f"{_result.seconds * 1000:8.1f} ms  "
+                f"{_result.source} -> {_result.destination}"
+            )
+            for _filename in _result.missing:
+                print(f"             missing {_filename}", file=sys.stderr)
+
+    _elapsed: float = time.perf_counter() - _start
+    _rendered: int = len(_options.files) - _failed
+    print(
+        f"{_rendered} of {len(_options.files)} boards in {_elapsed:.2f} s, "
+        f"{_rendered / _elapsed:.1f} boards/s"
+    )
+    return 1 if _failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,46 +2,94 @@
 
 #  type: ignore
 
+import os
+import threading
 from functools import partial
+from queue import Empty, SimpleQueue
 from tkinter import Menu
-from typing import Callable
+from typing import Callable, Optional
 
 #  Recent files menu.
 
+#  The list is kept most recent first and capped at limit entries. The menu is
+#  built once when the list is loaded and again only when the list changes, and
+#  config.dat is only written when it changes, to a temporary file that is then
+#  renamed over it.
+
+#  Once loaded the entries are checked on a background thread and files that no
+#  longer exist are dropped, without holding up startup on a slow drive.
+
 RECENT_FILES = "config.dat"
 
+MAX_RECENT_FILES = 10
+
+POLL_INTERVAL = 100
+
+
+#  Recent files are saved with Windows separators.
+
+
+def exists(filename: str) -> bool:
+    return os.path.exists(filename.replace("\\", os.sep))
+
 
 class RecentFiles:
     def __init__(
-        self, recent_files: list[str], recent_files_menu: Menu, on_open_recent: Callable
+        self,
+        recent_files_menu: Menu,
+        on_open_recent: Callable,
+        limit: int = MAX_RECENT_FILES,
     ) -> None:
-        self.recent_files: list[str] = recent_files
+        self.recent_files: list[str] = []
         self.recent_files_menu: Menu = recent_files_menu
         self.on_open_recent: Callable = on_open_recent
+        self.limit: int = limit
+
+        #  The list as last read from or written to config.dat.
+
+        self.written: list[str] = []
+
+        self.verified: SimpleQueue = SimpleQueue()
+        self.polling: Optional[str] = None
+
+    @property
+    def most_recent(self) -> str:
+        return self.recent_files[0] if self.recent_files else ""
 
     def load_recent_files(self) -> None:
         try:
             with open(RECENT_FILES, "r") as _file:
-                _files: list[str] = _file.readlines()
-                for _file in _files:
-                    self.recent_files.append(_file.strip("\n"))
-                    self.build_recent_items_menu()
+                _files: list[str] = [_line.strip("\n") for _line in _file]
         except FileNotFoundError:
-            self.recent_files = []
+            _files = []
+
+        self.recent_files = list(dict.fromkeys(filter(None, _files)))[: self.limit]
+        self.written = _files
+        self.build_recent_items_menu()
 
     def save_recent_files(self) -> None:
-        with open(RECENT_FILES, "w") as _file:
-            for _recent_file in self.recent_files:
-                _file.write(_recent_file)
-                _file.write("\n")
+        if self.recent_files == self.written:
+            return
+
+        _temporary: str = RECENT_FILES + ".tmp"
+        try:
+            with open(_temporary, "w") as _file:
+                for _recent_file in self.recent_files:
+                    _file.write(_recent_file)
+                    _file.write("\n")
+            os.replace(_temporary, RECENT_FILES)
+        except OSError:
+            return
+        self.written = list(self.recent_files)
+
+    #  The entries go above the separator and the clear item.
 
     def build_recent_items_menu(self) -> None:
 
         if self.recent_files_menu.index("end") > 1:
             self.recent_files_menu.delete(0, self.recent_files_menu.index("end") - 2)
 
-        for _recent_file in sorted(self.recent_files):
-            _index: int = self.recent_files_menu.index("end") - 1
+        for _index, _recent_file in enumerate(self.recent_files):
             self.recent_files_menu.insert_command(
                 index=_index,
                 label=_recent_file,
@@ -52,12 +100,56 @@ class RecentFiles:
 
         self.recent_files = []
         self.save_recent_files()
-        if self.recent_files_menu.index("end") > 1:
-            self.recent_files_menu.delete(0, self.recent_files_menu.index("end") - 2)
+        self.build_recent_items_menu()
 
     def add_to_recent_files_list(self, filename: str) -> None:
 
-        if not filename in self.recent_files:
-            self.recent_files.append(filename)
+        if self.most_recent == filename:
+            return
+
+        if filename in self.recent_files:
+            self.recent_files.remove(filename)
+        self.recent_files.insert(0, filename)
+        del self.recent_files[self.limit :]
+
+        self.build_recent_items_menu()
+        self.save_recent_files()
+
+    #  Check that every entry still exists, on a background thread.
+
+    def verify(self) -> None:
+        threading.Thread(
+            target=self.check,
+            args=(list(self.recent_files),),
+            name="recentfiles",
+            daemon=True,
+        ).start()
+        if self.polling is None:
+            self.polling = self.recent_files_menu.after(POLL_INTERVAL, self.poll)
+
+    #  Worker thread.
+
+    def check(self, recent_files: list[str]) -> None:
+        self.verified.put([_file for _file in recent_files if not exists(_file)])
+
+    #  Main thread.
+
+    def poll(self) -> None:
+        try:
+            _missing: list[str] = self.verified.get_nowait()
+        except Empty:
+            self.polling = self.recent_files_menu.after(POLL_INTERVAL, self.poll)
+            return
+        self.polling = None
+
+        if any(_file in self.recent_files for _file in _missing):
+            self.recent_files = [
+                _file for _file in self.recent_files if _file not in _missing
+            ]
             self.build_recent_items_menu()
             self.save_recent_files()
+
+    def shutdown(self) -> None:
+        if self.polling is not None:
+            self.recent_files_menu.after_cancel(self.polling)
+            self.polling = None
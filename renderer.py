@@ -0,0 +1,845 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+from tkinter import CENTER, Canvas, Event, Frame, Scrollbar, Widget
+from typing import Callable, Optional
+
+from boardmodel import CELL_FIELDS, COLUMN_FIELDS, ROW_FIELDS, Change
+from bulkfill import Mask
+from cellgrid import GridPatch
+from imagecache import PENDING
+from layout import BOARDER_WIDTH_FIELDS, DIMENSION_FIELDS, BoardLayout
+from selection import Block, Selection
+from tilecache import TILE_SIZE, TileCache, TileKey
+
+#  Retained-mode, virtualized board renderer.
+
+#  A single scrollable canvas is kept for the lifetime of the designer. Only the
+#  cells that intersect the visible part of the board, plus a margin of MARGIN
+#  cells, have canvas items. As the board is scrolled or zoomed the items of
+#  cells that leave the view are hidden and handed to the cells that come into
+#  it, so the number of items, and the cost of a redraw, depend on the size of
+#  the window and not on the size of the board.
+
+#  Geometry is kept in board pixels by a BoardLayout, the canvas shows it scaled
+#  by the zoom. Board level items, the boarders and the board decorators, always
+#  exist.
+
+#  Zoomed out below TILED_BELOW, when given a tile cache, the board is shown as
+#  tiles rendered off-screen instead of cell items. The boarder items stay under
+#  the tiles and show through until they are ready.
+
+#  A click selects a cell, Control-click adds or removes a cell and Shift-drag
+#  selects a rectangle of cells, added to the selection with Control held too.
+#  A selection of more than one cell is outlined by an overlay item per block of
+#  the selection, over everything else.
+
+BOARD = -1
+
+MARGIN = 2
+
+ZOOM_LEVELS = (0.25, 0.33, 0.5, 0.67, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0)
+
+TILED_BELOW = 1.0
+
+TILE_MARGIN = 1
+
+BACKGROUND_COLOUR = "#a6a6a6"
+
+GEOMETRY_FIELDS = BOARDER_WIDTH_FIELDS + ROW_FIELDS + COLUMN_FIELDS
+
+PLACEHOLDER_COLOUR = "#808080"
+
+BOARDER_FIELDS = (
+    "colour_of_outer_boarder",
+    "colour_of_inner_boarder",
+    "colour_of_cell_gutter",
+)
+
+#  The items of a visible cell, in this order, and the order the layers are
+#  stacked in from the bottom up. Recycled items keep their place in the stack,
+#  new ones are created on top, so the layers are restacked after creating any.
+
+CELL_LAYERS = ("padding", "cell", "decorator", "token")
+
+STACKING = ("decorator", "board_decorator", "token", "pending", "selection")
+
+SELECTION_COLOUR = "#1e90ff"
+
+SELECTION_WIDTH = 3
+
+#  Changes that leave the tiles as they are.
+
+UNRENDERED_FIELDS = ("name", "version", "date", "author")
+
+
+class BoardRenderer:
+    def __init__(
+        self,
+        master: Widget,
+        on_cell_selected: Callable,
+        get_image: Callable,
+        tiles: Optional[TileCache] = None,
+    ) -> None:
+        self.master: Widget = master
+        self.on_cell_selected: Callable = on_cell_selected
+        self.get_image: Callable = get_image
+        self.tiles: Optional[TileCache] = tiles
+
+        self.gameboard = None
+        self.frame: Optional[Frame] = None
+        self.canvas: Optional[Canvas] = None
+        self.items: dict[tuple[int, int, str], int] = {}
+        self.images: dict[tuple[int, int, str], tuple[str, int, int]] = {}
+
+        #  References to the images currently shown. The image cache may evict
+        #  an image while it is still on the canvas, and Tk deletes an image as
+        #  soon as its last Python reference goes.
+
+        self.photos: dict[tuple[int, int, str], object] = {}
+        self.dimensions: tuple[int, int] = (0, 0)
+
+        #  Items of the visible cells by (row, column), in CELL_LAYERS order, and
+        #  hidden items ready for reuse.
+
+        self.visible: dict[tuple[int, int], tuple[int, ...]] = {}
+        self.free: list[tuple[int, ...]] = []
+        self.range: tuple[int, int, int, int] = (0, 0, 0, 0)
+        self.restack: bool = False
+        self.viewport_pending: Optional[str] = None
+
+        #  Tile items by tile, and the tiles they show.
+
+        self.tile_items: dict[TileKey, int] = {}
+        self.tile_photos: dict[TileKey, object] = {}
+
+        self.zoom: float = 1.0
+        self.layout: BoardLayout = BoardLayout()
+
+        #  A copy of the layout for the tile workers, taken when it changes.
+
+        self.tile_layout: BoardLayout = self.layout
+
+        #  The selected cells, their overlay items, and while a rectangle is
+        #  dragged out the cell it started from and the blocks selected before.
+
+        self.selection: Selection = Selection()
+        self.selection_items: list[int] = []
+        self.anchor: Optional[tuple[int, int]] = None
+        self.selected_before: list[Block] = []
+
+    #  Draw the gameboard, only dropping the cell items if the dimensions changed.
+
+    def draw(self, gameboard) -> None:
+        if gameboard is not self.gameboard:
+            self.selection.clear()
+        self.gameboard = gameboard
+        if self.tiles is not None:
+            self.tiles.invalidate()
+
+        if self.canvas is None:
+            self.create_canvas()
+
+        _dimensions = (
+            gameboard.number_of_cells_vertically,
+            gameboard.number_of_cells_horizontally,
+        )
+
+        self.selection.clamp(*_dimensions)
+        if _dimensions != self.dimensions:
+            self.rebuild()
+        else:
+            self.update_all()
+
+    def create_canvas(self) -> None:
+        self.frame = Frame(self.master, background=BACKGROUND_COLOUR)
+        self.frame.pack(fill="both", expand=True)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.canvas = Canvas(
+            self.frame,
+            highlightthickness=0,
+            borderwidth=0,
+            background=BACKGROUND_COLOUR,
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+
+        _vertical = Scrollbar(
+            self.frame, orient="vertical", command=self.canvas.yview
+        )
+        _vertical.grid(row=0, column=1, sticky="ns")
+        _horizontal = Scrollbar(
+            self.frame, orient="horizontal", command=self.canvas.xview
+        )
+        _horizontal.grid(row=1, column=0, sticky="ew")
+
+        #  Every change of view, however it was made, brings the items up to date.
+
+        def _scrolled(scrollbar: Scrollbar) -> Callable:
+            def _set(first: str, last: str) -> None:
+                scrollbar.set(first, last)
+                self.schedule_viewport()
+
+            return _set
+
+        self.canvas.configure(
+            xscrollcommand=_scrolled(_horizontal), yscrollcommand=_scrolled(_vertical)
+        )
+
+        for _layer in ("outer", "inner", "gutter"):
+            self.items[(BOARD, BOARD, _layer)] = self.canvas.create_rectangle(
+                0, 0, 0, 0, width=0, tags=(_layer,)
+            )
+
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Control-Button-1>", self.on_toggle)
+        self.canvas.bind("<Shift-Button-1>", self.on_drag_start)
+        self.canvas.bind("<Control-Shift-Button-1>", self.on_drag_start)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_drag_end)
+        self.canvas.bind("<Configure>", self.on_configure)
+        self.canvas.bind("<ButtonPress-2>", self.on_pan_start)
+        self.canvas.bind("<B2-Motion>", self.on_pan)
+        for _sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(_sequence, self.on_wheel)
+            self.canvas.bind(f"<Shift-{_sequence[1:]}", self.on_wheel)
+            self.canvas.bind(f"<Control-{_sequence[1:]}", self.on_wheel)
+
+    def rebuild(self) -> None:
+        for _cell in list(self.visible):
+            self.release(*_cell)
+        self.range = (0, 0, 0, 0)
+        self.dimensions = (
+            self.gameboard.number_of_cells_vertically,
+            self.gameboard.number_of_cells_horizontally,
+        )
+
+        self.update_all()
+
+    #  Apply a batch of model changes in a single render pass.
+
+    def apply_changes(self, changes: list[Change]) -> None:
+        if self.canvas is None:
+            return
+
+        _fields: set[str] = {_change.field for _change in changes}
+
+        if _fields.intersection(DIMENSION_FIELDS):
+            self.draw(self.gameboard)
+            return
+
+        if self.tiles is not None:
+            self.invalidate_tiles(changes)
+
+        if _fields.intersection(GEOMETRY_FIELDS):
+            self.layout.update(changes)
+            self.update_geometry()
+        if _fields.intersection(BOARDER_FIELDS):
+            self.update_boarders()
+
+        if "tokens" in _fields:
+            self.update_tokens()
+
+        _cells: set[tuple[int, int]] = set()
+        for _change in changes:
+            if _change.field in CELL_FIELDS:
+                if _change.key is None:
+                    _patched: Optional[Mask] = self.patched(_change)
+                    if _patched is None or _patched.count() > len(self.visible):
+                        self.update_cells()
+                        _cells = set()
+                        break
+                    _cells.update(
+                        _cell for _cell in _patched.cells() if _cell in self.visible
+                    )
+                    continue
+                _cells.add(_change.key)
+        for _row, _column in _cells:
+            self.update_cell(_row, _column)
+
+        if "board_decorator" in _fields:
+            self.update_board_decorators()
+
+        if self.tiled:
+            self.update_tiles()
+
+    #  The cells of a bulk fill, or None for a change of the whole field.
+
+    def patched(self, change: Change) -> Optional[Mask]:
+        if not isinstance(change.new, GridPatch):
+            return None
+        return Mask(*self.dimensions, change.new.slices)
+
+    def update_all(self) -> None:
+        self.layout.rebuild(self.gameboard)
+        self.update_geometry()
+        self.update_boarders()
+        self.update_cells()
+        self.update_board_decorators()
+
+    #  Geometry.
+
+    #  Board pixels to canvas pixels. Edges are scaled rather than sizes so that
+    #  neighbouring cells still meet at any zoom.
+
+    def scaled(self, bounds: tuple[int, ...]) -> tuple[int, ...]:
+        return tuple(round(_value * self.zoom) for _value in bounds)
+
+    #  Window pixels to board pixels and back.
+
+    def board_point(self, x: int, y: int) -> tuple[float, float]:
+        return (
+            self.canvas.canvasx(x) / self.zoom,
+            self.canvas.canvasy(y) / self.zoom,
+        )
+
+    def window_point(self, x: float, y: float) -> tuple[int, int]:
+        return (
+            round(x * self.zoom - self.canvas.canvasx(0)),
+            round(y * self.zoom - self.canvas.canvasy(0)),
+        )
+
+    #  Position everything after the layout changed.
+
+    def update_geometry(self) -> None:
+        self.update_scrollregion()
+
+        _outer, _inner, _gutter = self.layout.boarders()
+        self.canvas.coords(self.items[(BOARD, BOARD, "outer")], *self.scaled(_outer))
+        self.canvas.coords(self.items[(BOARD, BOARD, "inner")], *self.scaled(_inner))
+        self.canvas.coords(
+            self.items[(BOARD, BOARD, "gutter")], *self.scaled(_gutter)
+        )
+
+        for _row, _column in self.visible:
+            self.position_cell(_row, _column)
+        self.update_selection()
+        self.update_viewport()
+
+    #  A board smaller than the window is centred in it.
+
+    def update_scrollregion(self) -> None:
+        _width: int = round(self.layout.width * self.zoom)
+        _height: int = round(self.layout.height * self.zoom)
+        _x0: int = min(0, (_width - self.canvas.winfo_width()) // 2)
+        _y0: int = min(0, (_height - self.canvas.winfo_height()) // 2)
+        self.canvas.configure(
+            scrollregion=(
+                _x0,
+                _y0,
+                max(_width, _x0 + self.canvas.winfo_width()),
+                max(_height, _y0 + self.canvas.winfo_height()),
+            )
+        )
+
+    #  Viewport.
+
+    #  The rows and columns, end exclusive, that intersect the window.
+
+    def visible_range(self) -> tuple[int, int, int, int]:
+        _x0, _y0 = self.board_point(0, 0)
+        _x1, _y1 = self.board_point(
+            self.canvas.winfo_width(), self.canvas.winfo_height()
+        )
+        _rows: range = self.layout.rows_between(_y0, _y1)
+        _columns: range = self.layout.columns_between(_x0, _x1)
+        return (
+            max(_rows.start - MARGIN, 0),
+            min(_rows.stop + MARGIN, self.dimensions[0]),
+            max(_columns.start - MARGIN, 0),
+            min(_columns.stop + MARGIN, self.dimensions[1]),
+        )
+
+    def schedule_viewport(self) -> None:
+        if self.viewport_pending is None and self.gameboard is not None:
+            self.viewport_pending = self.canvas.after_idle(self.update_viewport)
+
+    def update_viewport(self) -> None:
+        if self.viewport_pending is not None:
+            self.canvas.after_cancel(self.viewport_pending)
+            self.viewport_pending = None
+
+        if self.tiled:
+            for _cell in list(self.visible):
+                self.release(*_cell)
+            self.range = (0, 0, 0, 0)
+            self.update_tiles()
+            return
+        self.clear_tiles()
+
+        _range = self.visible_range()
+        if _range == self.range:
+            return
+        self.range = _range
+        _row0, _row1, _column0, _column1 = _range
+
+        for _row, _column in list(self.visible):
+            if not (_row0 <= _row < _row1 and _column0 <= _column < _column1):
+                self.release(_row, _column)
+
+        for _row in range(_row0, _row1):
+            for _column in range(_column0, _column1):
+                if (_row, _column) not in self.visible:
+                    self.acquire(_row, _column)
+
+        #  Keep no more hidden items than there are visible ones.
+
+        while len(self.free) > len(self.visible):
+            self.canvas.delete(*self.free.pop())
+
+        if self.restack:
+            self.restack = False
+            for _tag in STACKING:
+                self.canvas.tag_raise(_tag)
+
+    def acquire(self, row: int, column: int) -> None:
+        if self.free:
+            _items: tuple[int, ...] = self.free.pop()
+            for _item in _items:
+                self.canvas.itemconfigure(_item, state="normal")
+        else:
+            _items = (
+                self.canvas.create_rectangle(0, 0, 0, 0, width=0, tags=("padding",)),
+                self.canvas.create_rectangle(0, 0, 0, 0, width=0, tags=("cell",)),
+                self.canvas.create_image(0, 0, anchor=CENTER, tags=("decorator",)),
+                self.canvas.create_image(0, 0, anchor=CENTER, tags=("token",)),
+            )
+            self.restack = True
+        self.visible[(row, column)] = _items
+        self.position_cell(row, column)
+        self.update_cell(row, column)
+
+    def release(self, row: int, column: int) -> None:
+        _items: tuple[int, ...] = self.visible.pop((row, column))
+        for _item in _items:
+            self.canvas.itemconfigure(_item, state="hidden")
+        for _layer in ("decorator", "token"):
+            self.canvas.itemconfigure(_items[CELL_LAYERS.index(_layer)], image="")
+            self.images.pop((row, column, _layer), None)
+            self.photos.pop((row, column, _layer), None)
+            _placeholder: Optional[int] = self.items.pop(
+                (row, column, _layer + "_pending"), None
+            )
+            if _placeholder is not None:
+                self.canvas.delete(_placeholder)
+        self.free.append(_items)
+
+    def position_cell(self, row: int, column: int) -> None:
+        _items: tuple[int, ...] = self.visible[(row, column)]
+        self.canvas.coords(
+            _items[0], *self.scaled(self.layout.cell_bounds(row, column))
+        )
+        self.canvas.coords(
+            _items[1], *self.scaled(self.layout.cell_rectangle(row, column))
+        )
+        self.update_cell_images(row, column)
+
+    #  Colours.
+
+    def update_boarders(self) -> None:
+        self.canvas.itemconfigure(
+            self.items[(BOARD, BOARD, "outer")],
+            fill=self.gameboard.colour_of_outer_boarder,
+        )
+        self.canvas.itemconfigure(
+            self.items[(BOARD, BOARD, "inner")],
+            fill=self.gameboard.colour_of_inner_boarder,
+        )
+        self.canvas.itemconfigure(
+            self.items[(BOARD, BOARD, "gutter")],
+            fill=self.gameboard.colour_of_cell_gutter,
+        )
+
+    def update_cell(self, row: int, column: int) -> None:
+        _items: Optional[tuple[int, ...]] = self.visible.get((row, column))
+        if _items is None:
+            return
+        self.canvas.itemconfigure(
+            _items[0], fill=self.gameboard.colour_of_cell_padding[row][column]
+        )
+        self.canvas.itemconfigure(
+            _items[1], fill=self.gameboard.colour_of_cell[row][column]
+        )
+        self.update_cell_images(row, column)
+
+    def update_cells(self) -> None:
+        for _row, _column in list(self.visible):
+            self.update_cell(_row, _column)
+
+    #  Cell decorators and placed tokens.
+
+    def update_cell_images(self, row: int, column: int) -> None:
+        _token_files: dict[str, str] = dict(self.gameboard.tokens)
+        _token: str = self.gameboard.placed_tokens[row][column]
+
+        self.update_cell_image(
+            row, column, "decorator", self.gameboard.cell_decorator[row][column]
+        )
+        self.update_cell_image(row, column, "token", _token_files.get(_token, ""))
+
+    def update_cell_image(
+        self, row: int, column: int, layer: str, filename: str
+    ) -> None:
+        _item: int = self.visible[(row, column)][CELL_LAYERS.index(layer)]
+        _x0, _y0, _x1, _y1 = self.scaled(self.layout.cell_rectangle(row, column))
+        self.canvas.coords(_item, (_x0 + _x1) // 2, (_y0 + _y1) // 2)
+
+        _placeholder: Optional[int] = self.items.get(
+            (row, column, layer + "_pending")
+        )
+        if _placeholder is not None:
+            self.canvas.coords(_placeholder, _x0, _y0, _x1, _y1)
+
+        _shown = (filename, _x1 - _x0, _y1 - _y0)
+        if self.images.get((row, column, layer)) == _shown:
+            return
+        self.images[(row, column, layer)] = _shown
+
+        _image = None
+        if filename != "" and _x1 > _x0 and _y1 > _y0:
+            _image = self.get_image(filename, _x1 - _x0, _y1 - _y0)
+
+        #  Show a placeholder over the cell while the image is being decoded.
+
+        if _image is PENDING:
+            _image = None
+            if _placeholder is None:
+                self.items[(row, column, layer + "_pending")] = (
+                    self.canvas.create_rectangle(
+                        _x0,
+                        _y0,
+                        _x1,
+                        _y1,
+                        fill=PLACEHOLDER_COLOUR,
+                        stipple="gray25",
+                        width=0,
+                        tags=("pending",),
+                    )
+                )
+        elif _placeholder is not None:
+            self.canvas.delete(_placeholder)
+            del self.items[(row, column, layer + "_pending")]
+
+        self.photos[(row, column, layer)] = _image
+        self.canvas.itemconfigure(_item, image=_image if _image is not None else "")
+
+    #  Show an image that has finished decoding wherever it is used.
+
+    def refresh_image(self, filename: str) -> None:
+        if self.canvas is None:
+            return
+
+        _cells: set[tuple[int, int]] = set()
+        for _key, _shown in list(self.images.items()):
+            if _shown[0] == filename:
+                del self.images[_key]
+                _cells.add(_key[:2])
+        for _row, _column in _cells:
+            if (_row, _column) in self.visible:
+                self.update_cell_images(_row, _column)
+
+        for _decorator in self.gameboard.board_decorator:
+            if _decorator[0] == filename:
+                self.update_board_decorators()
+                break
+
+    def update_tokens(self) -> None:
+        for _row, _column in self.visible:
+            self.update_cell_images(_row, _column)
+
+    #  Board decorators. These are shown at their own size, scaled by the zoom,
+    #  so the unscaled image is needed first to know what size to ask for.
+
+    def update_board_decorators(self) -> None:
+        self.canvas.delete("board_decorator")
+        for _key in [_key for _key in self.items if _key[2] == "board_decorator"]:
+            del self.items[_key]
+            self.photos.pop(_key, None)
+
+        if self.tiled:
+            return
+
+        for _index, _decorator in enumerate(self.gameboard.board_decorator):
+            _filename, _x, _y = _decorator
+            if _filename == "":
+                continue
+            _image = self.get_image(_filename, None, None)
+            if _image is not None and _image is not PENDING and self.zoom != 1.0:
+                _width, _height = self.scaled((_image.width(), _image.height()))
+                _image = None
+                if _width > 0 and _height > 0:
+                    _image = self.get_image(_filename, _width, _height)
+            if _image is None or _image is PENDING:
+                continue
+            _item: int = self.canvas.create_image(
+                *self.scaled((int(_x), int(_y))),
+                image=_image,
+                anchor=CENTER,
+                tags=("board_decorator",),
+            )
+            self.items[(BOARD, _index, "board_decorator")] = _item
+            self.photos[(BOARD, _index, "board_decorator")] = _image
+
+        self.canvas.tag_raise("token")
+        self.canvas.tag_raise("pending")
+
+    #  Tiles.
+
+    @property
+    def tiled(self) -> bool:
+        return self.tiles is not None and self.zoom < TILED_BELOW
+
+    #  Cell changes only drop the tiles under the cell, anything else that is
+    #  drawn drops them all.
+
+    def invalidate_tiles(self, changes: list[Change]) -> None:
+        for _change in changes:
+            if _change.field in UNRENDERED_FIELDS:
+                continue
+            if _change.field in CELL_FIELDS and _change.key is not None:
+                self.tiles.invalidate(self.layout.cell_bounds(*_change.key))
+                continue
+            _patched: Optional[Mask] = None
+            if _change.field in CELL_FIELDS:
+                _patched = self.patched(_change)
+            if _patched is None:
+                self.tiles.invalidate()
+                return
+            _bounds = _patched.bounds()
+            if _bounds is not None:
+                self.tiles.invalidate(self.block_bounds(_bounds))
+
+    def update_tiles(self) -> None:
+        _x0: int = int(self.canvas.canvasx(0))
+        _y0: int = int(self.canvas.canvasy(0))
+        _x1: int = _x0 + self.canvas.winfo_width()
+        _y1: int = _y0 + self.canvas.winfo_height()
+        _columns: int = -(-round(self.layout.width * self.zoom) // TILE_SIZE)
+        _rows: int = -(-round(self.layout.height * self.zoom) // TILE_SIZE)
+
+        _keys: set[TileKey] = {
+            (self.zoom, _column, _row)
+            for _row in range(
+                max(_y0 // TILE_SIZE - TILE_MARGIN, 0),
+                min((_y1 - 1) // TILE_SIZE + 1 + TILE_MARGIN, _rows),
+            )
+            for _column in range(
+                max(_x0 // TILE_SIZE - TILE_MARGIN, 0),
+                min((_x1 - 1) // TILE_SIZE + 1 + TILE_MARGIN, _columns),
+            )
+        }
+
+        for _key in [_key for _key in self.tile_items if _key not in _keys]:
+            self.canvas.delete(self.tile_items.pop(_key))
+            self.tile_photos.pop(_key, None)
+
+        _layout: BoardLayout = self.current_tile_layout()
+        for _key in _keys:
+            if _key not in self.tile_items:
+                self.tile_items[_key] = self.canvas.create_image(
+                    _key[1] * TILE_SIZE,
+                    _key[2] * TILE_SIZE,
+                    anchor="nw",
+                    tags=("tile",),
+                )
+            self.show_tile(_key, self.tiles.request(self.gameboard, _key, _layout))
+        self.canvas.tag_raise("selection")
+
+    #  A tile that is being rendered again keeps showing its old image until the
+    #  new one is ready.
+
+    def show_tile(self, key: TileKey, image) -> None:
+        if image is None or image is PENDING:
+            return
+        if self.tile_photos.get(key) is not image:
+            self.tile_photos[key] = image
+            self.canvas.itemconfigure(self.tile_items[key], image=image)
+
+    #  The workers read the layout while the designer may be changing it, so
+    #  they are given a copy.
+
+    def current_tile_layout(self) -> BoardLayout:
+        if self.tile_layout is self.layout or (
+            self.tile_layout.version != self.layout.version
+            or self.tile_layout.gameboard is not self.gameboard
+        ):
+            self.tile_layout = self.layout.copy()
+        return self.tile_layout
+
+    def refresh_tiles(self, keys: list[TileKey]) -> None:
+        if self.canvas is None or not self.tiled:
+            return
+        _layout: BoardLayout = self.current_tile_layout()
+        for _key in keys:
+            if _key in self.tile_items:
+                self.show_tile(_key, self.tiles.request(self.gameboard, _key, _layout))
+
+    def clear_tiles(self) -> None:
+        if self.tile_items:
+            self.canvas.delete("tile")
+            self.tile_items = {}
+            self.tile_photos = {}
+
+    #  Zoom, keeping the board point under (x, y) in the window where it is.
+
+    def zoom_to(self, zoom: float, x: Optional[int] = None, y: Optional[int] = None):
+        if self.canvas is None or zoom == self.zoom:
+            return
+        if x is None or y is None:
+            x, y = self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2
+
+        _board_x, _board_y = self.board_point(x, y)
+        self.zoom = zoom
+        self.update_scrollregion()
+
+        _x0, _y0, _x1, _y1 = (
+            float(_value) for _value in self.canvas.cget("scrollregion").split()
+        )
+        self.canvas.xview_moveto((_board_x * zoom - x - _x0) / (_x1 - _x0))
+        self.canvas.yview_moveto((_board_y * zoom - y - _y0) / (_y1 - _y0))
+
+        #  The layout is unchanged, only its scale.
+
+        self.update_geometry()
+        self.update_cells()
+        self.update_board_decorators()
+
+    def zoom_step(self, steps: int, x: Optional[int] = None, y: Optional[int] = None):
+        _index: int = min(
+            range(len(ZOOM_LEVELS)), key=lambda _i: abs(ZOOM_LEVELS[_i] - self.zoom)
+        )
+        _index = max(0, min(len(ZOOM_LEVELS) - 1, _index + steps))
+        self.zoom_to(ZOOM_LEVELS[_index], x, y)
+
+    def zoom_in(self) -> None:
+        self.zoom_step(1)
+
+    def zoom_out(self) -> None:
+        self.zoom_step(-1)
+
+    def zoom_reset(self) -> None:
+        self.zoom_to(1.0)
+
+    #  Selection.
+
+    #  The board pixels covered by a block of cells.
+
+    def block_bounds(self, block: Block) -> tuple[int, int, int, int]:
+        _top, _left, _bottom, _right = block
+        _x0, _y0, _, _ = self.layout.cell_bounds(_top, _left)
+        _, _, _x1, _y1 = self.layout.cell_bounds(_bottom - 1, _right - 1)
+        return _x0, _y0, _x1, _y1
+
+    #  Outline the selection over the cells. A single selected cell is shown by
+    #  the palette alone.
+
+    def update_selection(self) -> None:
+        _blocks: list[Block] = self.selection.blocks if len(self.selection) > 1 else []
+
+        while len(self.selection_items) > len(_blocks):
+            self.canvas.delete(self.selection_items.pop())
+        while len(self.selection_items) < len(_blocks):
+            self.selection_items.append(
+                self.canvas.create_rectangle(
+                    0,
+                    0,
+                    0,
+                    0,
+                    outline=SELECTION_COLOUR,
+                    width=SELECTION_WIDTH,
+                    tags=("selection",),
+                )
+            )
+
+        for _item, _block in zip(self.selection_items, _blocks):
+            self.canvas.coords(_item, *self.scaled(self.block_bounds(_block)))
+        self.canvas.tag_raise("selection")
+
+    #  The cell under a point in the window, None outside the cells.
+
+    def cell_under(self, event: Event) -> Optional[tuple[int, int]]:
+        _cell = self.layout.cell_at(*self.board_point(event.x, event.y))
+        if _cell[0] == -1 or _cell[1] == -1:
+            return None
+        return _cell
+
+    #  Events.
+
+    def on_configure(self, event: Event) -> None:
+        if self.gameboard is not None:
+            self.update_scrollregion()
+            self.schedule_viewport()
+
+    #  The wheel scrolls vertically, with Shift horizontally and with Control it
+    #  zooms. X11 reports the wheel as buttons 4 and 5, the others as a delta.
+
+    def on_wheel(self, event: Event) -> None:
+        if getattr(event, "num", None) == 4:
+            _steps: int = -1
+        elif getattr(event, "num", None) == 5:
+            _steps = 1
+        else:
+            _steps = -1 if event.delta > 0 else 1
+
+        if event.state & 0x0004:
+            self.zoom_step(-_steps, event.x, event.y)
+        elif event.state & 0x0001:
+            self.canvas.xview_scroll(_steps * 3, "units")
+        else:
+            self.canvas.yview_scroll(_steps * 3, "units")
+
+    def on_pan_start(self, event: Event) -> None:
+        self.canvas.scan_mark(event.x, event.y)
+
+    def on_pan(self, event: Event) -> None:
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+
+    #  Map a click on the canvas to a cell. The cell clicked, or the cell a
+    #  rectangle was dragged from, is shown in the palette. A cell removed from
+    #  the selection is not shown, one of the cells still selected is.
+
+    def on_click(self, event: Event) -> None:
+        _cell = self.layout.cell_at(*self.board_point(event.x, event.y))
+        if -1 not in _cell:
+            self.selection.select(_cell)
+            self.update_selection()
+        self.on_cell_selected(_cell)
+
+    def on_toggle(self, event: Event) -> None:
+        _cell = self.cell_under(event)
+        if _cell is None:
+            return
+        self.selection.toggle(_cell)
+        self.update_selection()
+        if _cell not in self.selection:
+            _cell = next(self.selection.cells(), None)
+        if _cell is not None:
+            self.on_cell_selected(_cell)
+
+    def on_drag_start(self, event: Event) -> None:
+        self.anchor = self.cell_under(event)
+        if self.anchor is None:
+            return
+        self.selected_before = []
+        if event.state & 0x0004:
+            self.selected_before = list(self.selection.blocks)
+        self.on_drag(event)
+
+    def on_drag(self, event: Event) -> None:
+        if self.anchor is None:
+            return
+        _cell = self.cell_under(event)
+        if _cell is None:
+            return
+        self.selection.blocks = list(self.selected_before)
+        self.selection.select_rectangle(self.anchor, _cell, add=True)
+        self.update_selection()
+
+    def on_drag_end(self, event: Event) -> None:
+        if self.anchor is None:
+            return
+        _anchor, self.anchor = self.anchor, None
+        self.selected_before = []
+        self.on_cell_selected(_anchor)
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+from typing import Iterator
+
+from bulkfill import Mask, rectangle
+
+#  Multiple cell selection.
+
+#  A selection is held as a list of disjoint blocks of cells, each a rectangle
+#  given as top, left, bottom and right rows and columns, end exclusive. A
+#  dragged rectangle of any size is one block, drawn as one overlay item and
+#  turned into one slice per row of a bulkfill mask. Cells picked one at a time
+#  are blocks of one cell, and removing a cell from a block splits it into the
+#  blocks around the cell.
+
+#  Like bulkfill, selections do not need Tk.
+
+Block = tuple[int, int, int, int]
+
+
+#  The parts of block outside cut, as up to four blocks: the rows above and below
+#  cut, then the columns either side of it.
+
+
+def subtract(block: Block, cut: Block) -> list[Block]:
+    _top, _left, _bottom, _right = block
+    _cut_top, _cut_left, _cut_bottom, _cut_right = cut
+    if (
+        _cut_top >= _bottom
+        or _cut_bottom <= _top
+        or _cut_left >= _right
+        or _cut_right <= _left
+    ):
+        return [block]
+
+    _blocks: list[Block] = []
+    if _cut_top > _top:
+        _blocks.append((_top, _left, _cut_top, _right))
+    if _cut_bottom < _bottom:
+        _blocks.append((_cut_bottom, _left, _bottom, _right))
+    _middle_top: int = max(_top, _cut_top)
+    _middle_bottom: int = min(_bottom, _cut_bottom)
+    if _cut_left > _left:
+        _blocks.append((_middle_top, _left, _middle_bottom, _cut_left))
+    if _cut_right < _right:
+        _blocks.append((_middle_top, _cut_right, _middle_bottom, _right))
+    return _blocks
+
+
+def block_between(first: tuple[int, int], second: tuple[int, int]) -> Block:
+    return (
+        min(first[0], second[0]),
+        min(first[1], second[1]),
+        max(first[0], second[0]) + 1,
+        max(first[1], second[1]) + 1,
+    )
+
+
+class Selection:
+    def __init__(self) -> None:
+        self.blocks: list[Block] = []
+
+    def __len__(self) -> int:
+        return sum(
+            (_bottom - _top) * (_right - _left)
+            for _top, _left, _bottom, _right in self.blocks
+        )
+
+    def __contains__(self, cell: tuple[int, int]) -> bool:
+        return any(
+            _top <= cell[0] < _bottom and _left <= cell[1] < _right
+            for _top, _left, _bottom, _right in self.blocks
+        )
+
+    def cells(self) -> Iterator[tuple[int, int]]:
+        for _top, _left, _bottom, _right in self.blocks:
+            for _row in range(_top, _bottom):
+                for _column in range(_left, _right):
+                    yield _row, _column
+
+    def clear(self) -> None:
+        self.blocks = []
+
+    def select(self, cell: tuple[int, int]) -> None:
+        self.blocks = [block_between(cell, cell)]
+
+    def add(self, block: Block) -> None:
+        self.remove(block)
+        self.blocks.append(block)
+
+    def remove(self, block: Block) -> None:
+        self.blocks = [_part for _old in self.blocks for _part in subtract(_old, block)]
+
+    def toggle(self, cell: tuple[int, int]) -> None:
+        if cell in self:
+            self.remove(block_between(cell, cell))
+        else:
+            self.add(block_between(cell, cell))
+
+    #  Select the cells between two corners, in place of the selection or added
+    #  to it.
+
+    def select_rectangle(
+        self, first: tuple[int, int], second: tuple[int, int], add: bool = False
+    ) -> None:
+        if not add:
+            self.clear()
+        self.add(block_between(first, second))
+
+    #  Drop the cells that are no longer on a board that has shrunk.
+
+    def clamp(self, rows: int, columns: int) -> None:
+        self.blocks = [
+            (_top, _left, min(_bottom, rows), min(_right, columns))
+            for _top, _left, _bottom, _right in self.blocks
+            if _top < rows and _left < columns
+        ]
+
+    def mask(self, rows: int, columns: int) -> Mask:
+        _mask: Mask = Mask(rows, columns, [])
+        for _block in self.blocks:
+            _mask = _mask | rectangle(rows, columns, *_block)
+        return _mask
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import sys
+import time
+from typing import Optional, TextIO
+
+#  Startup phase timings.
+
+#  Each call to mark closes the phase running since the previous mark, or since
+#  the start time for the first. gameboarddesigner.py takes its start time before
+#  its own imports so the first phase covers them.
+
+
+class StartupProfile:
+    def __init__(self, started: Optional[float] = None, report: bool = False) -> None:
+        self.started: float = time.perf_counter() if started is None else started
+        self.last: float = self.started
+        self.phases: list[tuple[str, float]] = []
+        self.reported: bool = report
+        self.finished: bool = False
+
+    def mark(self, phase: str) -> None:
+        _now: float = time.perf_counter()
+        self.phases.append((phase, _now - self.last))
+        self.last = _now
+
+    @property
+    def total(self) -> float:
+        return self.last - self.started
+
+    #  Called once the main loop is running.
+
+    def finish(self, file: Optional[TextIO] = None) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        self.mark("mainloop entry")
+        if self.reported:
+            self.report(file or sys.stderr)
+
+    def report(self, file: TextIO) -> None:
+        _width: int = max([len(_phase) for _phase, _ in self.phases] + [5])
+        print(f"{'phase':<{_width}}  {'ms':>8}  {'total':>8}", file=file)
+        _total: float = 0.0
+        for _phase, _seconds in self.phases:
+            _total += _seconds
+            print(
+                f"{_phase:<{_width}}  {_seconds * 1000:8.1f}  {_total * 1000:8.1f}",
+                file=file,
+            )
@@ -0,0 +1,523 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+import io
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Any, Optional
+
+from boardmodel import CELL_FIELDS, COLUMN_FIELDS, GRID_TYPES, ROW_FIELDS, BoardModel
+from cellgrid import Grid
+
+#  Versioned binary gameboard format (.tab2).
+
+#  Layout, all little-endian:
+#
+#    header          magic, version, header size, rows, columns, the eight boarder
+#                    widths and the number of sections
+#    section table   one entry per section: tag, typecode, offset and length
+#    sections        each aligned to 8 bytes
+#
+#  The row and column geometry is stored as arrays of 32-bit integers and the cell
+#  grids in the packed form used by cellgrid, so every numeric section can be
+#  mapped straight out of an mmap without parsing. Strings (metadata, tokens,
+#  board decorators and the grid string tables) are small JSON sections.
+#
+#  The name, author and dimensions can be read from the header and the META
+#  section alone without touching the rest of the file.
+
+MAGIC = b"GBTAB\r\n\x1a"
+VERSION = 2
+EXTENSION = ".tab2"
+
+HEADER = struct.Struct("<8sHHII8II")
+SECTION = struct.Struct("<4sc3xQQ")
+ALIGNMENT = 8
+
+BOARDER_FIELDS = (
+    "width_of_left_outer_boarder",
+    "width_of_top_outer_boarder",
+    "width_of_right_outer_boarder",
+    "width_of_bottom_outer_boarder",
+    "width_of_left_inner_boarder",
+    "width_of_top_inner_boarder",
+    "width_of_right_inner_boarder",
+    "width_of_bottom_inner_boarder",
+)
+
+META_FIELDS = (
+    "name",
+    "version",
+    "date",
+    "author",
+    "colour_of_outer_boarder",
+    "colour_of_inner_boarder",
+    "colour_of_cell_gutter",
+)
+
+ARRAY_TAGS = {
+    "width_of_cell": b"COLW",
+    "left_padding_of_cell": b"COLL",
+    "right_padding_of_cell": b"COLR",
+    "size_of_vertical_gutter_after_cell": b"COLG",
+    "height_of_cell": b"ROWH",
+    "top_padding_of_cell": b"ROWT",
+    "bottom_padding_of_cell": b"ROWB",
+    "size_of_horizontal_gutter_after_cell": b"ROWG",
+    "colour_of_cell": b"CELC",
+    "colour_of_cell_padding": b"CELP",
+    "cell_decorator": b"CELD",
+    "placed_tokens": b"CELT",
+}
+
+META = b"META"
+TABLES = b"TABL"
+TOKENS = b"TOKS"
+BOARD_DECORATORS = b"BDEC"
+
+
+class TabFormatError(Exception):
+    pass
+
+
+#  Stand-in for gameboard.gameboard.Gameboard, so legacy files can be read and
+#  written without the gameboard package and without unpickling arbitrary
+#  classes.
+
+
+class LegacyGameboard:
+    pass
+
+
+class LegacyUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) == ("gameboard.gameboard", "Gameboard"):
+            return LegacyGameboard
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a .tab file")
+
+
+#  Legacy files are written with the C pickler. It cannot name a class that is
+#  not importable, so the state of the board is pickled on its own and wrapped
+#  in the opcodes the pickler writes for an instance of a plain class: the
+#  gameboard.gameboard.Gameboard global, a new object of it, and the state built
+#  into it. The wrapper memoizes nothing, so the memo indices of the state are
+#  unchanged. The state's final STOP is turned into the BUILD, which keeps the
+#  length of the frame it ends, and a STOP follows outside it.
+
+LEGACY_PROTOCOL = 4
+
+
+def short_unicode(value: str) -> bytes:
+    _data: bytes = value.encode("utf-8")
+    return pickle.SHORT_BINUNICODE + bytes([len(_data)]) + _data
+
+
+LEGACY_PREFIX = (
+    pickle.PROTO
+    + bytes([LEGACY_PROTOCOL])
+    + short_unicode("gameboard.gameboard")
+    + short_unicode("Gameboard")
+    + pickle.STACK_GLOBAL
+    + pickle.EMPTY_TUPLE
+    + pickle.NEWOBJ
+)
+
+
+def is_tab2(filename: str) -> bool:
+    try:
+        with open(filename, "rb") as _file:
+            return _file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+#  Lazy reader.
+
+
+#  A board already held in memory, such as one packed in a bundle, is read from
+#  data in place of the file.
+
+
+class TabFile:
+    def __init__(self, filename: str, data: Optional[bytes] = None) -> None:
+        self.file = None
+        if data is not None:
+            self.map = data
+        else:
+            self.file = open(filename, "rb")
+            try:
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                self.file.close()
+                raise TabFormatError(f"{filename} is empty")
+
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise TabFormatError(f"{filename} is truncated")
+
+        _header = HEADER.unpack_from(self.map, 0)
+        if _header[0] != MAGIC:
+            self.close()
+            raise TabFormatError(f"{filename} is not a .tab2 file")
+        if _header[1] > VERSION:
+            self.close()
+            raise TabFormatError(f"{filename} has unsupported version {_header[1]}")
+
+        self.version: int = _header[1]
+        self.rows: int = _header[3]
+        self.columns: int = _header[4]
+        self.boarders: dict[str, int] = dict(zip(BOARDER_FIELDS, _header[5:13]))
+
+        self.sections: dict[bytes, tuple[str, int, int]] = {}
+        _offset: int = _header[2]
+        for _ in range(_header[13]):
+            _tag, _typecode, _start, _length = SECTION.unpack_from(self.map, _offset)
+            if _start + _length > len(self.map):
+                self.close()
+                raise TabFormatError(f"{filename} is truncated")
+            self.sections[_tag] = (_typecode.decode("ascii"), _start, _length)
+            _offset += SECTION.size
+
+        self._meta: Optional[dict] = None
+
+    def __enter__(self) -> "TabFile":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.file is None:
+            return
+        if not self.map.closed:
+            self.map.close()
+        self.file.close()
+
+    #  Raw section access. A view shares memory with the map and must be released
+    #  before the file is closed.
+
+    def view(self, tag: bytes) -> memoryview:
+        _typecode, _start, _length = self.sections[tag]
+        _view = memoryview(self.map)[_start : _start + _length]
+        return _view.cast(_typecode) if _typecode != "B" else _view
+
+    def array(self, tag: bytes) -> array:
+        _typecode, _start, _length = self.sections[tag]
+        _array = array(_typecode)
+        _array.frombytes(self.map[_start : _start + _length])
+        if sys.byteorder == "big":
+            _array.byteswap()
+        return _array
+
+    def json(self, tag: bytes) -> Any:
+        _, _start, _length = self.sections[tag]
+        return json.loads(self.map[_start : _start + _length].decode("utf-8"))
+
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            self._meta = self.json(META)
+        return self._meta
+
+    @property
+    def name(self) -> str:
+        return self.meta["name"]
+
+    @property
+    def author(self) -> str:
+        return self.meta["author"]
+
+    def list(self, field: str) -> list[int]:
+        return self.array(ARRAY_TAGS[field]).tolist()
+
+    def grid(self, field: str) -> Grid:
+        _grid: Grid = GRID_TYPES[field](
+            self.rows, self.columns, self.array(ARRAY_TAGS[field])
+        )
+        _tables: dict[str, list[str]] = self.json(TABLES)
+        _grid.table = _tables[field]
+        _grid.interned = {_value: _index for _index, _value in enumerate(_grid.table)}
+        return _grid
+
+    #  Read the whole board into gameboard, by default a LegacyGameboard. The
+    #  cell fields are set to grids unless lists is set.
+
+    def read(self, gameboard: Any = None, lists: bool = False) -> Any:
+        if gameboard is None:
+            gameboard = LegacyGameboard()
+
+        for _field in META_FIELDS:
+            setattr(gameboard, _field, self.meta[_field])
+        for _field, _value in self.boarders.items():
+            setattr(gameboard, _field, _value)
+        gameboard.number_of_cells_vertically = self.rows
+        gameboard.number_of_cells_horizontally = self.columns
+
+        for _field in ROW_FIELDS + COLUMN_FIELDS:
+            setattr(gameboard, _field, self.list(_field))
+        for _field in CELL_FIELDS:
+            _grid: Grid = self.grid(_field)
+            setattr(gameboard, _field, _grid.to_lists() if lists else _grid)
+
+        gameboard.tokens = [tuple(_token) for _token in self.json(TOKENS)]
+        gameboard.board_decorator = [
+            tuple(_decorator) for _decorator in self.json(BOARD_DECORATORS)
+        ]
+        return gameboard
+
+
+#  Writer.
+
+
+def encode(gameboard: Any) -> bytes:
+    _rows: int = gameboard.number_of_cells_vertically
+    _columns: int = gameboard.number_of_cells_horizontally
+
+    _sections: list[tuple[bytes, str, bytes]] = []
+
+    def _json(tag: bytes, value: Any) -> None:
+        _sections.append((tag, "B", json.dumps(value).encode("utf-8")))
+
+    def _array(tag: bytes, value: array) -> None:
+        if sys.byteorder == "big":
+            value = array(value.typecode, value)
+            value.byteswap()
+        _sections.append((tag, value.typecode, value.tobytes()))
+
+    _json(META, {_field: getattr(gameboard, _field) for _field in META_FIELDS})
+
+    for _field in ROW_FIELDS + COLUMN_FIELDS:
+        _array(ARRAY_TAGS[_field], array("I", map(int, getattr(gameboard, _field))))
+
+    _tables: dict[str, list[str]] = {}
+    for _field in CELL_FIELDS:
+        _grid = getattr(gameboard, _field)
+        if not isinstance(_grid, Grid):
+            _grid = GRID_TYPES[_field].from_lists(_grid)
+        _array(ARRAY_TAGS[_field], _grid.data)
+        _tables[_field] = _grid.table
+    _json(TABLES, _tables)
+
+    _json(TOKENS, [list(_token) for _token in gameboard.tokens])
+    _json(
+        BOARD_DECORATORS,
+        [
+            [_filename, int(_x), int(_y)]
+            for _filename, _x, _y in gameboard.board_decorator
+        ],
+    )
+
+    _offset: int = HEADER.size + SECTION.size * len(_sections)
+    _table: bytearray = bytearray()
+    _body: bytearray = bytearray()
+    for _tag, _typecode, _data in _sections:
+        _padding: int = -(_offset + len(_body)) % ALIGNMENT
+        _body.extend(b"\0" * _padding)
+        _table.extend(
+            SECTION.pack(
+                _tag, _typecode.encode("ascii"), _offset + len(_body), len(_data)
+            )
+        )
+        _body.extend(_data)
+
+    _header: bytes = HEADER.pack(
+        MAGIC,
+        VERSION,
+        HEADER.size,
+        _rows,
+        _columns,
+        *(int(getattr(gameboard, _field)) for _field in BOARDER_FIELDS),
+        len(_sections),
+    )
+    return _header + bytes(_table) + bytes(_body)
+
+
+#  Load and save, returning errors the same way as Gameboard.load and save.
+
+
+def load(filename: str, gameboard: Any = None) -> tuple[Any, str]:
+    try:
+        with TabFile(filename) as _tabfile:
+            return _tabfile.read(gameboard), ""
+    except (OSError, TabFormatError, KeyError, ValueError) as _error:
+        return None, str(_error)
+
+
+def save(gameboard: Any, filename: str) -> str:
+    try:
+        with open(filename, "wb") as _file:
+            _file.write(encode(gameboard))
+    except OSError as _error:
+        return str(_error)
+    return ""
+
+
+#  Legacy pickled .tab files.
+
+
+def load_legacy(filename: str) -> LegacyGameboard:
+    with open(filename, "rb") as _file:
+        return LegacyUnpickler(_file).load()
+
+
+#  Runtime state that Gameboard pickles along with the board but .tab2 does not
+#  store.
+
+LEGACY_STATE = {
+    "images": {},
+    "cell_dimensions": [],
+    "cell_selected_callback": None,
+    "saved": False,
+}
+
+
+def loads_legacy(data: bytes) -> LegacyGameboard:
+    return LegacyUnpickler(io.BytesIO(data)).load()
+
+
+def dumps_legacy(gameboard: Any) -> bytes:
+    _state: dict[str, Any] = dict(LEGACY_STATE)
+    _state.update(gameboard.__dict__)
+    for _field in CELL_FIELDS:
+        _grid = _state[_field]
+        if isinstance(_grid, Grid):
+            _state[_field] = _grid.to_lists()
+    _body: bytes = pickle.dumps(_state, protocol=LEGACY_PROTOCOL)
+    return LEGACY_PREFIX + _body[2:-1] + pickle.BUILD + pickle.STOP
+
+
+def save_legacy(gameboard: Any, filename: str) -> None:
+    with open(filename, "wb") as _file:
+        _file.write(dumps_legacy(gameboard))
+
+
+def load_any(filename: str) -> Any:
+    if is_tab2(filename):
+        with TabFile(filename) as _tabfile:
+            return _tabfile.read()
+    return load_legacy(filename)
+
+
+#  Convert between the two formats, in whichever direction the source implies.
+
+
+def convert(source: str, destination: str) -> None:
+    _gameboard = load_any(source)
+    if is_tab2(source):
+        save_legacy(_gameboard, destination)
+    else:
+        _error: str = save(_gameboard, destination)
+        if _error != "":
+            raise TabFormatError(_error)
+
+
+#  Compare load time and peak memory of the pickle and .tab2 paths.
+
+
+def synthetic_board(template: Any, rows: int, columns: int) -> Any:
+    _model = BoardModel(template)
+    _model.resize_columns(columns)
+    _model.resize_rows(rows)
+    return template
+
+
+def measure(function, repeat: int) -> tuple[float, int]:
+    _best: float = float("inf")
+    for _ in range(repeat):
+        _start: float = time.perf_counter()
+        function()
+        _best = min(_best, time.perf_counter() - _start)
+
+    tracemalloc.start()
+    function()
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _best, _peak
+
+
+def compare(filenames: list[str], directory: str, repeat: int = 20) -> None:
+    _boards: list[tuple[str, Any]] = [
+        (os.path.basename(_filename), load_legacy(_filename))
+        for _filename in filenames
+    ]
+    if filenames:
+        for _size in (10, 25, 50):
+            _boards.append(
+                (
+                    f"synthetic {_size}x{_size}",
+                    synthetic_board(load_legacy(filenames[0]), _size, _size),
+                )
+            )
+
+    print(
+        f"{'board':<20} {'format':<7} {'bytes':>8} {'load ms':>9} "
+        f"{'peak KB':>9} {'meta ms':>9}"
+    )
+    for _label, _gameboard in _boards:
+        _pickle: str = os.path.join(directory, "compare.tab")
+        _tab2: str = os.path.join(directory, "compare" + EXTENSION)
+        save_legacy(_gameboard, _pickle)
+        save(_gameboard, _tab2)
+
+        def _meta_pickle() -> str:
+            return load_legacy(_pickle).name
+
+        def _meta_tab2() -> str:
+            with TabFile(_tab2) as _tabfile:
+                return _tabfile.name
+
+        for _format, _filename, _load, _meta in (
+            ("pickle", _pickle, lambda: load_legacy(_pickle), _meta_pickle),
+            ("tab2", _tab2, lambda: load_any(_tab2), _meta_tab2),
+        ):
+            _time, _peak = measure(_load, repeat)
+            _meta_time, _ = measure(_meta, repeat)
+            print(
+                f"{_label:<20} {_format:<7} {os.path.getsize(_filename):>8} "
+                f"{_time * 1000:>9.3f} {_peak / 1024:>9.1f} {_meta_time * 1000:>9.3f}"
+            )
+
+        os.remove(_pickle)
+        os.remove(_tab2)
+
+
+def main() -> None:
+    _usage: str = (
+        "usage: tabformat.py convert SOURCE DESTINATION\n"
+        "       tabformat.py info FILE\n"
+        "       tabformat.py compare DIRECTORY FILE..."
+    )
+    _args: list[str] = sys.argv[1:]
+
+    if len(_args) == 3 and _args[0] == "convert":
+        convert(_args[1], _args[2])
+    elif len(_args) == 2 and _args[0] == "info":
+        if is_tab2(_args[1]):
+            with TabFile(_args[1]) as _tabfile:
+                print(f"{_tabfile.name} by {_tabfile.author}")
+                print(f"version {_tabfile.version}, {_tabfile.rows}x{_tabfile.columns}")
+                for _tag, (_typecode, _start, _length) in _tabfile.sections.items():
+                    print(
+                        f"  {_tag.decode('ascii')} {_typecode} "
+                        f"{_start:>8} {_length:>8}"
+                    )
+        else:
+            _gameboard = load_legacy(_args[1])
+            print(f"{_gameboard.name} by {_gameboard.author} (legacy pickle)")
+    elif len(_args) >= 2 and _args[0] == "compare":
+        compare(_args[2:], _args[1])
+    else:
+        print(_usage)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
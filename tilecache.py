@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+
+#  type: ignore
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from imagecache import BYTES_PER_PIXEL, PENDING
+
+if TYPE_CHECKING:
+    from PIL import ImageTk
+
+#  Tiled rendering of zoomed out boards.
+
+#  Below full size the designer shows the board as fixed size tiles, rasterized
+#  off-screen with rasterize.render_region, rather than as canvas items for every
+#  cell. Each zoom level is its own level of the pyramid and its tiles are kept
+#  in an LRU cache bounded by budget bytes, so panning and zooming back to a
+#  level blits cached tiles.
+
+#  Tiles are rendered on worker threads and turned into PhotoImages on the Tk
+#  thread, the same way as the image loader. Every tile has a version which is
+#  bumped when a cell or decorator inside it changes. A tile whose version moved
+#  on while it was being rendered is thrown away and rendered again.
+
+TILE_SIZE = 256
+
+DEFAULT_BUDGET = 48 * 1024 * 1024
+
+WORKERS = 2
+
+POLL_INTERVAL = 20
+
+#  (zoom, column, row) of a tile, the tile covers scaled pixels TILE_SIZE * column
+#  to TILE_SIZE * (column + 1) and likewise for row.
+
+TileKey = tuple[float, int, int]
+
+
+def tile_region(key: TileKey) -> tuple[int, int, int, int]:
+    _, _column, _row = key
+    return (
+        _column * TILE_SIZE,
+        _row * TILE_SIZE,
+        (_column + 1) * TILE_SIZE,
+        (_row + 1) * TILE_SIZE,
+    )
+
+
+#  Keys of the tiles at zoom that intersect a rectangle in board pixels.
+
+
+def tiles_over(zoom: float, bounds: tuple[float, float, float, float]) -> list:
+    _x0, _y0, _x1, _y1 = (round(_value * zoom) for _value in bounds)
+    return [
+        (zoom, _column, _row)
+        for _row in range(max(_y0, 0) // TILE_SIZE, (max(_y1, 1) - 1) // TILE_SIZE + 1)
+        for _column in range(
+            max(_x0, 0) // TILE_SIZE, (max(_x1, 1) - 1) // TILE_SIZE + 1
+        )
+    ]
+
+
+class TileCache:
+    def __init__(
+        self,
+        widget,
+        on_ready: Callable[[list[TileKey]], None],
+        budget: int = DEFAULT_BUDGET,
+        workers: int = WORKERS,
+    ) -> None:
+        self.widget = widget
+        self.on_ready: Callable[[list[TileKey]], None] = on_ready
+        self.budget: int = budget
+        self.size: int = 0
+        self.entries: OrderedDict[TileKey, tuple[Any, int]] = OrderedDict()
+
+        #  The version of a tile is the generation, bumped by invalidating the
+        #  whole board, and a count of the changes to that tile since.
+
+        self.generation: int = 0
+        self.versions: dict[TileKey, int] = {}
+        self.pending: dict[TileKey, tuple[int, int]] = {}
+        self.failed: set[tuple[TileKey, tuple[int, int]]] = set()
+
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="tilecache"
+        )
+        self.rendered: SimpleQueue = SimpleQueue()
+        self.polling: Optional[str] = None
+
+        #  Where tiles read their images, rasterize.load_image when None.
+
+        self.images: Optional[Callable] = None
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def version(self, key: TileKey) -> tuple[int, int]:
+        return self.generation, self.versions.get(key, 0)
+
+    #  Return the tile if it is cached, otherwise start rendering it and return
+    #  PENDING. None is returned for tiles that failed to render. layout is the
+    #  renderer's geometry at the time of the request.
+
+    def request(self, gameboard, key: TileKey, layout):
+        _entry = self.entries.get(key)
+        if _entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return _entry[0]
+        self.misses += 1
+
+        _version = self.version(key)
+        if (key, _version) in self.failed:
+            return None
+        if self.pending.get(key) != _version:
+            self.pending[key] = _version
+            self.executor.submit(self.render, gameboard, key, _version, layout)
+            if self.polling is None:
+                self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+        return PENDING
+
+    #  Drop the tiles that cover a rectangle in board pixels at every zoom level,
+    #  or every tile.
+
+    def invalidate(self, bounds: Optional[tuple[float, float, float, float]] = None):
+        if bounds is None:
+            self.generation += 1
+            self.versions.clear()
+            self.failed.clear()
+            self.entries.clear()
+            self.size = 0
+            return
+
+        _zooms: set[float] = {_key[0] for _key in self.entries}
+        _zooms.update(_key[0] for _key in self.pending)
+        for _zoom in _zooms:
+            for _key in tiles_over(_zoom, bounds):
+                self.versions[_key] = self.versions.get(_key, 0) + 1
+                _entry = self.entries.pop(_key, None)
+                if _entry is not None:
+                    self.size -= _entry[1]
+
+    def put(self, key: TileKey, image: Any, width: int, height: int) -> None:
+        _size: int = width * height * BYTES_PER_PIXEL
+        _entry = self.entries.pop(key, None)
+        if _entry is not None:
+            self.size -= _entry[1]
+
+        self.entries[key] = (image, _size)
+        self.size += _size
+
+        while self.size > self.budget and len(self.entries) > 1:
+            _, (_, _evicted) = self.entries.popitem(last=False)
+            self.size -= _evicted
+            self.evictions += 1
+
+    #  Worker thread. The board can be edited while a tile is rendered, anything
+    #  that goes wrong then is put down to that and the tile is rendered again.
+
+    def render(self, gameboard, key: TileKey, version, layout) -> None:
+        import rasterize
+
+        try:
+            _image, _ = rasterize.render_region(
+                gameboard,
+                tile_region(key),
+                key[0],
+                layout,
+                self.images or rasterize.load_image,
+            )
+        except Exception:
+            _image = None
+        self.rendered.put((key, version, _image))
+
+    #  Main thread.
+
+    def poll(self) -> None:
+        from PIL import ImageTk
+
+        self.polling = None
+        _ready: list[TileKey] = []
+
+        while True:
+            try:
+                _key, _version, _image = self.rendered.get_nowait()
+            except Empty:
+                break
+
+            if self.pending.get(_key) == _version:
+                del self.pending[_key]
+            if _version != self.version(_key):
+                continue
+
+            if _image is None:
+                self.failed.add((_key, _version))
+            else:
+                self.put(
+                    _key, ImageTk.PhotoImage(_image), _image.width, _image.height
+                )
+            _ready.append(_key)
+
+        if _ready:
+            self.on_ready(_ready)
+
+        if self.pending:
+            self.polling = self.widget.after(POLL_INTERVAL, self.poll)
+
+    def statistics(self) -> dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "size": self.size,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def shutdown(self) -> None:
+        if self.polling is not None:
+            self.widget.after_cancel(self.polling)
+            self.polling = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -4,7 +4,6 @@
 
 import re
 
-from CTkMessagebox import CTkMessagebox
 from customtkinter import CTkEntry, StringVar
 
 #  Validation.
@@ -13,6 +12,7 @@ from customtkinter import CTkEntry, StringVar
 def validated_int(
     textvariable: StringVar, entry: CTkEntry, data: int, min: int = 0, max: int = 50
 ) -> int:
+    from CTkMessagebox import CTkMessagebox
 
     try:
         _data = int(textvariable.get())
@@ -34,6 +34,7 @@ def validated_int(
 
 
 def validated_colour(textvariable: StringVar, entry: CTkEntry, data: int) -> int:
+    from CTkMessagebox import CTkMessagebox
 
     hex_color_regex = r"^#([A-Fa-f0-9]{6}|[A-Fa-f0-9]{3})$"
     if re.match(hex_color_regex, textvariable.get()):